@@ -0,0 +1,313 @@
+"""
+HTTP caching: body ETags with If-None-Match 304s, per-route Cache-Control
+(CACHE_POLICIES), gzip/brotli compression of complete responses, and
+precompressed static assets. Compressed variants carry the coding in
+their ETag ("<hash>-gzip").
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+from starlette.datastructures import Headers, MutableHeaders
+from fastapi import Request
+from fastapi.responses import Response, PlainTextResponse
+from backend.metrics import TimedJSONResponse, route_template
+from utils.constants import (
+    CACHE_TTL_RECIPE, CACHE_TTL_PARTIAL, HTTP_MAX_AGE_SEARCH, HTTP_MAX_AGE_DETAIL, HTTP_MAX_AGE_SUGGEST,
+    HTTP_MAX_AGE_STATIC, COMPRESS_MIN_SIZE, GZIP_LEVEL,
+)
+from utils.metrics import Counter, timed
+
+try:
+    import brotli
+except ImportError:  # optional — gzip only without it
+    brotli = None
+
+# Preferred first on equal q-values
+CODINGS = ("br", "gzip") if brotli else ("gzip",)
+BROTLI_QUALITY = 5          # per response; static assets get the maximum (11)
+
+_COMPRESSIBLE = (
+    "application/json", "application/javascript", "application/xml",
+    "application/x-ndjson", "image/svg+xml",
+)
+
+# Route template (backend/metrics.route_template) -> Cache-Control.
+# "/" is revalidated on every load (a 304 is cheap); anything not listed —
+# admin, metrics, POST-only endpoints — and every error response is no-store.
+CACHE_POLICIES = {
+    "/": "no-cache",
+    "/static": f"public, max-age={HTTP_MAX_AGE_STATIC}",
+    "/api/search-recipes": f"public, max-age={HTTP_MAX_AGE_SEARCH}",
+    "/api/recipe-detail": f"public, max-age={HTTP_MAX_AGE_DETAIL}",
+    "/api/recipe/{recipe_id}": f"public, max-age={CACHE_TTL_RECIPE}",
+    "/api/suggest": f"public, max-age={HTTP_MAX_AGE_SUGGEST}",
+}
+DEFAULT_POLICY = "no-store"
+# A recipe payload degraded by the request deadline: no longer than the server keeps it
+PARTIAL_POLICY = f"public, max-age={CACHE_TTL_PARTIAL}"
+
+COMPRESSION_BYTES = Counter(
+    "http_compression_bytes_total",
+    "Response body bytes before (stage=in) and after (stage=out) compression.",
+    ("encoding", "stage"),
+)
+
+
+# ---- validators -------------------------------------------------------------
+
+def body_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def encoded_etag(etag: str, coding: str) -> str:
+    """The ETag of the `coding` variant of a response ("" = identity)."""
+    return etag[:-1] + "-" + coding + '"' if coding else etag
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    for coding in ("br", "gzip"):
+        if tag.endswith("-" + coding):
+            return tag[:-len(coding) - 1]
+    return tag
+
+
+def match_etag(headers, etag: str):
+    """
+    The If-None-Match entry matching `etag` (any coding variant), or None.
+    If-None-Match uses weak comparison, so W/ tags match too.
+    """
+    header = headers.get("if-none-match")
+    if not header:
+        return None
+    if header.strip() == "*":
+        return etag
+    wanted = _opaque(etag)
+    for tag in header.split(","):
+        if _opaque(tag) == wanted:
+            return tag.strip()
+    return None
+
+
+def not_modified(etag: str, headers: dict = None) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, **(headers or {})})
+
+
+def payload_policy(payload: dict) -> dict:
+    """Cache-Control override for responses built from a partial recipe payload."""
+    return {"Cache-Control": PARTIAL_POLICY} if payload.get("partial") else {}
+
+
+def cached_json(request: Request, content) -> Response:
+    """JSON response with a strong ETag of its body, or a 304 when the client already has it."""
+    response = TimedJSONResponse(content)
+    etag = body_etag(response.body)
+    matched = match_etag(request.headers, etag)
+    if matched:
+        return not_modified(matched)
+    response.headers["ETag"] = etag
+    return response
+
+
+# ---- compression ------------------------------------------------------------
+
+def negotiate(accept_encoding: str) -> str:
+    """The coding to use for an Accept-Encoding header: "br", "gzip" or "" (identity)."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding] = weight
+    best, best_weight = "", 0.0
+    for coding in CODINGS:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compressible(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    return media_type.startswith("text/") or media_type in _COMPRESSIBLE
+
+
+def compress(body: bytes, coding: str, best: bool = False) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=11 if best else BROTLI_QUALITY)
+    # mtime=0: the same input always compresses to the same bytes
+    return gzip.compress(body, compresslevel=9 if best else GZIP_LEVEL, mtime=0)
+
+
+def _add_vary(headers: MutableHeaders):
+    vary = headers.get("vary")
+    if not vary:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["Vary"] = vary + ", Accept-Encoding"
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware. A response is compressed only when it arrives in one
+    body message, is at least `minimum_size` bytes, has a text-like content
+    type and no Content-Encoding of its own (StaticAssets sends precompressed
+    variants itself).
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        coding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        held = None         # the response start, while deciding whether to compress
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal held, passthrough
+            if passthrough:
+                return await send(message)
+
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=list(message.get("headers", [])))
+                message = {**message, "headers": headers.raw}
+                if (
+                    message["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or not compressible(headers.get("content-type", ""))
+                ):
+                    passthrough = True
+                    return await send(message)
+                # Caches must keep the variants apart even when this one is identity
+                _add_vary(headers)
+                if not coding:
+                    passthrough = True
+                    return await send(message)
+                held = message
+                return
+
+            if message["type"] == "http.response.body" and held is not None:
+                start, held = held, None
+                passthrough = True
+                body = message.get("body", b"")
+                if message.get("more_body") or len(body) < self.minimum_size:
+                    await send(start)
+                    return await send(message)
+
+                with timed("compression"):
+                    packed = compress(body, coding)
+                COMPRESSION_BYTES.inc(len(body), encoding=coding, stage="in")
+                COMPRESSION_BYTES.inc(len(packed), encoding=coding, stage="out")
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = coding
+                headers["Content-Length"] = str(len(packed))
+                etag = headers.get("etag")
+                if etag and etag.endswith('"') and not etag.startswith("W/"):
+                    headers["ETag"] = encoded_etag(etag, coding)
+                await send(start)
+                return await send({**message, "body": packed})
+
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+
+# ---- Cache-Control ----------------------------------------------------------
+
+class CachePolicyMiddleware:
+    """Pure ASGI middleware: Cache-Control from CACHE_POLICIES unless the route set one."""
+
+    def __init__(self, app, policies: dict = None, default: str = DEFAULT_POLICY):
+        self.app = app
+        self.policies = CACHE_POLICIES if policies is None else policies
+        self.default = default
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def send_with_policy(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=list(message.get("headers", [])))
+                if "cache-control" not in headers:
+                    status = message["status"]
+                    ok = 200 <= status < 300 or status == 304
+                    policy = self.policies.get(route_template(scope)) if ok else None
+                    headers["Cache-Control"] = policy or self.default
+                message = {**message, "headers": headers.raw}
+            await send(message)
+
+        await self.app(scope, receive, send_with_policy)
+
+
+# ---- static assets ----------------------------------------------------------
+
+class StaticAssets:
+    """
+    ASGI app serving the files of `directory` from memory. Files are read and
+    compressed once, at construction: changes on disk need a restart.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._files = {}    # relative path -> (media type, ETag, {coding: bytes})
+        for root, _, names in os.walk(directory):
+            for name in names:
+                path = os.path.join(root, name)
+                with open(path, "rb") as f:
+                    body = f.read()
+                media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                variants = {"": body}
+                if compressible(media_type) and len(body) >= COMPRESS_MIN_SIZE:
+                    for coding in CODINGS:
+                        packed = compress(body, coding, best=True)
+                        if len(packed) < len(body):
+                            variants[coding] = packed
+                relative = os.path.relpath(path, directory).replace(os.sep, "/")
+                self._files[relative] = (media_type, body_etag(body), variants)
+
+    def response(self, path: str, headers) -> Response:
+        """The best variant of `path` for the request `headers`, or a 304 / 404."""
+        asset = self._files.get(path.lstrip("/"))
+        if asset is None:
+            return PlainTextResponse("Not Found", status_code=404)
+        media_type, etag, variants = asset
+        coding = negotiate(headers.get("accept-encoding", ""))
+        if coding not in variants:
+            coding = ""
+        extra = {"Vary": "Accept-Encoding"} if len(variants) > 1 else {}
+        tag = encoded_etag(etag, coding)
+        matched = match_etag(headers, tag)
+        if matched:
+            return not_modified(matched, extra)
+        if coding:
+            extra["Content-Encoding"] = coding
+        return Response(variants[coding], media_type=media_type, headers={"ETag": tag, **extra})
+
+    async def __call__(self, scope, receive, send):
+        if scope["method"] not in ("GET", "HEAD"):
+            response = PlainTextResponse("Method Not Allowed", status_code=405)
+        else:
+            path = scope["path"]
+            root = scope.get("root_path", "")
+            if root and path.startswith(root):
+                path = path[len(root):]
+            response = self.response(path, Headers(scope=scope))
+        await response(scope, receive, send)
@@ -5,38 +5,108 @@ import os
 # MUST be first — before any local imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import PlainTextResponse
 
 from backend.routes.recipe_routes import router as recipe_router
 from backend.routes.ingredient import router as ingredient_router
+from backend.routes.admin import router as admin_router
+from backend.routes.suggest import router as suggest_router
+from backend.http_cache import CachePolicyMiddleware, CompressionMiddleware, StaticAssets
+from backend.metrics import MetricsMiddleware, TimedJSONResponse
+from logic.prefetch import prefetcher
+from logic.suggest import get_suggester
+from services import http_client
+from services.cache import response_cache
+from services.http_client import close_async_clients
+from utils.metrics import GaugeFunc, render
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Builds the typeahead index and subscribes it to the response cache
+    get_suggester()
+    yield
+    await prefetcher.close()
+    await close_async_clients()
+
 
 app = FastAPI(
     title="AlgoMinds ACDSS API",
     description="Smart Recipe Decision Support System",
-    version="2.0"
+    version="2.0",
+    lifespan=lifespan,
+    default_response_class=TimedJSONResponse,
 )
 
+# Innermost first: compression sees the final body; Cache-Control is filled in
+# per route; Server-Timing (MetricsMiddleware) includes compression time
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(CachePolicyMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets browser devtools show the per-request breakdown cross-origin
+    expose_headers=["Server-Timing"],
 )
+app.add_middleware(MetricsMiddleware)
 
-app.mount("/static", StaticFiles(directory="frontend"), name="static")
+# Read and precompressed once at startup, then served from memory
+frontend = StaticAssets("frontend")
+app.mount("/static", frontend, name="static")
 
 app.include_router(recipe_router, prefix="/api")
 app.include_router(ingredient_router, prefix="/api")
+app.include_router(admin_router, prefix="/api")
+app.include_router(suggest_router, prefix="/api")
 
 
 @app.get("/")
-def serve_frontend():
-    return FileResponse("frontend/index.html")
+def serve_frontend(request: Request):
+    return frontend.response("index.html", request.headers)
 
 
 @app.get("/health")
 def health_check():
     return {"status": "ok", "version": "2.0"}
+
+
+# Scrape-time gauges from the existing stats functions
+_BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+GaugeFunc(
+    "upstream_circuit_state", "Circuit breaker state (0 closed, 1 half-open, 2 open).",
+    ("upstream",),
+    lambda: {(u, ): _BREAKER_STATES[s["state"]] for u, s in http_client.breaker_stats().items()},
+)
+GaugeFunc(
+    "upstream_connections_active", "Upstream requests currently in flight.",
+    ("upstream",),
+    lambda: {(u, ): s["active"] + s["waiting"] for u, s in http_client.pool_stats().items()},
+)
+GaugeFunc(
+    "response_cache_lookups_total", "Response cache lookups by result.",
+    ("result",),
+    lambda: {
+        (name, ): value for name, value in response_cache.counters().items()
+    },
+    kind="counter",
+)
+GaugeFunc(
+    "prefetch_jobs_total", "Search-result prefetch jobs by outcome.",
+    ("outcome",),
+    lambda: {
+        (name, ): value for name, value in prefetcher.stats().items()
+        if name not in ("top_n", "workers", "queued")
+    },
+    kind="counter",
+)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,80 @@
+"""
+HTTP side of utils/metrics.py: per-route request metrics, the Server-Timing
+header and a JSON response class that times serialization.
+"""
+
+import time
+from fastapi.responses import JSONResponse
+from utils.metrics import Counter, Histogram, start_request_timing, timed
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template, method and status.",
+    ("method", "route", "status"),
+)
+LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency (until the response body is fully sent).",
+    ("method", "route"),
+)
+
+
+def route_template(scope) -> str:
+    """
+    Route template ("/api/recipe/{recipe_id}"), never the raw path, so label
+    cardinality stays bounded. Routes of included routers only know their own
+    path, so the router prefix is taken back from the request path.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        # Mounts (/static) expose their prefix as root_path
+        return scope.get("root_path") or "unmatched"
+    path = scope.get("path", "")
+    try:
+        concrete = template.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    if path.endswith(concrete):
+        return path[:len(path) - len(concrete)] + template
+    return template
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streamed responses are not buffered."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timing = start_request_timing()
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = route_template(scope)
+            method = scope.get("method", "")
+            REQUESTS.inc(method=method, route=route, status=status)
+            LATENCY.observe(time.perf_counter() - started, method=method, route=route)
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse whose encoding counts as the request's "serialization" phase."""
+
+    def render(self, content) -> bytes:
+        with timed("serialization"):
+            return super().render(content)
@@ -0,0 +1,61 @@
+#Operational endpoints for monitoring the upstream layer
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from fastapi import APIRouter, Header, HTTPException
+from logic.prefetch import prefetcher, warm_in_background
+from logic.suggest import get_suggester
+from services.cache import response_cache
+from services.http_client import pool_stats, rate_limit_stats, breaker_stats
+from services.singleflight import upstream_flights
+from utils.concurrency import fanout_stats
+from utils import access_log
+from utils.constants import ADMIN_TOKEN, ACCESS_LOG_PATH
+
+router = APIRouter(prefix="/admin")
+
+
+def _check_token(token: str):
+    if ADMIN_TOKEN and token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("/upstream-stats")
+def upstream_stats():
+    return {
+        "pools": pool_stats(),
+        "rate_limits": rate_limit_stats(),
+        "breakers": breaker_stats(),
+        "fanout": fanout_stats(),
+        "singleflight": upstream_flights.stats(),
+        "prefetch": prefetcher.stats(),
+    }
+
+
+@router.get("/cache")
+def cache_stats():
+    return response_cache.stats()
+
+
+@router.get("/suggest")
+def suggest_stats():
+    return get_suggester().stats()
+
+
+@router.post("/cache/flush")
+def flush_cache(x_admin_token: str = Header(default="")):
+    _check_token(x_admin_token)
+    return {"flushed": response_cache.clear()}
+
+
+@router.post("/cache/warm")
+async def warm_cache(top: int = 50, x_admin_token: str = Header(default="")):
+    """Warms this server's cache with the most popular entries of the access log, in the background."""
+    _check_token(x_admin_token)
+    if not ACCESS_LOG_PATH or not os.path.exists(ACCESS_LOG_PATH):
+        raise HTTPException(status_code=404, detail="No access log (set ACCESS_LOG_PATH)")
+    entries = access_log.popular(ACCESS_LOG_PATH, top)
+    if not warm_in_background(entries):
+        raise HTTPException(status_code=409, detail="A cache warm-up is already running")
+    return {"scheduled": len(entries)}
@@ -1,11 +1,24 @@
 #Ingredient search endpoint
+import asyncio
 import sys
 import os
+import time
+from contextlib import aclosing
+from typing import Union
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
-from services.recipedb_service import fetch_recipes_by_title
+from backend.streaming import stream_format, stream_response
+from logic.diet import matches_goal
+from logic.ingredient_index import get_ingredient_index
+from logic.ingredient_match import detect_missing
+from logic.recommender import recommend
+from logic.scoring import calculate_confidence
+from models.recipe_model import normalized, nutrition, time_label
+from services.recipedb_service import fetch_recipes_by_title_async, fetch_full_recipe_async
+from utils.concurrency import gather_bounded, iter_bounded, remaining
+from utils.constants import RECIPEDB_MODE, REQUEST_DEADLINE, FANOUT_CONCURRENCY
 from utils.validators import validate_ingredients
 
 router = APIRouter()
@@ -15,43 +28,160 @@ class IngredientRequest(BaseModel):
     ingredients: list
     diet_goal: str = "Any"
     min_match: int = 50
+    limit: int = 5
+    stream: Union[bool, str] = False   # "ndjson" / "sse" / true (NDJSON)
+    # "match": exact pantry matches; "recommend": whole-corpus top-K that also
+    # counts ingredients the pantry can substitute as partial matches
+    mode: str = "match"
+    substitutes: bool = True
 
 
 @router.post("/find-by-ingredients")
-def find_by_ingredients(req: IngredientRequest):
+async def find_by_ingredients(req: IngredientRequest, request: Request):
     valid, error = validate_ingredients(req.ingredients)
     if not valid:
         raise HTTPException(status_code=400, detail=error)
 
-    results = []
+    if req.mode not in ("match", "recommend"):
+        raise HTTPException(status_code=400, detail="mode must be 'match' or 'recommend'")
+
+    # Rank the whole offline corpus when we have one
+    cards = None
+    # The first call loads or builds the index — off the event loop
+    if req.mode == "recommend":
+        index = await asyncio.to_thread(get_ingredient_index)
+        if not len(index):
+            raise HTTPException(
+                status_code=503, detail="Recommendations need the offline recipe store"
+            )
+        cards = _recommended(index, req)
+    elif RECIPEDB_MODE != "remote":
+        index = await asyncio.to_thread(get_ingredient_index)
+        if len(index):
+            cards = _ranked_from_index(index, req)
+
+    fmt = stream_format(request, req.stream)
+    if cards is not None:
+        if fmt:
+            return stream_response(_iter_list(cards), fmt, event="recipe")
+        return {"recipes": cards}
+
+    if fmt:
+        return stream_response(_title_matches(req), fmt, event="recipe")
+    return {"recipes": [card async for card in _title_matches(req)]}
+
+
+async def _iter_list(items: list):
+    for item in items:
+        yield item
+
+
+async def _title_matches(req: IngredientRequest):
+    """
+    Live-API fallback: title searches for the first two ingredients, run
+    concurrently; the recipes of each search are completed with their
+    ingredient lists and scored against the pantry as soon as it returns.
+    Same filters as the local path (min_match, diet_goal) and up to
+    req.limit cards; recipes whose ingredients could not be fetched are left out.
+    """
+    started_at = time.monotonic()
+    limit = max(1, req.limit)
+    calls = [
+        lambda ing=ing: fetch_recipes_by_title_async(ing, limit=max(3, limit))
+        for ing in req.ingredients[:2]
+    ]
     seen = set()
+    found = 0
+    searches = iter_bounded(
+        calls, limit=len(calls), deadline=REQUEST_DEADLINE, default=[],
+        name="find_by_ingredients",
+    )
+    async with aclosing(searches):
+        async for _, recipes in searches:
+            fresh = []
+            for r in recipes:
+                name = r.get("Recipe_title", "")
+                if name not in seen:
+                    seen.add(name)
+                    fresh.append(r)
+            full = await gather_bounded(
+                [lambda r=r: fetch_full_recipe_async(r) for r in fresh],
+                limit=FANOUT_CONCURRENCY,
+                deadline=remaining(started_at, REQUEST_DEADLINE),
+                name="find_by_ingredients_full",
+            )
+            for r in full:
+                if not r or not r.get("ingredients"):
+                    continue
+                card = _title_card(r, req)
+                if card is None:
+                    continue
+                yield card
+                found += 1
+                if found >= limit:
+                    return
+
+
+def _title_card(r: dict, req: IngredientRequest):
+    """Card for a fetched recipe, or None if it fails the request's filters."""
+    block = normalized(r)
+    if not matches_goal(block["diet_flags"], req.diet_goal):
+        return None
+    match_data = detect_missing(r["ingredients"], req.ingredients)
+    if match_data["match_percent"] < req.min_match:
+        return None
+    return {
+        "recipe_id": r.get("Recipe_id", ""),
+        "name": r.get("Recipe_title", ""),
+        "match_score": match_data["match_percent"],
+        "confidence": calculate_confidence(match_data["match_percent"], len(match_data["missing"])),
+        "matched": match_data["matched"],
+        "missing": match_data["missing"],
+        "nutrition": nutrition(block),
+        "diet": block["diet"],
+        "time": time_label(block)
+    }
+
+
+def _ranked_from_index(index, req: IngredientRequest) -> list:
+    ranked = index.query(
+        req.ingredients,
+        top_k=max(1, req.limit),
+        min_match=req.min_match,
+        diet_goal=req.diet_goal,
+    )
+    return [
+        _index_card(recipe, match_data, confidence)
+        for _, recipe, match_data, confidence in ranked
+    ]
+
+
+def _recommended(index, req: IngredientRequest) -> list:
+    ranked = recommend(
+        index,
+        req.ingredients,
+        top_k=max(1, req.limit),
+        min_match=req.min_match,
+        diet_goal=req.diet_goal,
+        use_substitutes=req.substitutes,
+    )
+    cards = []
+    for _, recipe, match_data, confidence in ranked:
+        card = _index_card(recipe, match_data, confidence)
+        card["substitutions"] = match_data["substitutions"]
+        cards.append(card)
+    return cards
+
 
-    for ing in req.ingredients[:2]:
-        recipes = fetch_recipes_by_title(ing, limit=3)
-        for r in recipes:
-            name = r.get("Recipe_title", "")
-            if name in seen:
-                continue
-            seen.add(name)
-
-            try:
-                calories = int(float(r.get("Calories", 0) or 0))
-            except Exception:
-                calories = 0
-
-            results.append({
-                "name": name,
-                "match_score": 70,
-                "matched": req.ingredients,
-                "missing": [],
-                "nutrition": {
-                    "calories": calories,
-                    "protein": 0,
-                    "carbs": 0,
-                    "fat": 0,
-                },
-                "diet": "Balanced",
-                "time": f"{r.get('total_time', '?')} min"
-            })
-
-    return {"recipes": results[:5]}
+def _index_card(recipe, match_data: dict, confidence: float) -> dict:
+    return {
+        "recipe_id": recipe.recipe_id,
+        "name": recipe.title,
+        "match_score": match_data["match_percent"],
+        "confidence": confidence,
+        "matched": match_data["matched"],
+        "missing": match_data["missing"],
+        "nutrition": recipe.nutrition(),
+        "diet": recipe.diet,
+        "time": f"{recipe.total_time or '?'} min"
+    }
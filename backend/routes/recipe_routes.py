@@ -1,24 +1,41 @@
 import sys
 import os
+from typing import List, Union
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
 from pydantic import BaseModel
-from services.recipedb_service import fetch_recipe_by_title, fetch_recipes_by_title
-from logic.ingredient_match import detect_missing
-from logic.scoring import calculate_confidence
-from logic.tradeoff import generate_tradeoff_line
-from logic.recipe_search import get_procedure
-from services.flavordb_service import fetch_flavor_entity
+from backend.http_cache import cached_json, match_etag, not_modified, payload_policy
+from backend.metrics import TimedJSONResponse
+from backend.streaming import stream_format, stream_response
+from services.recipedb_service import fetch_recipes_by_title_async
+from logic.recipe_detail import (
+    resolve_by_title,
+    resolve_by_id,
+    rescore,
+    detail_response,
+    detail_etag,
+    iter_batch,
+)
+from logic.diet import matches_goal
+from logic.prefetch import prefetcher
+from logic.suggest import get_suggester
+from models.recipe_model import normalized, nutrition, time_label
+from utils import access_log
+from utils.constants import BATCH_MAX_ITEMS, PREFETCH_TOP_N
 from utils.validators import validate_recipe_name
 
 router = APIRouter()
 
+# Candidates fetched per requested card when a diet goal filters the list
+DIET_OVERFETCH = 4
+
 
 class SearchRequest(BaseModel):
     recipe_name: str
     num_recipes: int = 5
     diet_goal: str = "Any"
+    stream: Union[bool, str] = False   # "ndjson" / "sse" / true (NDJSON)
 
 
 class DetailRequest(BaseModel):
@@ -27,143 +44,147 @@ class DetailRequest(BaseModel):
     serving_multiplier: float = 1.0
 
 
+class RescoreRequest(BaseModel):
+    recipe_id: str
+    checked_ingredients: list = []
+
+
+class BatchDetailRequest(BaseModel):
+    items: list                     # titles, {"title": ...} or {"recipe_id": ...}
+    checked_ingredients: list = []  # one pantry, scored against every recipe
+    stream: Union[bool, str] = False
+
+
 @router.post("/search-recipes")
-def search_recipes(req: SearchRequest):
+async def search_recipes(req: SearchRequest, request: Request):
     valid, error = validate_recipe_name(req.recipe_name)
     if not valid:
         raise HTTPException(status_code=400, detail=error)
-
-    recipes = fetch_recipes_by_title(req.recipe_name, limit=req.num_recipes)
-    if not recipes:
-        return {"recipes": []}
-
-    results = []
-    for i, r in enumerate(recipes):
-        try:
-            servings = max(1, int(float(r.get("servings", 1) or 1)))
-            calories = int(float(r.get("Calories", 0) or 0) / servings)
-        except Exception:
-            calories = 0
-
-        results.append({
-            "name": r.get("Recipe_title", "Unknown"),
-            "description": f"A {r.get('Region', 'International')} recipe.",
-            "time": f"{r.get('total_time', '?')} min",
-            "servings": r.get("servings", 4),
-            "difficulty": _get_difficulty(str(r.get("total_time", "30"))),
-            "diet": "Balanced",
-            "cuisine": r.get("Region", "International"),
-            "match_score": max(0, 90 - i * 8),
-            "nutrition": {
-                "calories": calories,
-                "protein": 0,
-                "carbs": 0,
-                "fat": 0,
-            }
-        })
-
-    return {"recipes": results}
+    access_log.record(access_log.SEARCH, req.recipe_name)
+
+    fmt = stream_format(request, req.stream)
+    if fmt:
+        return stream_response(_search_cards(req), fmt, event="recipe")
+    return cached_json(request, {"recipes": [card async for card in _search_cards(req)]})
+
+
+@router.get("/search-recipes")
+async def search_recipes_get(
+    request: Request, recipe_name: str, num_recipes: int = 5, diet_goal: str = "Any"
+):
+    """GET form of POST /search-recipes, so browsers and CDNs can cache it."""
+    req = SearchRequest(recipe_name=recipe_name, num_recipes=num_recipes, diet_goal=diet_goal)
+    return await search_recipes(req, request)
+
+
+async def _search_cards(req: SearchRequest):
+    # Over-fetch when filtering by diet so a goal still fills the page
+    filtering = req.diet_goal not in ("", "Any")
+    limit = req.num_recipes * DIET_OVERFETCH if filtering else req.num_recipes
+    recipes = await fetch_recipes_by_title_async(req.recipe_name, limit=limit)
+    i = 0
+    for r in recipes or []:
+        block = normalized(r)
+        if filtering and not matches_goal(block["diet_flags"], req.diet_goal):
+            continue
+        # The top cards are the likely next detail views
+        if i < PREFETCH_TOP_N:
+            prefetcher.submit(r)
+        yield _search_card(i, r, block)
+        i += 1
+        if i >= req.num_recipes:
+            return
+
+
+def _search_card(i: int, r: dict, block: dict) -> dict:
+    return {
+        "name": r.get("Recipe_title", "Unknown"),
+        "description": f"A {r.get('Region', 'International')} recipe.",
+        "time": time_label(block),
+        "servings": block["servings"],
+        "difficulty": block["difficulty"],
+        "diet": block["diet"],
+        "cuisine": r.get("Region", "International"),
+        "match_score": max(0, 90 - i * 8),
+        "nutrition": nutrition(block),
+    }
 
 
 @router.post("/recipe-detail")
-def recipe_detail(req: DetailRequest):
+async def recipe_detail(req: DetailRequest, request: Request):
     valid, error = validate_recipe_name(req.recipe_name)
     if not valid:
         raise HTTPException(status_code=400, detail=error)
+    access_log.record(access_log.DETAIL, req.recipe_name)
 
-    recipes = fetch_recipe_by_title(req.recipe_name)
-    if not recipes:
+    payload = await resolve_by_title(req.recipe_name)
+    if payload is None:
         raise HTTPException(status_code=404, detail="Recipe not found")
+    get_suggester().viewed(payload["overview"]["name"])
+
+    # Revalidation is answered before the response is built
+    etag = detail_etag(payload, req.checked_ingredients)
+    policy = payload_policy(payload)
+    matched = match_etag(request.headers, etag)
+    if matched:
+        return not_modified(matched, policy)
+    return TimedJSONResponse(
+        detail_response(payload, req.checked_ingredients), headers={"ETag": etag, **policy}
+    )
+
+
+@router.get("/recipe-detail")
+async def recipe_detail_get(
+    request: Request, recipe_name: str, checked_ingredients: List[str] = Query([])
+):
+    """GET form of POST /recipe-detail (?checked_ingredients= repeated), cacheable."""
+    req = DetailRequest(recipe_name=recipe_name, checked_ingredients=checked_ingredients)
+    return await recipe_detail(req, request)
+
+
+@router.get("/recipe/{recipe_id}")
+async def recipe_payload(recipe_id: str, request: Request):
+    """Immutable recipe payload — cacheable by the browser and revalidated by ETag."""
+    access_log.record(access_log.RECIPE, recipe_id)
+    payload = await resolve_by_id(recipe_id)
+    if not payload:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    get_suggester().viewed(payload["overview"]["name"])
 
-    recipe = recipes[0]
-    raw_ingredients = recipe.get("ingredients", [])
-    checked_set = set(i.lower().strip() for i in req.checked_ingredients)
-
-    ingredients = [
-        {
-            "name": ing,
-            "qty": "as needed",
-            "available": ing.lower() in checked_set,
-            "role": "Ingredient"
-        }
-        for ing in raw_ingredients
-    ]
-
-    # Only run match detection if user actually checked some ingredients
-    if raw_ingredients and req.checked_ingredients:
-        match_data = detect_missing(raw_ingredients, req.checked_ingredients)
-    else:
-        # No checked ingredients — treat all as missing so substitutions work correctly
-        match_data = {
-            "missing": raw_ingredients,
-            "matched": [],
-            "match_percent": 0
-        }
-
-    confidence = calculate_confidence(match_data["match_percent"], len(match_data["missing"]))
-    explanation = generate_tradeoff_line(match_data["match_percent"], len(match_data["missing"]))
-
-    substitutions = []
-    for ing in match_data["missing"][:3]:
-        entity = fetch_flavor_entity(ing)
-        if entity:
-            sub_name = entity.get("entity_readable_name", "")
-            if sub_name:
-                substitutions.append({
-                    "original": ing,
-                    "substitute": sub_name,
-                    "qty": "same amount",
-                    "score": 80,
-                    "note": "Suggested by FlavorDB based on flavor profile",
-                    "role": "Flavor component"
-                })
-
-    recipe_id = recipe.get("Recipe_id", "")
-    processes = recipe.get("Processes", "")
-    procedure = get_procedure(recipe_id, processes)
-
-    try:
-        servings = max(1, int(float(recipe.get("servings", 1) or 1)))
-        calories = int(float(recipe.get("Calories", 0) or 0) / servings)
-        protein = round(float(recipe.get("Protein (g)", 0) or 0) / servings, 1)
-        carbs = round(float(recipe.get("Carbohydrate, by difference (g)", 0) or 0) / servings, 1)
-        fat = round(float(recipe.get("Total lipid (fat) (g)", 0) or 0) / servings, 1)
-    except Exception:
-        calories = protein = carbs = fat = 0
-
-    return {
-        "overview": {
-            "name": recipe.get("Recipe_title", req.recipe_name),
-            "description": f"A {recipe.get('Region', 'classic')} recipe from {recipe.get('Continent', 'the world')}.",
-            "time": f"{recipe.get('total_time', '?')} min",
-            "servings": recipe.get("servings", 4),
-            "difficulty": _get_difficulty(str(recipe.get("total_time", "30"))),
-            "diet": "Balanced",
-            "cuisine": recipe.get("Region", "International"),
-        },
-        "nutrition": {
-            "calories": calories,
-            "protein": protein,
-            "carbs": carbs,
-            "fat": fat,
-        },
-        "ingredients": ingredients,
-        "substitutions": substitutions,
-        "procedure": procedure,
-        "match_score": match_data["match_percent"],
-        "confidence": confidence,
-        "explanation": explanation,
-        "sub_count": len(substitutions)
-    }
+    policy = payload_policy(payload)
+    matched = match_etag(request.headers, payload["etag"])
+    if matched:
+        return not_modified(matched, policy)
+    return TimedJSONResponse(payload, headers={"ETag": payload["etag"], **policy})
 
 
-def _get_difficulty(total_time_str: str) -> str:
-    try:
-        mins = int(total_time_str)
-        if mins <= 20:
-            return "Easy"
-        if mins <= 45:
-            return "Medium"
-        return "Hard"
-    except Exception:
-        return "Medium"
\ No newline at end of file
+@router.post("/rescore")
+async def rescore_recipe(req: RescoreRequest):
+    """Scores for a new checked set — no upstream calls once the payload is resolved."""
+    payload = await resolve_by_id(req.recipe_id)
+    if not payload:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    return rescore(payload, req.checked_ingredients)
+
+
+@router.post("/recipe-details:batch")
+async def recipe_details_batch(req: BatchDetailRequest, request: Request):
+    """
+    Details for many recipes in one request. Results come back in request
+    order, or — when streamed (NDJSON/SSE) — one per recipe as soon as it is
+    ready, each carrying its index.
+    """
+    if not req.items:
+        raise HTTPException(status_code=400, detail="No recipes requested.")
+    if len(req.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Too many recipes requested (max {BATCH_MAX_ITEMS}).")
+
+    results = iter_batch(req.items, req.checked_ingredients)
+    fmt = stream_format(request, req.stream)
+    if fmt:
+        return stream_response(results, fmt, event="recipe")
+
+    ordered = [None] * len(req.items)
+    async for result in results:
+        ordered[result["index"]] = result
+    return {"results": ordered}
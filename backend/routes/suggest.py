@@ -0,0 +1,19 @@
+#Typeahead endpoint — answered from memory, never forwarded upstream
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from fastapi import APIRouter, HTTPException
+from logic.suggest import get_suggester
+
+router = APIRouter()
+
+MAX_LIMIT = 20
+
+
+@router.get("/suggest")
+def suggest(q: str = "", limit: int = 8, kind: str = ""):
+    """Recipe titles and ingredients with a word starting with `q`, most popular first."""
+    if kind not in ("", "recipe", "ingredient"):
+        raise HTTPException(status_code=400, detail="kind must be 'recipe' or 'ingredient'")
+    return {"query": q, **get_suggester().suggest(q, max(1, min(limit, MAX_LIMIT)), kind)}
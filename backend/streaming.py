@@ -0,0 +1,52 @@
+"""
+NDJSON / SSE streaming for list endpoints: each item is written as soon as
+it is produced. The format comes from the body's `stream` field or Accept.
+"""
+
+import json
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+NDJSON = "ndjson"
+SSE = "sse"
+
+_MEDIA_TYPES = {
+    NDJSON: "application/x-ndjson",
+    SSE: "text/event-stream",
+}
+
+
+def stream_format(request: Request, requested=None) -> str:
+    """"ndjson", "sse", or "" for a plain JSON response."""
+    if requested is True:
+        return NDJSON
+    if isinstance(requested, str) and requested.lower() in _MEDIA_TYPES:
+        return requested.lower()
+    accept = request.headers.get("accept", "")
+    if _MEDIA_TYPES[SSE] in accept:
+        return SSE
+    if _MEDIA_TYPES[NDJSON] in accept:
+        return NDJSON
+    return ""
+
+
+def stream_response(items, fmt: str, event: str = "item") -> StreamingResponse:
+    """Streams the dicts yielded by the async generator `items` in `fmt`."""
+    async def body():
+        count = 0
+        async for item in items:
+            count += 1
+            data = json.dumps(item)
+            if fmt == SSE:
+                yield f"event: {event}\ndata: {data}\n\n"
+            else:
+                yield data + "\n"
+        if fmt == SSE:
+            yield f"event: done\ndata: {json.dumps({'count': count})}\n\n"
+
+    return StreamingResponse(
+        body(),
+        media_type=_MEDIA_TYPES[fmt],
+        # Keep proxies (nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
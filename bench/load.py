@@ -0,0 +1,255 @@
+"""
+Load benchmark: fixed-concurrency scenarios against the stub upstream,
+reporting throughput, latency percentiles and upstream calls.
+--in-process runs the app on httpx's ASGI transport (no uvicorn).
+
+    python -m bench.load [--scenarios search-recipes,recipe-detail,find-by-ingredients]
+                         [--concurrency 16 --requests 500 --keys 50 --warmup 50]
+                         [--latency-ms 80 --jitter-ms 40 --error-rate 0]
+                         [--target http://host:port --stub-url http://host:port]
+                         [--in-process] [--out path.json]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+from bench import results
+from bench.stub_server import StubConfig, app_env, load_fixtures, start, DEFAULT_FIXTURES, TITLE
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dishes used when the fixture file has no recorded titles
+DISHES = (
+    "pasta", "curry", "salad", "soup", "risotto", "tacos", "biryani", "stew",
+    "pancakes", "omelette", "noodles", "pizza", "dal", "burrito", "lasagna", "paneer",
+)
+PANTRY = (
+    "tomato", "onion", "garlic", "olive oil", "salt", "black pepper", "basil",
+    "ginger", "cumin", "butter", "milk", "flour", "egg", "chicken", "rice",
+)
+
+
+def _titles(fixtures: dict, count: int) -> list:
+    recorded = sorted(fixtures.get(TITLE, {}))
+    titles = recorded or list(DISHES)
+    # Beyond the recorded set, numbered variants are served synthetically
+    return [titles[i] if i < len(titles) else f"{titles[i % len(titles)]} {i}" for i in range(count)]
+
+
+def _pantry(i: int) -> list:
+    size = 3 + i % 5
+    return [PANTRY[(i * 7 + j) % len(PANTRY)] for j in range(size)]
+
+
+def _payloads(scenario: str, titles: list) -> list:
+    if scenario == "search-recipes":
+        return [{"recipe_name": t, "num_recipes": 5} for t in titles]
+    if scenario == "recipe-detail":
+        return [{"recipe_name": t, "checked_ingredients": _pantry(i)} for i, t in enumerate(titles)]
+    if scenario == "find-by-ingredients":
+        return [{"ingredients": _pantry(i), "min_match": 0} for i in range(len(titles))]
+    raise ValueError(f"unknown scenario {scenario!r}")
+
+
+SCENARIOS = {
+    "search-recipes": "/api/search-recipes",
+    "recipe-detail": "/api/recipe-detail",
+    "find-by-ingredients": "/api/find-by-ingredients",
+}
+
+
+def percentiles(latencies: list) -> dict:
+    if len(latencies) < 2:
+        value = latencies[0] if latencies else 0.0
+        return {"p50_ms": value, "p95_ms": value, "p99_ms": value}
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {"p50_ms": cuts[49], "p95_ms": cuts[94], "p99_ms": cuts[98]}
+
+
+async def _drive(client: httpx.AsyncClient, path: str, payloads: list, total: int,
+                 concurrency: int) -> tuple:
+    """Sends `total` requests from `concurrency` workers; (latencies ms, statuses, elapsed s)."""
+    latencies = []
+    statuses = {}
+    issued = 0
+
+    async def worker():
+        nonlocal issued
+        while issued < total:
+            payload = payloads[issued % len(payloads)]
+            issued += 1
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, json=payload)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+async def _stub_stats(stub: httpx.AsyncClient, reset: bool = False) -> dict:
+    if stub is None:
+        return {}
+    if reset:
+        await stub.post("/__reset")
+        return {}
+    return (await stub.get("/__stats")).json()
+
+
+async def _flush_cache(client: httpx.AsyncClient):
+    response = await client.post(
+        "/api/admin/cache/flush", headers={"X-Admin-Token": os.getenv("ADMIN_TOKEN", "")}
+    )
+    response.raise_for_status()
+
+
+async def run_scenario(client, stub, scenario: str, args, titles: list) -> dict:
+    path = SCENARIOS[scenario]
+    payloads = _payloads(scenario, titles)
+
+    # Warm-up primes connections and code paths; the flush after it makes every
+    # scenario start from an empty response cache
+    if args.warmup:
+        await _drive(client, path, payloads, args.warmup, args.concurrency)
+    await _flush_cache(client)
+    await _stub_stats(stub, reset=True)
+
+    latencies, statuses, elapsed = await _drive(
+        client, path, payloads, args.requests, args.concurrency
+    )
+    upstream = await _stub_stats(stub)
+
+    ok = statuses.get("200", 0)
+    result = {
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        **percentiles(latencies),
+        "mean_ms": statistics.fmean(latencies) if latencies else 0.0,
+        "error_rate": 1 - ok / len(latencies) if latencies else 0.0,
+        "statuses": statuses,
+    }
+    if upstream:
+        result["upstream_calls"] = upstream["total"]
+        result["upstream_calls_per_request"] = upstream["total"] / max(1, len(latencies))
+        result["upstream_errors_injected"] = upstream["errors"]
+        result["upstream_by_endpoint"] = upstream["calls"]
+    return result
+
+
+def _start_app(port: int, env: dict, workers: int) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "uvicorn", "backend.main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning",
+    ]
+    return subprocess.Popen(command, cwd=ROOT, env={**os.environ, **env})
+
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"app exited with status {process.returncode}")
+        try:
+            if httpx.get(url + "/metrics", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    sys.exit("app did not start in time")
+
+
+async def _run(args, base_url: str, stub_url: str, transport=None) -> dict:
+    fixtures = load_fixtures(args.fixtures)
+    titles = _titles(fixtures, args.keys)
+    out = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits,
+                                 timeout=args.timeout) as client:
+        stub = httpx.AsyncClient(base_url=stub_url, timeout=5) if stub_url else None
+        try:
+            for scenario in args.scenarios:
+                out[scenario] = await run_scenario(client, stub, scenario, args, titles)
+                r = out[scenario]
+                print(
+                    f"{scenario:22} {r['throughput_rps']:8.1f} req/s  "
+                    f"p50 {r['p50_ms']:7.1f}  p95 {r['p95_ms']:7.1f}  p99 {r['p99_ms']:7.1f} ms  "
+                    f"upstream {r.get('upstream_calls', '-')}  errors {r['error_rate']:.1%}"
+                )
+        finally:
+            if stub is not None:
+                await stub.aclose()
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load benchmark against the stub upstream.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests per scenario")
+    parser.add_argument("--keys", type=int, default=50, help="distinct queries per scenario")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--jitter-ms", type=float, default=40)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--target", help="benchmark an already running app instead")
+    parser.add_argument("--stub-url", help="stub server of --target, for upstream call counts")
+    parser.add_argument("--port", type=int, default=8801)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--in-process", action="store_true", help="serve the app via ASGI transport")
+    parser.add_argument("--out", help="result file (default bench/results/load-<commit>.json)")
+    args = parser.parse_args(argv)
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    for scenario in args.scenarios:
+        if scenario not in SCENARIOS:
+            parser.error(f"unknown scenario {scenario!r}; choose from {', '.join(SCENARIOS)}")
+
+    config = {k: v for k, v in vars(args).items() if k not in ("out",)}
+    app = None
+    transport = None
+    if args.target:
+        base_url, stub_url = args.target.rstrip("/"), args.stub_url
+    else:
+        stub = start(StubConfig(
+            args.latency_ms, args.jitter_ms, args.error_rate, args.error_status,
+            load_fixtures(args.fixtures), args.seed,
+        ), port=0)
+        stub_url = "http://127.0.0.1:%d" % stub.server_address[1]
+        env = app_env(stub_url)
+        config["env"] = env
+        if args.in_process:
+            os.environ.update(env)
+            from backend.main import app as asgi_app
+            transport = httpx.ASGITransport(app=asgi_app)
+            base_url = "http://app"
+        else:
+            base_url = f"http://127.0.0.1:{args.port}"
+            app = _start_app(args.port, env, args.workers)
+            _wait_ready(base_url, app)
+
+    try:
+        out = asyncio.run(_run(args, base_url, stub_url, transport))
+    finally:
+        if app is not None:
+            app.terminate()
+            app.wait(timeout=10)
+
+    print("wrote", results.write("load", out, config, args.out))
+
+
+if __name__ == "__main__":
+    main()
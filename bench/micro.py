@@ -0,0 +1,89 @@
+"""
+Micro-benchmarks for the per-recipe hot paths (detect_missing,
+calculate_confidence, get_procedure cold/warm), timed with timeit.
+
+    python -m bench.micro [--repeat 7] [--min-time 0.2] [--out path.json]
+"""
+
+import argparse
+import itertools
+import os
+import statistics
+import timeit
+from bench import results
+from bench.stub_server import StubConfig, app_env, start
+
+RECIPE = [
+    "2 cups all-purpose flour", "Tomatoes, diced", "1 large onion", "garlic cloves",
+    "olive oil", "salt", "freshly ground black pepper", "fresh basil leaves",
+    "unsalted butter", "whole milk", "eggs", "parmesan cheese",
+]
+PANTRY = ["tomato", "onion", "Garlic", "Olive Oil", "salt", "pepper", "egg", "milk"]
+CONFIDENCE_CASES = [(100.0, 0), (91.67, 1), (75.0, 3), (50.0, 6), (12.5, 11)]
+
+
+def measure(fn, repeat: int, min_time: float) -> dict:
+    timer = timeit.Timer(fn)
+    loops, elapsed = timer.autorange()
+    if elapsed < min_time:
+        loops = max(loops, int(loops * min_time / max(elapsed, 1e-9)))
+    runs = [t / loops for t in timer.repeat(repeat=repeat, number=loops)]
+    best = min(runs)
+    return {
+        "best_us": best * 1e6,
+        "median_us": statistics.median(runs) * 1e6,
+        "ops_per_s": 1 / best if best else 0.0,
+        "loops": loops,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the scoring/procedure hot paths.")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing run")
+    parser.add_argument("--out", help="result file (default bench/results/micro-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    # get_procedure goes through the real service layer, so point it at an
+    # in-process stub before the services read their configuration
+    stub = start(StubConfig(), port=0)
+    env = app_env("http://127.0.0.1:%d" % stub.server_address[1])
+    os.environ.update(env)
+
+    from logic.ingredient_match import detect_missing
+    from logic.recipe_search import get_procedure
+    from logic.scoring import calculate_confidence
+    from services.cache import response_cache
+
+    processes = "chop||boil||stir"
+    cold_ids = (f"cold-{i}" for i in itertools.count())
+
+    def cold_procedure():
+        get_procedure(next(cold_ids), processes)
+
+    def confidence():
+        for match_percent, missing in CONFIDENCE_CASES:
+            calculate_confidence(match_percent, missing)
+
+    get_procedure("warm", processes)   # fills the cache entry the warm run hits
+
+    benchmarks = {
+        "detect_missing": lambda: detect_missing(RECIPE, PANTRY),
+        "calculate_confidence": confidence,
+        "get_procedure_cold": cold_procedure,
+        "get_procedure_warm": lambda: get_procedure("warm", processes),
+    }
+    out = {}
+    for name, fn in benchmarks.items():
+        out[name] = measure(fn, args.repeat, args.min_time)
+        r = out[name]
+        print(f"{name:22} best {r['best_us']:10.2f} us  median {r['median_us']:10.2f} us  ({r['loops']} loops)")
+
+    config = {**vars(args), "env": env, "cache": response_cache.stats().get("backend")}
+    config.pop("out")
+    stub.shutdown()
+    print("wrote", results.write("micro", out, config, args.out))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark result files (JSON with run metadata), comparable across commits.
+
+    python -m bench.results compare bench/results/load-abc1234.json bench/results/load-def5678.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Metrics where a larger value is an improvement; counts listed in NEUTRAL are
+# workload size, not performance. Everything else (latencies, calls) is lower-is-better.
+HIGHER_IS_BETTER = ("throughput_rps", "ops_per_s")
+NEUTRAL = ("requests", "loops", "upstream_errors_injected")
+
+
+def _git(*args) -> str:
+    try:
+        return subprocess.run(
+            ("git",) + args, capture_output=True, text=True, timeout=10,
+            cwd=os.path.dirname(RESULTS_DIR),
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def metadata(config: dict) -> dict:
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": config,
+    }
+
+
+def write(suite: str, results: dict, config: dict, path: str = None) -> str:
+    """Writes a result file; by default bench/results/<suite>-<short commit>.json."""
+    meta = metadata(config)
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{suite}-{meta['commit'][:7] or 'nogit'}.json")
+    with open(path, "w") as f:
+        json.dump({"suite": suite, "meta": meta, "results": results}, f, indent=2)
+    return path
+
+
+def compare(base: dict, head: dict, threshold: float = 10.0) -> list:
+    """
+    (benchmark, metric, base, head, change %, verdict) rows for every metric the
+    two runs share. Verdict is "regressed"/"improved" past `threshold` percent.
+    """
+    rows = []
+    for name, metrics in base["results"].items():
+        other = head["results"].get(name)
+        if other is None:
+            continue
+        for metric, before in metrics.items():
+            after = other.get(metric)
+            if not isinstance(before, (int, float)) or not isinstance(after, (int, float)):
+                continue
+            if before:
+                change = (after - before) / before * 100
+            else:
+                change = 0.0 if not after else float("inf")
+            verdict = ""
+            if metric not in NEUTRAL and abs(change) >= threshold:
+                better = change > 0 if metric in HIGHER_IS_BETTER else change < 0
+                verdict = "improved" if better else "regressed"
+            rows.append((name, metric, before, after, change, verdict))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare benchmark result files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cmp = sub.add_parser("compare", help="compare two result files (base, then head)")
+    cmp.add_argument("base")
+    cmp.add_argument("head")
+    cmp.add_argument("--threshold", type=float, default=10.0, help="percent change to flag")
+    args = parser.parse_args(argv)
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    if base.get("suite") != head.get("suite"):
+        sys.exit(f"different suites: {base.get('suite')} vs {head.get('suite')}")
+
+    print(f"base {base['meta']['commit'][:7]}  head {head['meta']['commit'][:7]}")
+    regressions = 0
+    for name, metric, before, after, change, verdict in compare(base, head, args.threshold):
+        regressions += verdict == "regressed"
+        print(f"{name:28} {metric:22} {before:>12.3f} {after:>12.3f} {change:>+8.1f}%  {verdict}")
+    # Non-zero exit so a CI step can gate on it
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Local stand-in for the RecipeDB / FlavorDB APIs, for benchmarks. Replays
+recorded fixtures (synthetic responses otherwise) with injected latency and
+errors. GET /__stats counts calls, POST /__reset zeroes them.
+
+    python -m bench.stub_server serve [--port 8765] [--latency-ms 80 --jitter-ms 40]
+                                      [--error-rate 0.05 --error-status 503] [--fixtures ...]
+    python -m bench.stub_server record --titles "pasta,curry" [--fixtures ...]
+
+    RECIPEDB_BASE_URL=http://127.0.0.1:8765/recipe2-api
+    FLAVORDB_BASE_URL=http://127.0.0.1:8765/flavordb
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "recorded.json")
+
+# Fixture sections, keyed by the endpoint they replay
+TITLE = "recipeByTitle"
+RECIPE = "search-recipe"
+STEPS = "instructions"
+ENTITY = "entities/by-readable-name"
+
+_INGREDIENTS = (
+    "tomato", "onion", "garlic", "olive oil", "salt", "black pepper", "basil",
+    "ginger", "cumin", "butter", "milk", "flour", "egg", "chicken", "rice",
+    "lemon", "coriander", "chili", "paneer", "potato", "spinach", "yogurt",
+)
+_REGIONS = (("Italian", "European"), ("Indian Subcontinent", "Asian"), ("Mexican", "Latin American"))
+
+
+def _seed(*parts) -> random.Random:
+    digest = hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()
+    return random.Random(int(digest[:12], 16))
+
+
+def _recipe_id(title: str, i: int) -> str:
+    return str(100000 + int(hashlib.sha1(f"{title}|{i}".encode()).hexdigest()[:8], 16) % 900000)
+
+
+def synthetic_title_search(title: str) -> dict:
+    rng = _seed(TITLE, title)
+    data = []
+    for i in range(rng.randint(3, 8)):
+        region, continent = rng.choice(_REGIONS)
+        servings = rng.randint(1, 6)
+        data.append({
+            "Recipe_id": _recipe_id(title, i),
+            "Recipe_title": f"{title.title()} {i + 1}",
+            "Calories": f"{rng.uniform(200, 900) * servings:.1f}",
+            "Protein (g)": f"{rng.uniform(5, 45) * servings:.1f}",
+            "Carbohydrate, by difference (g)": f"{rng.uniform(10, 90) * servings:.1f}",
+            "Total lipid (fat) (g)": f"{rng.uniform(3, 40) * servings:.1f}",
+            "servings": str(servings),
+            "cook_time": str(rng.randint(5, 60)),
+            "prep_time": str(rng.randint(5, 30)),
+            "total_time": str(rng.randint(10, 90)),
+            "Region": region,
+            "Continent": continent,
+            "Processes": "||".join(rng.sample(("chop", "boil", "fry", "stir", "bake", "simmer"), 3)),
+            "vegan": rng.choice(("0.0", "1.0")),
+        })
+    return {"success": True, "data": data}
+
+
+def synthetic_recipe(recipe_id: str) -> dict:
+    rng = _seed(RECIPE, recipe_id)
+    return {
+        "recipe": {"Recipe_id": recipe_id},
+        "ingredients": [{"ingredient": ing} for ing in rng.sample(_INGREDIENTS, rng.randint(4, 12))],
+    }
+
+
+def synthetic_steps(recipe_id: str) -> dict:
+    rng = _seed(STEPS, recipe_id)
+    verbs = ("Chop", "Heat", "Stir in", "Simmer", "Season", "Serve")
+    return {"steps": [f"{rng.choice(verbs)} step {i + 1}." for i in range(rng.randint(3, 8))]}
+
+
+def synthetic_entity(name: str) -> dict:
+    rng = _seed(ENTITY, name)
+    if not name or rng.random() < 0.1:
+        return {"success": True, "data": []}
+    return {"success": True, "data": [{
+        "entity_id": rng.randint(1, 1000),
+        "entity_alias_readable": name,
+        "entity_readable_name": name,
+        "category_readable": rng.choice(("Vegetable", "Spice", "Herb", "Dairy", "Cereal")),
+        "molecules": [{"pubchem_id": rng.randint(1, 5000)} for _ in range(rng.randint(10, 60))],
+    }]}
+
+
+_SYNTHETIC = {
+    TITLE: synthetic_title_search,
+    RECIPE: synthetic_recipe,
+    STEPS: synthetic_steps,
+    ENTITY: synthetic_entity,
+}
+
+
+def load_fixtures(path: str) -> dict:
+    fixtures = {section: {} for section in _SYNTHETIC}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            for section, entries in json.load(f).items():
+                fixtures.setdefault(section, {}).update(entries)
+    return fixtures
+
+
+class StubConfig:
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0,
+                 error_status: int = 503, fixtures: dict = None, seed: int = 0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.fixtures = fixtures if fixtures is not None else load_fixtures(DEFAULT_FIXTURES)
+        self.rng = random.Random(seed)
+        self.calls = {}
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def delay(self) -> float:
+        with self.lock:
+            return max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+
+    def fail(self) -> bool:
+        with self.lock:
+            failed = self.rng.random() < self.error_rate
+            self.errors += failed
+            return failed
+
+    def count(self, endpoint: str):
+        with self.lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"calls": dict(self.calls), "total": sum(self.calls.values()), "errors": self.errors}
+
+    def reset(self):
+        with self.lock:
+            self.calls.clear()
+            self.errors = 0
+
+
+def _route(path: str, query: dict):
+    """(fixture section, key) for a request path, or None."""
+    if path.endswith("/recipe-bytitle/recipeByTitle"):
+        return TITLE, query.get("title", [""])[0]
+    if "/search-recipe/" in path:
+        return RECIPE, path.rsplit("/", 1)[1]
+    if "/instructions/" in path:
+        return STEPS, path.rsplit("/", 1)[1]
+    if path.endswith("/entities/by-readable-name"):
+        return ENTITY, query.get("readable_name", [""])[0]
+    return None
+
+
+def make_handler(config: StubConfig):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; without this, keep-alive
+        # clients stall ~40ms per response on delayed ACKs
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body=None):
+            payload = json.dumps(body).encode() if body is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/__stats":
+                return self._send(200, config.stats())
+            routed = _route(url.path, parse_qs(url.query))
+            if routed is None:
+                return self._send(404, {"detail": "unknown endpoint"})
+
+            section, key = routed
+            config.count(section)
+            time.sleep(config.delay())
+            if config.fail():
+                return self._send(config.error_status, {"detail": "injected error"})
+            body = config.fixtures[section].get(key)
+            if body is None:
+                body = _SYNTHETIC[section](key)
+            self._send(200, body)
+
+        def do_POST(self):
+            if urlparse(self.path).path == "/__reset":
+                config.reset()
+                return self._send(200, {"reset": True})
+            self._send(404, {"detail": "unknown endpoint"})
+
+    return Handler
+
+
+def app_env(stub_url: str) -> dict:
+    """
+    Environment that points the app at the stub. Rate limits are lifted so the
+    benchmark measures the app, not the production request budget.
+    """
+    return {
+        "RECIPEDB_BASE_URL": stub_url + "/recipe2-api",
+        "FLAVORDB_BASE_URL": stub_url + "/flavordb",
+        "RECIPEDB_API_KEY": "bench",
+        "FLAVORDB_API_KEY": "bench",
+        "RECIPEDB_MODE": "remote",
+        "RECIPEDB_RATE_LIMIT": "100000",
+        "RECIPEDB_RATE_BURST": "100000",
+        "FLAVORDB_RATE_LIMIT": "100000",
+        "FLAVORDB_RATE_BURST": "100000",
+    }
+
+
+def start(config: StubConfig = None, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """Serves in a daemon thread; returns the server (server.server_address has the port)."""
+    server = ThreadingHTTPServer((host, port), make_handler(config or StubConfig()))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-upstream", daemon=True).start()
+    return server
+
+
+def record(titles: list, path: str, max_recipes: int = 3):
+    """
+    Captures live responses for `titles` (and their top recipes, instructions and
+    ingredient entities) into the fixture file, using the configured API keys.
+    """
+    from services import http_client
+    from services.http_client import RECIPEDB, FLAVORDB
+
+    fixtures = load_fixtures(path)
+
+    def fetch(upstream, url_path, params=None):
+        response = http_client.get(upstream, url_path, params=params, timeout=15)
+        response.raise_for_status()
+        return response.json()
+
+    for title in titles:
+        search = fetch(RECIPEDB, "/recipe-bytitle/recipeByTitle", {"title": title})
+        fixtures[TITLE][title] = search
+        for recipe in (search.get("data") or [])[:max_recipes]:
+            recipe_id = str(recipe.get("Recipe_id", ""))
+            if not recipe_id:
+                continue
+            full = fetch(RECIPEDB, f"/search-recipe/{recipe_id}")
+            fixtures[RECIPE][recipe_id] = full
+            fixtures[STEPS][recipe_id] = fetch(RECIPEDB, f"/instructions/{recipe_id}")
+            for item in full.get("ingredients", []):
+                name = item.get("ingredient", "")
+                if name and name not in fixtures[ENTITY]:
+                    fixtures[ENTITY][name] = fetch(
+                        FLAVORDB, "/entities/by-readable-name", {"readable_name": name}
+                    )
+        print(f"recorded {title!r}")
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(fixtures, f, indent=1, sort_keys=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stub RecipeDB/FlavorDB server for benchmarks.")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="recorded responses (JSON)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="serve recorded/synthetic responses")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--latency-ms", type=float, default=80)
+    serve.add_argument("--jitter-ms", type=float, default=40)
+    serve.add_argument("--error-rate", type=float, default=0.0)
+    serve.add_argument("--error-status", type=int, default=503)
+    serve.add_argument("--seed", type=int, default=0)
+    rec = sub.add_parser("record", help="capture live API responses into the fixture file")
+    rec.add_argument("--titles", required=True, help="comma-separated recipe titles")
+    rec.add_argument("--max-recipes", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        record([t.strip() for t in args.titles.split(",") if t.strip()], args.fixtures, args.max_recipes)
+        return
+
+    config = StubConfig(
+        args.latency_ms, args.jitter_ms, args.error_rate, args.error_status,
+        load_fixtures(args.fixtures), args.seed,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(config))
+    server.daemon_threads = True
+    print(f"Stub upstream on http://{args.host}:{args.port} "
+          f"(latency {args.latency_ms}±{args.jitter_ms} ms, error rate {args.error_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
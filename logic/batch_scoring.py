@@ -0,0 +1,82 @@
+"""
+Vectorized detect_missing / calculate_confidence / tradeoff_bucket for many
+recipes at once. Scores depend only on (matched, total), so the scalar
+functions run once per distinct pair and are scattered back by lookup.
+"""
+
+import numpy as np
+from logic.scoring import calculate_confidence
+from logic.tradeoff import tradeoff_bucket
+
+
+def _as_csr(matrix):
+    """
+    Accepts a SciPy sparse matrix or an (indptr, indices) pair.
+    Rows must not repeat an ingredient id (detect_missing works on sets).
+    """
+    if hasattr(matrix, "tocsr"):
+        csr = matrix.tocsr()
+        if not csr.has_canonical_format:
+            csr = csr.copy()
+            csr.sum_duplicates()
+        return np.asarray(csr.indptr, dtype=np.int64), np.asarray(csr.indices)
+    indptr, indices = matrix
+    return np.asarray(indptr, dtype=np.int64), np.asarray(indices)
+
+
+def score_counts(matched, totals) -> dict:
+    """
+    Scores from per-recipe matched / total ingredient counts.
+    Returns arrays: match_percent, missing, confidence, bucket.
+    """
+    matched = np.asarray(matched, dtype=np.int64)
+    totals = np.asarray(totals, dtype=np.int64)
+    if not len(totals):
+        empty = np.zeros(0)
+        return {
+            "match_percent": empty, "missing": empty.astype(np.int64),
+            "confidence": empty, "bucket": empty.astype(np.int8),
+        }
+
+    width = int(totals.max()) + 1
+    keys = matched * width + totals
+    present = np.flatnonzero(np.bincount(keys))
+
+    percent_table = np.zeros(width * width)
+    confidence_table = np.zeros(width * width)
+    bucket_table = np.zeros(width * width, dtype=np.int8)
+    for key in present.tolist():
+        m, n = divmod(key, width)
+        # Same expressions as detect_missing / calculate_confidence
+        match_percent = round((m / n) * 100, 2) if n else 0
+        percent_table[key] = match_percent
+        confidence_table[key] = calculate_confidence(match_percent, n - m)
+        bucket_table[key] = tradeoff_bucket(match_percent, n - m)
+
+    return {
+        "match_percent": percent_table[keys],
+        "missing": totals - matched,
+        "confidence": confidence_table[keys],
+        "bucket": bucket_table[keys],
+    }
+
+
+def score_batch(user_ingredient_ids, matrix) -> dict:
+    """
+    Scores every recipe row of a recipe x ingredient-id matrix against the
+    user's ingredient ids in one pass. Adds `matched` counts to score_counts' output.
+    """
+    indptr, indices = _as_csr(matrix)
+    user_ids = np.unique(np.asarray(list(user_ingredient_ids), dtype=np.int64))
+
+    if len(indices):
+        have = np.zeros(max(int(indices.max()), int(user_ids.max(initial=0))) + 1, dtype=bool)
+        have[user_ids] = True
+        hits = np.concatenate(([0], np.cumsum(have[indices], dtype=np.int64)))
+        matched = hits[indptr[1:]] - hits[indptr[:-1]]
+    else:
+        matched = np.zeros(len(indptr) - 1, dtype=np.int64)
+
+    scores = score_counts(matched, np.diff(indptr))
+    scores["matched"] = matched
+    return scores
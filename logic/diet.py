@@ -0,0 +1,44 @@
+#Diet classification used for diet_goal filtering
+VEGAN = 1
+WEIGHT_LOSS = 2
+MUSCLE_GAIN = 4
+BALANCED = 8
+
+DIET_GOALS = {
+    "Vegan": VEGAN,
+    "Weight Loss": WEIGHT_LOSS,
+    "Muscle Gain": MUSCLE_GAIN,
+    "Balanced": BALANCED,
+}
+
+# Per-serving thresholds
+WEIGHT_LOSS_MAX_KCAL = 400
+MUSCLE_GAIN_MIN_PROTEIN_RATIO = 0.30   # share of calories from protein (4 kcal/g)
+
+
+def diet_flags(vegan: bool, calories: float, protein: float) -> int:
+    """
+    Bitmask of every diet goal a recipe satisfies, from per-serving macros.
+    Balanced = neither low-calorie nor high-protein.
+    """
+    flags = VEGAN if vegan else 0
+    if 0 < calories <= WEIGHT_LOSS_MAX_KCAL:
+        flags |= WEIGHT_LOSS
+    if calories > 0 and protein * 4 / calories >= MUSCLE_GAIN_MIN_PROTEIN_RATIO:
+        flags |= MUSCLE_GAIN
+    if not flags & (WEIGHT_LOSS | MUSCLE_GAIN):
+        flags |= BALANCED
+    return flags
+
+
+def diet_label(flags: int) -> str:
+    """Single label for display: Vegan > Muscle Gain > Weight Loss > Balanced."""
+    for name in ("Vegan", "Muscle Gain", "Weight Loss"):
+        if flags & DIET_GOALS[name]:
+            return name
+    return "Balanced"
+
+
+def matches_goal(flags: int, diet_goal: str) -> bool:
+    bit = DIET_GOALS.get(diet_goal)
+    return bit is None or bool(flags & bit)
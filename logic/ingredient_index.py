@@ -0,0 +1,157 @@
+"""
+Inverted ingredient index for "find by ingredients": canonical ingredient ->
+recipe positions (CSR), ranked with logic.batch_scoring.
+"""
+
+import threading
+import numpy as np
+from logic.batch_scoring import score_counts
+from logic.diet import DIET_GOALS
+from logic.ingredient_match import detect_missing
+from models.corpus import RecipeCorpus
+from services.recipe_store import get_store
+from services.snapshot import load_index
+from utils.canonical import canonicalize, canonicalizer
+from utils.constants import RECIPE_SNAPSHOT_PATH
+from utils.metrics import timed
+
+
+class IngredientIndex:
+
+    def __init__(self, recipes: RecipeCorpus, vocab: dict, indptr, postings,
+                 recipe_indptr, recipe_ingredients, diet):
+        self.recipes = recipes                      # position -> RecipeView
+        self.vocab = vocab                          # canonical name -> ingredient id
+        self.names = [None] * len(vocab)            # ingredient id -> canonical name
+        for name, i in vocab.items():
+            self.names[i] = name
+        self.indptr = indptr                        # ingredient id -> postings slice
+        self.postings = postings                    # uint32 recipe positions
+        self.recipe_indptr = recipe_indptr          # recipe -> its ingredient ids (forward index)
+        self.recipe_ingredients = recipe_ingredients
+        self.sizes = np.diff(recipe_indptr).astype(np.int32)
+        self.diet = diet                            # uint8 diet flags per recipe
+
+    @classmethod
+    def build(cls, records) -> "IngredientIndex":
+        vocab = {}
+        recipes = []
+        recipe_indptr = [0]
+        recipe_ingredients = []
+
+        records = list(records)
+        # Corpus names become known fuzzy-match targets for user input
+        canonicalizer.add_vocabulary(
+            {ing for record in records for ing in record.get("ingredients") or []}
+        )
+
+        for record in records:
+            # Set semantics, exactly like detect_missing
+            ids = sorted({
+                vocab.setdefault(canonicalize(ing), len(vocab))
+                for ing in record.get("ingredients") or []
+            })
+            if not ids:
+                continue
+            recipes.append(record)
+            recipe_ingredients.extend(ids)
+            recipe_indptr.append(len(recipe_ingredients))
+
+        recipe_indptr = np.asarray(recipe_indptr, dtype=np.int64)
+        recipe_ingredients = np.asarray(recipe_ingredients, dtype=np.uint32)
+
+        # Invert: stable sort by ingredient id keeps each posting list sorted by recipe
+        owners = np.repeat(
+            np.arange(len(recipes), dtype=np.uint32), np.diff(recipe_indptr)
+        )
+        order = np.argsort(recipe_ingredients, kind="stable")
+        postings = owners[order]
+        counts = np.bincount(recipe_ingredients, minlength=len(vocab))
+        indptr = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+        corpus = RecipeCorpus.build(recipes)
+        return cls(corpus, vocab, indptr, postings,
+                   recipe_indptr, recipe_ingredients, corpus.diet_flags)
+
+    def __len__(self):
+        return len(self.recipes)
+
+    def ingredient_ids(self, pantry: list) -> list:
+        ids = {self.vocab.get(canonicalize(p)) for p in pantry}
+        ids.discard(None)
+        return sorted(ids)
+
+    def overlap(self, ingredient_ids: list) -> np.ndarray:
+        """Number of pantry ingredients each recipe contains."""
+        if not ingredient_ids:
+            return np.zeros(len(self.recipes), dtype=np.int64)
+        hits = np.concatenate([
+            self.postings[self.indptr[i]:self.indptr[i + 1]] for i in ingredient_ids
+        ])
+        return np.bincount(hits, minlength=len(self.recipes))
+
+    @timed("scoring")
+    def query(self, pantry: list, top_k: int = 5, min_match: float = 0,
+              diet_goal: str = "Any") -> list:
+        """
+        Top-K recipes for a pantry, ranked by confidence then match %.
+        Returns (position, RecipeView, detect_missing-style match data, confidence) tuples.
+        """
+        overlap = self.overlap(self.ingredient_ids(pantry))
+
+        # Prune on whole arrays before gathering candidates.
+        # Loose min_match bound; the exact rounded value is checked below.
+        mask = overlap > 0
+        if min_match > 0:
+            mask &= overlap * 100 >= (min_match - 0.005) * self.sizes
+        if diet_goal in DIET_GOALS:
+            mask &= (self.diet & DIET_GOALS[diet_goal]) != 0
+        candidates = np.flatnonzero(mask)
+
+        scores = score_counts(overlap[candidates], self.sizes[candidates])
+        percent, confidence = scores["match_percent"], scores["confidence"]
+        keep = percent >= min_match
+        candidates, percent, confidence = candidates[keep], percent[keep], confidence[keep]
+
+        # Everything tied with the K-th confidence stays in, so the order
+        # (confidence, match %, position) alone decides who makes the cut
+        if len(candidates) > top_k:
+            kth = np.partition(-confidence, top_k - 1)[top_k - 1]
+            top = np.flatnonzero(-confidence <= kth)
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.lexsort((candidates[top], -percent[top], -confidence[top]))][:top_k]
+
+        results = []
+        for i in top:
+            pos = candidates[i]
+            ids = self.recipe_ingredients[self.recipe_indptr[pos]:self.recipe_indptr[pos + 1]]
+            match_data = detect_missing([self.names[j] for j in ids], pantry)
+            results.append((int(pos), self.recipes[pos], match_data, float(confidence[i])))
+        return results
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_ingredient_index() -> IngredientIndex:
+    """
+    Index over the offline corpus, loaded on first use: from the mmapped
+    snapshot when one exists, otherwise built from the recipe store.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = load_index(RECIPE_SNAPSHOT_PATH) or IngredientIndex.build(
+                    get_store().iter_recipes()
+                )
+    return _index
+
+
+def reset_ingredient_index():
+    """Drops the index so the next query rebuilds it (e.g. after an import)."""
+    global _index
+    with _index_lock:
+        _index = None
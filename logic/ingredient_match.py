@@ -1,11 +1,12 @@
 # Match % calculator
-from utils.helpers import normalize
+from utils.canonical import canonicalize
 
 
 def detect_missing(recipe_ingredients, user_ingredients):
 
-    recipe_set = set(normalize(i) for i in recipe_ingredients)
-    user_set = set(normalize(i) for i in user_ingredients)
+    # Canonical names, so "Tomatoes" / "tomato, diced" / "roma tomato" all match
+    recipe_set = set(canonicalize(i) for i in recipe_ingredients)
+    user_set = set(canonicalize(i) for i in user_ingredients)
 
     missing = recipe_set - user_set
     matched = recipe_set & user_set
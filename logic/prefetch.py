@@ -0,0 +1,231 @@
+"""
+Predictive prefetch: after a search, the top PREFETCH_TOP_N results are
+resolved in the background into the cached detail payload. Jobs are bounded
+(PREFETCH_WORKERS / PREFETCH_QUEUE) and only start while the upstreams have
+closed breakers and more than PREFETCH_RESERVE rate tokens.
+
+Cache warming from an access log (useful with a sqlite/redis cache; with the
+memory backend use POST /api/admin/cache/warm):
+    python -m logic.prefetch warm [--log access.jsonl] [--top 50]
+"""
+
+import argparse
+import asyncio
+import contextvars
+import sys
+import time
+from logic.recipe_detail import (
+    is_resolved,
+    remember_search_result,
+    resolve_search_result,
+    resolve_by_title,
+    resolve_by_id,
+)
+from logic.substitutes import get_substitute_engine
+from services import http_client
+from services.http_client import RECIPEDB, FLAVORDB
+from services.recipedb_service import fetch_recipes_by_title_async
+from utils import access_log
+from utils.constants import (
+    PREFETCH_TOP_N, PREFETCH_WORKERS, PREFETCH_QUEUE, PREFETCH_RESERVE, PREFETCH_MAX_WAIT,
+    ACCESS_LOG_PATH, CACHE_BACKEND,
+)
+
+# How often a job waiting for rate budget checks again (seconds)
+_BUDGET_POLL = 0.1
+
+
+def _upstreams() -> list:
+    # With a precomputed substitute table a payload needs no FlavorDB calls
+    return [RECIPEDB] if get_substitute_engine() else [RECIPEDB, FLAVORDB]
+
+
+async def wait_for_budget(reserve: float, max_wait: float) -> bool:
+    """True once every upstream has spare capacity; False after `max_wait` seconds."""
+    deadline = time.monotonic() + max_wait
+    upstreams = _upstreams()
+    while not all(http_client.spare_capacity(u, reserve) for u in upstreams):
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(_BUDGET_POLL)
+    return True
+
+
+class Prefetcher:
+
+    def __init__(self, workers: int, queue_size: int, reserve: float, max_wait: float):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self._loop = None
+        self._queue = None
+        self._tasks = []
+        self._pending = set()   # Recipe_ids queued or being resolved
+        self._stats = {
+            "submitted": 0, "prefetched": 0, "already_cached": 0,
+            "dropped_queue_full": 0, "dropped_no_budget": 0, "failed": 0,
+        }
+
+    def _count(self, outcome: str):
+        self._stats[outcome] += 1
+
+    def _start(self):
+        """Worker tasks on the running loop (re-created if the loop changed)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._pending.clear()
+        self._tasks = [
+            loop.create_task(self._work(self._queue), context=contextvars.Context())
+            for _ in range(self.workers)
+        ]
+
+    def submit(self, recipe: dict):
+        """
+        Queues a search result for prefetch. Call from the event loop; never
+        blocks and never raises.
+        """
+        recipe_id = recipe.get("Recipe_id")
+        if not recipe_id:
+            return
+        self._start()
+        if recipe_id in self._pending:
+            return
+        self._count("submitted")
+        try:
+            self._queue.put_nowait(recipe)
+        except asyncio.QueueFull:
+            self._count("dropped_queue_full")
+            return
+        self._pending.add(recipe_id)
+
+    async def _work(self, queue: asyncio.Queue):
+        while True:
+            recipe = await queue.get()
+            try:
+                await self._prefetch(recipe)
+            except Exception:
+                self._count("failed")
+            finally:
+                self._pending.discard(recipe.get("Recipe_id"))
+                queue.task_done()
+
+    async def _prefetch(self, recipe: dict):
+        await remember_search_result(recipe)
+        if await is_resolved(recipe["Recipe_id"]):
+            self._count("already_cached")
+            return
+        if not await wait_for_budget(self.reserve, self.max_wait):
+            self._count("dropped_no_budget")
+            return
+        payload = await resolve_search_result(recipe)
+        self._count("prefetched" if payload else "failed")
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+    def stats(self) -> dict:
+        return {
+            "top_n": PREFETCH_TOP_N,
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+            **self._stats,
+        }
+
+
+prefetcher = Prefetcher(PREFETCH_WORKERS, PREFETCH_QUEUE, PREFETCH_RESERVE, PREFETCH_MAX_WAIT)
+
+
+async def _warm_payload(stats: dict, recipe_id, resolve, *args):
+    # Only a payload fetched and stored by this call counts as warmed
+    if recipe_id and await is_resolved(recipe_id):
+        stats["already_cached"] += 1
+        return
+    payload = await resolve(*args)
+    if payload is None:
+        stats["not_found"] += 1
+    elif payload.get("partial"):
+        stats["partial"] += 1
+    else:
+        stats["warmed"] += 1
+
+
+async def warm(entries: list, top_n: int = PREFETCH_TOP_N, max_wait: float = 30) -> dict:
+    """
+    Resolves access-log entries ((kind, value) from access_log.popular) into
+    the cache, one at a time, each waiting for spare rate budget first.
+    A search warms its title results and the payloads of its top results.
+    The stats count payloads: "warmed" only for those newly stored.
+    """
+    stats = {"warmed": 0, "already_cached": 0, "partial": 0, "skipped_no_budget": 0, "not_found": 0}
+    for kind, value in entries:
+        if kind not in (access_log.SEARCH, access_log.DETAIL, access_log.RECIPE):
+            continue
+        if not await wait_for_budget(PREFETCH_RESERVE, max_wait):
+            stats["skipped_no_budget"] += 1
+            continue
+        if kind == access_log.SEARCH:
+            found = await fetch_recipes_by_title_async(value, limit=max(1, top_n))
+            if not found:
+                stats["not_found"] += 1
+            for recipe in found:
+                await remember_search_result(recipe)
+                if not await wait_for_budget(PREFETCH_RESERVE, max_wait):
+                    stats["skipped_no_budget"] += 1
+                    continue
+                await _warm_payload(stats, recipe.get("Recipe_id"), resolve_search_result, recipe)
+        elif kind == access_log.DETAIL:
+            # The same (cached) title search resolve_by_title starts with
+            found = await fetch_recipes_by_title_async(value, limit=1)
+            recipe_id = found[0].get("Recipe_id") if found else None
+            await _warm_payload(stats, recipe_id, resolve_by_title, value)
+        else:
+            await _warm_payload(stats, value, resolve_by_id, value)
+    return stats
+
+
+_warming = set()
+
+
+def warm_in_background(entries: list) -> bool:
+    """Starts warm(entries) on the running loop; False while a warm-up is already running."""
+    if _warming:
+        return False
+    task = asyncio.get_running_loop().create_task(warm(entries), context=contextvars.Context())
+    _warming.add(task)
+    task.add_done_callback(_warming.discard)
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm the response cache from an access log.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    warm_cmd = sub.add_parser("warm", help="resolve the most popular searches / recipes")
+    warm_cmd.add_argument("--log", default=ACCESS_LOG_PATH, help="access log (JSON lines or HTTP log)")
+    warm_cmd.add_argument("--top", type=int, default=50, help="most frequent entries to warm")
+    args = parser.parse_args(argv)
+
+    if not args.log:
+        sys.exit("no access log: pass --log or set ACCESS_LOG_PATH")
+    if CACHE_BACKEND == "memory":
+        print("note: CACHE_BACKEND=memory — warmed entries die with this process; "
+              "use POST /api/admin/cache/warm to warm a running server")
+
+    async def run():
+        try:
+            return await warm(access_log.popular(args.log, args.top))
+        finally:
+            await http_client.close_async_clients()
+
+    print(asyncio.run(run()))
+
+
+if __name__ == "__main__":
+    main()
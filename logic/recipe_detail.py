@@ -0,0 +1,395 @@
+"""
+Recipe detail: resolve_* builds the cached, immutable payload (the only
+upstream calls); rescore scores it against a checked set with no I/O;
+iter_batch resolves many recipes concurrently.
+"""
+
+import hashlib
+import json
+import time
+from logic.ingredient_match import detect_missing
+from logic.recipe_search import build_procedure
+from logic.substitutes import get_substitute_engine
+from logic.scoring import calculate_confidence
+from logic.tradeoff import generate_tradeoff_line
+from models.recipe_model import normalized, nutrition, time_label
+from services.cache import response_cache, MISS
+from services.flavordb_service import fetch_flavor_entity_async
+from services.recipedb_service import (
+    fetch_recipe_by_title_async,
+    fetch_recipe_by_id_async,
+    fetch_full_recipe_async,
+    fetch_recipe_instructions_async,
+)
+from utils.canonical import canonicalize
+from utils.concurrency import gather_bounded, iter_bounded, remaining
+from utils.constants import (
+    FANOUT_CONCURRENCY, REQUEST_DEADLINE, CACHE_TTL_RECIPE, CACHE_TTL_TITLE, CACHE_TTL_PARTIAL,
+    BATCH_CONCURRENCY, BATCH_DEADLINE,
+)
+from utils.helpers import normalize
+from utils.metrics import timed
+from utils.validators import validate_recipe_name
+
+# Runner-up substitutes listed after the best one
+SUBSTITUTE_ALTERNATIVES = 3
+# FlavorDB lookups per recipe when there is no substitute table: its first
+# distinct ingredients, whoever asks, so the cached payload fits every pantry
+FLAVOR_LOOKUPS = 8
+
+# Marks lookups that missed the deadline (vs. "no substitute exists")
+_UNRESOLVED = object()
+# Marks batch items whose resolution raised
+_FAILED = object()
+
+
+def _payload_key(recipe_id) -> str:
+    return f"detail:{recipe_id}"
+
+
+def _pick_key(title: str) -> str:
+    return "pick:" + " ".join(normalize(title).split())
+
+
+def compute_etag(payload: dict) -> str:
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha1(body.encode()).hexdigest()[:20] + '"'
+
+
+async def resolve_by_title(recipe_name: str):
+    """Payload for the best title match, or None if RecipeDB has no such recipe."""
+    # A search card opened by its title: the recipe it showed, without a second title search
+    picked = await response_cache.get_async(_pick_key(recipe_name))
+    if picked is not MISS:
+        cached = await response_cache.get_async(_payload_key(picked))
+        if cached is not MISS:
+            return cached
+
+    started_at = time.monotonic()
+    recipes = await fetch_recipe_by_title_async(recipe_name)
+    if not recipes:
+        return None
+    return await _resolve(recipes[0], recipe_name, started_at)
+
+
+async def resolve_by_id(recipe_id: str):
+    """Payload for a Recipe_id — served from cache when already resolved."""
+    cached = await response_cache.get_async(_payload_key(recipe_id))
+    if cached is not MISS:
+        return cached
+    started_at = time.monotonic()
+    recipe = await fetch_recipe_by_id_async(recipe_id)
+    if not recipe:
+        return None
+    return await _resolve(recipe, recipe.get("Recipe_title", ""), started_at)
+
+
+async def is_resolved(recipe_id) -> bool:
+    return await response_cache.get_async(_payload_key(recipe_id)) is not MISS
+
+
+async def remember_search_result(recipe: dict):
+    """Lets a detail view of this search card (by its title) open the same recipe."""
+    recipe_id = recipe.get("Recipe_id")
+    title = recipe.get("Recipe_title")
+    if recipe_id and title:
+        await response_cache.set_async(_pick_key(title), recipe_id, CACHE_TTL_TITLE)
+
+
+async def resolve_search_result(recipe: dict):
+    """
+    Payload for a title-search record, fetching only what the search did not
+    return (full recipe, instructions, substitutes). None if the full recipe
+    could not be fetched.
+    """
+    cached = await response_cache.get_async(_payload_key(recipe.get("Recipe_id", "")))
+    if cached is not MISS:
+        return cached
+    started_at = time.monotonic()
+    full = await fetch_full_recipe_async(recipe)
+    if not full.get("ingredients"):
+        return None
+    return await _resolve(full, recipe.get("Recipe_title", ""), started_at)
+
+
+async def _resolve(recipe: dict, recipe_name: str, started_at: float) -> dict:
+    recipe_id = recipe.get("Recipe_id", "")
+    if recipe_id:
+        cached = await response_cache.get_async(_payload_key(recipe_id))
+        if cached is not MISS:
+            return cached
+
+    raw_ingredients = recipe.get("ingredients", [])
+    processes = recipe.get("Processes", "")
+
+    # Substitutes come from the precomputed table when there is one; otherwise
+    # FlavorDB is asked about the recipe's first few ingredients. Both run
+    # concurrently with the instructions lookup, within what is left of the
+    # request deadline
+    targets = list(dict.fromkeys(canonicalize(i) for i in raw_ingredients))
+    engine = get_substitute_engine()
+    if not engine:
+        targets = targets[:FLAVOR_LOOKUPS]
+    lookups = [] if engine else [
+        lambda ing=ing: fetch_flavor_entity_async(ing) for ing in targets
+    ]
+    lookups.append(lambda: fetch_recipe_instructions_async(recipe_id))
+    results = await gather_bounded(
+        lookups,
+        limit=FANOUT_CONCURRENCY,
+        deadline=remaining(started_at, REQUEST_DEADLINE),
+        default=_UNRESOLVED,
+        name="recipe_detail",
+    )
+    entities, steps = results[:-1], results[-1]
+    complete = _UNRESOLVED not in results
+
+    substitutes = _ranked_substitutes(engine, targets) if engine else {}
+    for ing, entity in zip(targets, entities):
+        if entity and entity is not _UNRESOLVED:
+            sub_name = entity.get("entity_readable_name", "")
+            if sub_name:
+                substitutes[ing] = {
+                    "substitute": sub_name,
+                    "qty": "same amount",
+                    "score": 80,
+                    "note": "Suggested by FlavorDB based on flavor profile",
+                    "role": "Flavor component"
+                }
+
+    block = normalized(recipe)
+
+    payload = {
+        "recipe_id": recipe_id,
+        "overview": {
+            "name": recipe.get("Recipe_title", recipe_name),
+            "description": f"A {recipe.get('Region', 'classic')} recipe from {recipe.get('Continent', 'the world')}.",
+            "time": time_label(block),
+            "servings": block["servings"],
+            "difficulty": block["difficulty"],
+            "diet": block["diet"],
+            "cuisine": recipe.get("Region", "International"),
+        },
+        "nutrition": nutrition(block),
+        "ingredients": [
+            {"name": ing, "qty": "as needed", "role": "Ingredient"}
+            for ing in raw_ingredients
+        ],
+        "substitutes": substitutes,
+        "procedure": build_procedure(
+            [] if steps is _UNRESOLVED else steps or [], processes
+        ),
+    }
+    if not complete:
+        payload["partial"] = True
+    payload["etag"] = compute_etag(payload)
+
+    # A payload degraded by the deadline is cached briefly, so that re-scoring
+    # it does not go upstream again
+    if recipe_id:
+        ttl = CACHE_TTL_RECIPE if complete else CACHE_TTL_PARTIAL
+        await response_cache.set_async(_payload_key(recipe_id), payload, ttl)
+    return payload
+
+
+def _ranked_substitutes(engine, targets: list) -> dict:
+    """canonical ingredient -> best precomputed substitute (+ runners-up), no I/O."""
+    substitutes = {}
+    for ing in targets:
+        ranked = engine.substitutes(ing, limit=SUBSTITUTE_ALTERNATIVES + 1)
+        if not ranked:
+            continue
+        best = ranked[0]
+        substitutes[ing] = {
+            "substitute": best.substitute,
+            "qty": "same amount",
+            "score": best.confidence,
+            "note": _similarity_note(best.confidence),
+            "role": best.role,
+            "alternatives": [
+                {"substitute": s.substitute, "score": s.confidence, "role": s.role}
+                for s in ranked[1:]
+            ],
+        }
+    return substitutes
+
+
+def _similarity_note(score: int) -> str:
+    return f"Shares {score}% of its flavor compounds (FlavorDB)"
+
+
+def _usable_substitute(sub: dict, canonical: str, missing: set):
+    """
+    `sub` without candidates the user is also missing; the best remaining
+    alternative is promoted. None when nothing usable is left.
+    """
+    def usable(name):
+        other = canonicalize(name)
+        return other == canonical or other not in missing
+
+    if "alternatives" not in sub:
+        return sub if usable(sub["substitute"]) else None
+    candidates = [
+        {"substitute": sub["substitute"], "score": sub["score"], "role": sub["role"]},
+        *sub["alternatives"],
+    ]
+    candidates = [c for c in candidates if usable(c["substitute"])]
+    if not candidates:
+        return None
+    best = candidates[0]
+    return {
+        **sub,
+        "substitute": best["substitute"],
+        "score": best["score"],
+        "note": _similarity_note(best["score"]),
+        "role": best.get("role", sub["role"]),
+        "alternatives": candidates[1:],
+    }
+
+
+@timed("scoring")
+def rescore(payload: dict, checked_ingredients: list) -> dict:
+    """Scores a resolved payload against the checked set — pure CPU, no I/O."""
+    raw_ingredients = [ing["name"] for ing in payload["ingredients"]]
+
+    # Only run match detection if user actually checked some ingredients
+    if raw_ingredients and checked_ingredients:
+        match_data = detect_missing(raw_ingredients, checked_ingredients)
+    else:
+        # No checked ingredients — treat all as missing so substitutions work correctly
+        match_data = {
+            "missing": raw_ingredients,
+            "matched": [],
+            "match_percent": 0
+        }
+
+    missing_count = len(match_data["missing"])
+    missing = {canonicalize(ing) for ing in match_data["missing"]}
+    substitutes = payload["substitutes"]
+    substitutions = []
+    # In recipe order, under the recipe's own name; `canonical` is the table key
+    seen = set()
+    for ing in raw_ingredients:
+        canonical = canonicalize(ing)
+        if canonical not in missing or canonical in seen:
+            continue
+        seen.add(canonical)
+        sub = substitutes.get(canonical)
+        if sub:
+            sub = _usable_substitute(sub, canonical, missing)
+        if sub:
+            substitutions.append({"original": ing, "canonical": canonical, **sub})
+
+    return {
+        "match_score": match_data["match_percent"],
+        "confidence": calculate_confidence(match_data["match_percent"], missing_count),
+        "explanation": generate_tradeoff_line(match_data["match_percent"], missing_count),
+        "substitutions": substitutions,
+        "sub_count": len(substitutions)
+    }
+
+
+def detail_response(payload: dict, checked_ingredients: list) -> dict:
+    """The combined /recipe-detail response: payload + scores for the checked set."""
+    checked_set = set(canonicalize(i) for i in checked_ingredients)
+    scores = rescore(payload, checked_ingredients)
+    return {
+        "recipe_id": payload["recipe_id"],
+        "etag": payload["etag"],
+        "overview": payload["overview"],
+        "nutrition": payload["nutrition"],
+        "ingredients": [
+            {**ing, "available": canonicalize(ing["name"]) in checked_set}
+            for ing in payload["ingredients"]
+        ],
+        "substitutions": scores["substitutions"],
+        "procedure": payload["procedure"],
+        "partial": payload.get("partial", False),
+        "match_score": scores["match_score"],
+        "confidence": scores["confidence"],
+        "explanation": scores["explanation"],
+        "sub_count": scores["sub_count"]
+    }
+
+
+def detail_etag(payload: dict, checked_ingredients: list) -> str:
+    """
+    ETag of detail_response(payload, checked_ingredients), without building it:
+    the response is a pure function of the payload and the checked list.
+    """
+    return compute_etag({"payload": payload["etag"], "checked": list(checked_ingredients)})
+
+
+# ---- batch ----------------------------------------------------------------
+
+def batch_key(item):
+    """
+    (key, error) for one batch item: a title string, {"title": ...} or
+    {"recipe_id": ...}. Equal keys are resolved once.
+    """
+    if isinstance(item, dict):
+        recipe_id = item.get("recipe_id")
+        if recipe_id not in (None, ""):
+            return ("id", str(recipe_id)), ""
+        title = item.get("title") or item.get("recipe_name") or ""
+    else:
+        title = item if isinstance(item, str) else ""
+    valid, error = validate_recipe_name(title)
+    if not valid:
+        return None, error
+    return ("title", " ".join(normalize(title).split())), ""
+
+
+async def _resolve_key(key):
+    kind, value = key
+    try:
+        if kind == "id":
+            return await resolve_by_id(value)
+        return await resolve_by_title(value)
+    except Exception:
+        return _FAILED
+
+
+def _batch_error(index: int, item, status: int, error: str) -> dict:
+    return {"index": index, "query": item, "ok": False, "status": status, "error": error}
+
+
+async def iter_batch(items: list, checked_ingredients: list):
+    """
+    Yields one result per item as soon as its recipe is resolved and scored.
+    Every result carries its `index` in `items`; failures are reported per item.
+    """
+    keys = []
+    positions = {}   # key -> indexes of the items asking for it
+    for i, item in enumerate(items):
+        key, error = batch_key(item)
+        if key is None:
+            yield _batch_error(i, item, 400, error)
+            continue
+        if key not in positions:
+            positions[key] = []
+            keys.append(key)
+        positions[key].append(i)
+
+    calls = [lambda key=key: _resolve_key(key) for key in keys]
+    async for k, payload in iter_bounded(
+        calls,
+        limit=BATCH_CONCURRENCY,
+        deadline=BATCH_DEADLINE,
+        default=_UNRESOLVED,
+        name="recipe_batch",
+    ):
+        for i in positions[keys[k]]:
+            if payload is _UNRESOLVED:
+                yield _batch_error(i, items[i], 504, "Timed out resolving recipe")
+            elif payload is _FAILED:
+                yield _batch_error(i, items[i], 502, "Upstream error")
+            elif not payload:
+                yield _batch_error(i, items[i], 404, "Recipe not found")
+            else:
+                yield {
+                    "index": i,
+                    "query": items[i],
+                    "ok": True,
+                    "recipe": detail_response(payload, checked_ingredients),
+                }
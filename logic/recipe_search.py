@@ -1,13 +1,23 @@
 #Main orchestration
-from services.recipedb_service import fetch_recipe_by_title, fetch_recipe_instructions
+import time
+from services.recipedb_service import (
+    fetch_recipe_by_title,
+    fetch_recipe_instructions,
+    fetch_recipe_instructions_async,
+)
 from services.flavordb_service import fetch_flavor_entity
 from logic.ingredient_match import detect_missing
+from logic.substitutes import get_substitute_engine
+from utils.canonical import canonicalize
 from logic.scoring import calculate_confidence
 from logic.tradeoff import generate_tradeoff_line
+from utils.concurrency import run_bounded, remaining
+from utils.constants import FANOUT_CONCURRENCY, REQUEST_DEADLINE
 
 
 def analyze_recipe(recipe_name: str, user_ingredients: list):
 
+    started_at = time.monotonic()
     recipes = fetch_recipe_by_title(recipe_name)
 
     if not recipes:
@@ -38,9 +48,28 @@ def analyze_recipe(recipe_name: str, user_ingredients: list):
     match_data = detect_missing(recipe_ingredients, user_ingredients)
 
     substitutions = {}
-    # Limit FlavorDB calls to 3 to protect rate limit
-    for ingredient in match_data["missing"][:3]:
-        entity = fetch_flavor_entity(ingredient)
+    engine = get_substitute_engine()
+    if engine:
+        # Precomputed table: a substitute for every missing ingredient, no API calls
+        missing = set(match_data["missing"])
+        for ingredient in match_data["missing"]:
+            # Skip substitutes the user is missing too
+            usable = [
+                s.substitute for s in engine.substitutes(ingredient)
+                if canonicalize(s.substitute) not in missing
+            ]
+            substitutions[ingredient] = usable[0] if usable else "No substitute found"
+        sub_targets = []
+    else:
+        # Limit FlavorDB calls to 3 to protect rate limit, issued concurrently
+        sub_targets = match_data["missing"][:3]
+    entities = run_bounded(
+        [lambda ing=ing: fetch_flavor_entity(ing) for ing in sub_targets],
+        limit=FANOUT_CONCURRENCY,
+        deadline=remaining(started_at, REQUEST_DEADLINE),
+        name="analyze_recipe",
+    )
+    for ingredient, entity in zip(sub_targets, entities):
         if entity:
             substitutions[ingredient] = entity.get(
                 "entity_readable_name", "No substitute found"
@@ -50,7 +79,7 @@ def analyze_recipe(recipe_name: str, user_ingredients: list):
 
     # Mark remaining missing as no substitute (without API call)
     for ingredient in match_data["missing"][3:]:
-        substitutions[ingredient] = "No substitute found"
+        substitutions.setdefault(ingredient, "No substitute found")
 
     confidence = calculate_confidence(
         match_data["match_percent"],
@@ -81,6 +110,20 @@ def get_procedure(recipe_id: str, processes_str: str):
     """
     # Try real instructions first
     steps = fetch_recipe_instructions(recipe_id)
+    return build_procedure(steps, processes_str)
+
+
+async def get_procedure_async(recipe_id: str, processes_str: str):
+    """Async variant of get_procedure for the FastAPI routes."""
+    steps = await fetch_recipe_instructions_async(recipe_id)
+    return build_procedure(steps, processes_str)
+
+
+def build_procedure(steps: list, processes_str: str):
+    """
+    Turns instruction steps into procedure cards.
+    Falls back to the processes field, then to a generic procedure.
+    """
     if steps:
         return [
             {
@@ -0,0 +1,119 @@
+"""
+"What can I cook": pantry-aware top-K over the offline corpus. An ingredient
+the pantry can substitute counts as SUBSTITUTE_MATCH_WEIGHT of a match but
+stays missing. Recipes are scored in decreasing coverage order and pruned
+once their bound cannot enter the top K.
+"""
+
+import heapq
+import numpy as np
+from logic.diet import DIET_GOALS
+from logic.ingredient_match import detect_missing
+from logic.scoring import calculate_confidence
+from logic.substitutes import get_substitute_engine
+from utils.constants import SUBSTITUTE_MATCH_WEIGHT, SUBSTITUTE_MIN_SIMILARITY
+from utils.metrics import timed
+
+
+def substitutable(index, pantry: list, engine,
+                  min_similarity: float = SUBSTITUTE_MIN_SIMILARITY) -> dict:
+    """
+    Index ingredient id -> (pantry item, similarity) for ingredients the pantry
+    doesn't have but can replace; the most similar pantry item wins.
+    """
+    have = set(index.ingredient_ids(pantry))
+    covered = {}
+    for item in pantry:
+        for name, similarity in engine.replaceable_by(item):
+            if similarity < min_similarity:
+                continue
+            i = index.vocab.get(name)
+            if i is None or i in have:
+                continue
+            if i not in covered or similarity > covered[i][1]:
+                covered[i] = (item, similarity)
+    return covered
+
+
+def _score(exact: int, subs: int, total: int, weight: float):
+    """
+    (confidence, match %) with substituted ingredients as partial matches.
+    Every ingredient the pantry lacks is penalized, substituted or not, so the
+    penalty matches the `missing` list.
+    """
+    match_percent = round((exact + weight * subs) / total * 100, 2)
+    return calculate_confidence(match_percent, total - exact), match_percent
+
+
+def _by_bound(candidates, bound, first: int):
+    """
+    (position, bound) in decreasing bound order. Only the `first` best are
+    sorted up front; the rest are sorted if the caller gets that far.
+    """
+    if len(candidates) > first:
+        split = np.argpartition(-bound[candidates], first - 1)
+        head, tail = candidates[split[:first]], candidates[split[first:]]
+    else:
+        head, tail = candidates, candidates[:0]
+    for part in (head, tail):
+        part = part[np.argsort(-bound[part], kind="stable")]
+        yield from zip(part.tolist(), bound[part].tolist())
+
+
+@timed("scoring")
+def recommend(index, pantry: list, top_k: int = 5, min_match: float = 0,
+              diet_goal: str = "Any", use_substitutes: bool = True,
+              weight: float = SUBSTITUTE_MATCH_WEIGHT) -> list:
+    """
+    Top-K recipes for a pantry, ranked by confidence then match %.
+    Returns (position, RecipeView, match data, confidence) tuples; match data is
+    detect_missing's plus `substitutions` for the missing ingredients the pantry covers.
+    """
+    engine = get_substitute_engine() if use_substitutes else None
+    covered = substitutable(index, pantry, engine) if engine else {}
+
+    exact = index.overlap(index.ingredient_ids(pantry))
+    subs = index.overlap(sorted(covered))
+
+    # Best case per recipe: every matched ingredient scores, no penalty
+    bound = (exact + weight * subs) * 100 / np.maximum(index.sizes, 1)
+    mask = (exact + subs) > 0
+    if min_match > 0:
+        mask &= bound >= min_match - 0.005
+    if diet_goal in DIET_GOALS:
+        mask &= (index.diet & DIET_GOALS[diet_goal]) != 0
+    candidates = np.flatnonzero(mask)
+
+    # Min-heap of (confidence, match %, -position): heap[0] is the current K-th best
+    heap = []
+    for pos, best_case in _by_bound(candidates, bound, first=4 * top_k):
+        # (+0.005: match % is rounded to 2 places)
+        if len(heap) == top_k and best_case + 0.005 < heap[0][0]:
+            break
+        confidence, match_percent = _score(
+            int(exact[pos]), int(subs[pos]), int(index.sizes[pos]), weight
+        )
+        if match_percent < min_match:
+            continue
+        entry = (confidence, match_percent, -pos)
+        if len(heap) < top_k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    results = []
+    for confidence, match_percent, neg_pos in sorted(heap, reverse=True):
+        pos = -neg_pos
+        ids = index.recipe_ingredients[index.recipe_indptr[pos]:index.recipe_indptr[pos + 1]]
+        match_data = detect_missing([index.names[j] for j in ids], pantry)
+        match_data["match_percent"] = match_percent
+        match_data["substitutions"] = []
+        for name in match_data["missing"]:
+            i = index.vocab.get(name)
+            if i in covered:
+                item, similarity = covered[i]
+                match_data["substitutions"].append(
+                    {"original": name, "substitute": item, "score": round(similarity * 100)}
+                )
+        results.append((pos, index.recipes[pos], match_data, confidence))
+    return results
@@ -0,0 +1,296 @@
+"""
+Flavor-similarity substitutes: Jaccard similarity of FlavorDB molecule sets,
+top-K neighbours per entity, precomputed offline and looked up with no
+network calls.
+
+    python -m logic.substitutes build flavordb.json [--molecules entity_molecules.csv]
+    python -m logic.substitutes show tomato
+"""
+
+import argparse
+import logging
+import os
+import re
+import threading
+import time
+import numpy as np
+from models.substitution_model import Substitution
+from services.recipe_store import read_records
+from utils.canonical import canonicalize, canonicalizer
+from utils.constants import (
+    SUBSTITUTES_PATH, SUBSTITUTES_LOAD_RETRY, SUBSTITUTE_TOP_K, SUBSTITUTE_MIN_SIMILARITY,
+)
+
+# Bytes of intermediate (rows x entities x words) intersections per block
+BLOCK_BYTES = 32 * 1024 * 1024
+
+_NUMBER_RE = re.compile(r"\d+")
+
+log = logging.getLogger(__name__)
+
+if hasattr(np, "bitwise_count"):
+    _popcount = np.bitwise_count
+else:
+    _BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(words):
+        counts = _BYTE_BITS[words.view(np.uint8)]
+        return counts.reshape(*words.shape, 8).sum(axis=-1, dtype=np.uint8)
+
+
+def _entity_name(entity: dict) -> str:
+    return (
+        entity.get("entity_alias_readable") or entity.get("entity_readable_name")
+        or entity.get("name") or ""
+    ).strip()
+
+
+def _entity_category(entity: dict) -> str:
+    return (
+        entity.get("category_readable") or entity.get("entity_category")
+        or entity.get("category") or "Flavor component"
+    )
+
+
+def _molecule_ids(value) -> list:
+    """Molecule ids from a list of ids / {"pubchem_id": ...} dicts, or a delimited string."""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [
+            int(m.get("pubchem_id", 0)) if isinstance(m, dict) else int(m)
+            for m in value
+        ]
+    return [int(m) for m in _NUMBER_RE.findall(str(value))]
+
+
+def _load_molecule_dump(path: str) -> dict:
+    """entity_id -> molecule ids, from a dump with one (entity_id, pubchem_id) per row."""
+    mapping = {}
+    for row in read_records(path):
+        entity_id = str(row.get("entity_id", "")).strip()
+        molecule = str(row.get("pubchem_id", "")).strip()
+        if entity_id and molecule.isdigit():
+            mapping.setdefault(entity_id, []).append(int(molecule))
+    return mapping
+
+
+def jaccard_top_k(bits: np.ndarray, k: int):
+    """
+    Top-k most similar rows for every row of a (n, words) uint64 bitset matrix.
+    Returns (neighbors int32 (n, k), scores float32 (n, k)); missing slots are -1 / 0.
+    """
+    n, words = bits.shape
+    k = max(0, min(k, n - 1))
+    neighbors = np.full((n, k), -1, dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+    if not k:
+        return neighbors, scores
+
+    sizes = _popcount(bits).sum(axis=1, dtype=np.int32)
+    block = max(1, BLOCK_BYTES // max(1, n * words * 8))
+    for start in range(0, n, block):
+        rows = bits[start:start + block]
+        inter = _popcount(rows[:, None, :] & bits[None, :, :]).sum(axis=2, dtype=np.int32)
+        union = sizes[start:start + len(rows), None] + sizes[None, :] - inter
+        sim = np.divide(
+            inter, union, out=np.zeros(inter.shape, dtype=np.float32), where=union > 0
+        )
+        sim[np.arange(len(rows)), np.arange(start, start + len(rows))] = -1   # not itself
+
+        top = np.argpartition(-sim, k - 1, axis=1)[:, :k]
+        top_sim = np.take_along_axis(sim, top, axis=1)
+        order = np.argsort(-top_sim, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_sim = np.take_along_axis(top_sim, order, axis=1)
+        keep = top_sim > 0
+        neighbors[start:start + len(rows)] = np.where(keep, top, -1)
+        scores[start:start + len(rows)] = np.where(keep, top_sim, 0)
+    return neighbors, scores
+
+
+class SubstituteEngine:
+
+    def __init__(self, names, categories, neighbors, scores):
+        self.names = list(names)              # entity position -> readable name
+        self.categories = list(categories)
+        self.neighbors = neighbors            # (n, k) int32, -1 = empty slot
+        self.scores = scores                  # (n, k) float32 Jaccard similarity
+        self._index_names()
+
+    def _index_names(self):
+        self.positions = {}
+        for i, name in enumerate(self.names):
+            self.positions.setdefault(canonicalize(name), i)
+        self._reverse = None
+
+    def register_vocabulary(self):
+        """
+        Makes the entity names fuzzy-match targets of the shared canonicalizer,
+        so "Roma tomatoes" finds "tomato". Done once for the served engine.
+        """
+        canonicalizer.add_vocabulary(self.names)
+        # Names may canonicalize differently now that they are known
+        self._index_names()
+
+    @classmethod
+    def build(cls, entities, top_k: int = SUBSTITUTE_TOP_K,
+              molecules: dict = None) -> "SubstituteEngine":
+        """From raw FlavorDB entity records; `molecules` maps entity_id -> ids from a separate dump."""
+        molecules = molecules or {}
+        names, categories, sets = [], [], []
+        seen = set()
+        for entity in entities:
+            name = _entity_name(entity)
+            ids = _molecule_ids(entity.get("molecules") or entity.get("molecule_ids")) \
+                or molecules.get(str(entity.get("entity_id", "")).strip(), [])
+            if not name or not ids or name.lower() in seen:
+                continue
+            seen.add(name.lower())
+            names.append(name)
+            categories.append(_entity_category(entity))
+            sets.append(ids)
+
+        # Interned molecule ids -> bit positions
+        vocab = {}
+        for ids in sets:
+            for m in ids:
+                vocab.setdefault(m, len(vocab))
+        words = max(1, (len(vocab) + 63) // 64)
+        bits = np.zeros((len(sets), words), dtype=np.uint64)
+        for row, ids in enumerate(sets):
+            cols = np.fromiter((vocab[m] for m in set(ids)), dtype=np.int64)
+            np.bitwise_or.at(
+                bits[row], cols // 64, np.left_shift(np.uint64(1), (cols % 64).astype(np.uint64))
+            )
+
+        neighbors, scores = jaccard_top_k(bits, top_k)
+        return cls(names, categories, neighbors, scores)
+
+    def __len__(self):
+        return len(self.names)
+
+    def substitutes(self, ingredient: str, limit: int = None,
+                    min_similarity: float = SUBSTITUTE_MIN_SIMILARITY) -> list:
+        """
+        Ranked Substitutions for an ingredient, at least `min_similarity` alike
+        ([] if it is not a known FlavorDB entity).
+        """
+        pos = self.positions.get(canonicalize(ingredient))
+        if pos is None:
+            return []
+        results = []
+        for j, score in zip(self.neighbors[pos], self.scores[pos]):
+            # Neighbours are sorted by similarity: nothing further qualifies
+            if j < 0 or score < min_similarity:
+                break
+            results.append(Substitution.from_neighbor(
+                ingredient, self.names[j], self.categories[j], float(score)
+            ))
+            if limit and len(results) >= limit:
+                break
+        return results
+
+    def replaceable_by(self, ingredient: str) -> list:
+        """
+        (canonical name, similarity) of the entities that list `ingredient`
+        among their own top-K substitutes — what having it on hand can stand in for.
+        """
+        pos = self.positions.get(canonicalize(ingredient))
+        if pos is None:
+            return []
+        if self._reverse is None:
+            # Neighbour lists inverted once: substitute -> entities it replaces
+            owners = np.repeat(np.arange(len(self.names)), self.neighbors.shape[1])
+            flat = self.neighbors.ravel()
+            valid = flat >= 0
+            order = np.argsort(flat[valid], kind="stable")
+            counts = np.bincount(flat[valid], minlength=len(self.names))
+            self._reverse = (
+                np.concatenate(([0], np.cumsum(counts))),
+                owners[valid][order],
+                self.scores.ravel()[valid][order],
+            )
+        indptr, owners, scores = self._reverse
+        span = slice(indptr[pos], indptr[pos + 1])
+        return [
+            (canonicalize(self.names[i]), float(score))
+            for i, score in zip(owners[span], scores[span])
+        ]
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                names=np.array(self.names, dtype=str),
+                categories=np.array(self.categories, dtype=str),
+                neighbors=self.neighbors,
+                scores=self.scores,
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "SubstituteEngine":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["names"].tolist(), data["categories"].tolist(),
+                data["neighbors"], data["scores"],
+            )
+
+
+_engine = None
+_engine_loaded = False
+_engine_retry_at = 0.0     # after a failed load: when to try again (monotonic)
+_engine_lock = threading.Lock()
+
+
+def get_substitute_engine():
+    """
+    The precomputed engine from SUBSTITUTES_PATH, or None if it has not been
+    built. A table that fails to load is retried after SUBSTITUTES_LOAD_RETRY.
+    """
+    global _engine, _engine_loaded, _engine_retry_at
+    if not _engine_loaded and time.monotonic() >= _engine_retry_at:
+        with _engine_lock:
+            if not _engine_loaded and time.monotonic() >= _engine_retry_at:
+                try:
+                    if os.path.exists(SUBSTITUTES_PATH):
+                        engine = SubstituteEngine.load(SUBSTITUTES_PATH)
+                        engine.register_vocabulary()
+                        _engine = engine
+                    _engine_loaded = True
+                except Exception as e:
+                    log.warning("Could not load substitute table %s: %s", SUBSTITUTES_PATH, e)
+                    _engine_retry_at = time.monotonic() + SUBSTITUTES_LOAD_RETRY
+    return _engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the substitute table.")
+    parser.add_argument("--table", default=SUBSTITUTES_PATH, help="substitute table path")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="precompute neighbours from a FlavorDB dump")
+    build.add_argument("path", help="entities as CSV / JSON / JSONL")
+    build.add_argument("--molecules", help="separate entity_id,pubchem_id dump")
+    build.add_argument("--top-k", type=int, default=SUBSTITUTE_TOP_K)
+    show = sub.add_parser("show", help="print substitutes for an ingredient")
+    show.add_argument("ingredient")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        molecules = _load_molecule_dump(args.molecules) if args.molecules else None
+        engine = SubstituteEngine.build(read_records(args.path), args.top_k, molecules)
+        engine.save(args.table)
+        print(f"Wrote top-{engine.neighbors.shape[1]} substitutes for {len(engine)} entities to {args.table}")
+        return
+
+    engine = SubstituteEngine.load(args.table)
+    engine.register_vocabulary()
+    for sub_ in engine.substitutes(args.ingredient):
+        print(f"{sub_.confidence:3d}  {sub_.substitute}  ({sub_.role})")
+
+
+if __name__ == "__main__":
+    main()
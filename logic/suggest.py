@@ -0,0 +1,278 @@
+"""
+Typeahead over recipe titles and canonical ingredient names (GET /api/suggest).
+PrefixIndex keeps sorted keys for every word start, searched with bisect and
+ranked by popularity; new keys go to a small run merged at MERGE_AT.
+"""
+
+import bisect
+import os
+import threading
+import time
+import numpy as np
+from services.recipe_store import get_store
+from services.recipedb_service import on_recipes_cached
+from utils.canonical import canonicalize
+from utils.constants import SUGGEST_MAX_ENTRIES, SUGGEST_STORE_POLL, RECIPE_STORE_PATH
+from utils.helpers import normalize
+
+KEY_CHARS = 24
+MERGE_AT = 4096
+# Popularity added when a recipe is opened vs. merely seen in a search
+VIEW_WEIGHT = 5.0
+SEEN_WEIGHT = 1.0
+
+
+def _clean(text: str) -> str:
+    return " ".join(normalize(str(text)).split())
+
+
+def _word_keys(name: str) -> set:
+    keys = {name[:KEY_CHARS]}
+    for i, char in enumerate(name):
+        if char == " " and i + 1 < len(name):
+            keys.add(name[i + 1:i + 1 + KEY_CHARS])
+    return keys
+
+
+class PrefixIndex:
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._ids = {}          # cleaned name -> entry id
+        self._names = []        # entry id -> cleaned name
+        self._labels = []       # entry id -> display text
+        self._refs = []         # entry id -> Recipe_id (titles) or None
+        self._popularity = np.zeros(1024, dtype=np.float64)
+        self._keys = []         # main run: sorted keys ...
+        self._key_ids = np.empty(0, dtype=np.int32)   # ... and their entry ids
+        self._pending = []      # sorted (key, entry id) not merged yet
+        self._dropped = 0
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, label: str, weight: float = SEEN_WEIGHT, ref=None):
+        """Adds an entry, or adds `weight` to its popularity if it exists."""
+        self.add_many([(label, weight, ref)])
+
+    def add_many(self, items):
+        """(label, weight, ref) triples; an existing entry only gains popularity."""
+        with self._lock:
+            new_keys = []
+            for label, weight, ref in items:
+                name = _clean(label)
+                if not name:
+                    continue
+                entry = self._ids.get(name)
+                if entry is None:
+                    entry = self._new_entry(name, label.strip(), ref, new_keys)
+                self._popularity[entry] += weight
+            self._insert(new_keys)
+            if len(self._names) > self.max_entries:
+                self._compact()
+
+    def bump(self, label: str, weight: float):
+        """Adds popularity to an existing entry only (user input never creates entries)."""
+        with self._lock:
+            entry = self._ids.get(_clean(label))
+            if entry is not None:
+                self._popularity[entry] += weight
+
+    def _new_entry(self, name: str, label: str, ref, new_keys: list) -> int:
+        entry = len(self._names)
+        self._ids[name] = entry
+        self._names.append(name)
+        self._labels.append(label)
+        self._refs.append(ref)
+        if entry >= len(self._popularity):
+            self._popularity = np.concatenate(
+                (self._popularity, np.zeros(len(self._popularity), dtype=np.float64))
+            )
+        new_keys.extend((key, entry) for key in _word_keys(name))
+        return entry
+
+    def _insert(self, new_keys: list):
+        if len(self._pending) + len(new_keys) < MERGE_AT:
+            for pair in new_keys:
+                bisect.insort(self._pending, pair)
+            return
+        # Merge into the main run: insertion points by bisect, then C-level
+        # slice copies instead of re-sorting the whole run
+        batch = sorted(self._pending + new_keys)
+        keys = self._keys
+        positions = [bisect.bisect_right(keys, key) for key, _ in batch]
+        merged = []
+        previous = 0
+        for (key, _), position in zip(batch, positions):
+            merged.extend(keys[previous:position])
+            merged.append(key)
+            previous = position
+        merged.extend(keys[previous:])
+        self._keys = merged
+        self._key_ids = np.insert(
+            self._key_ids, positions, np.fromiter((e for _, e in batch), dtype=np.int32, count=len(batch))
+        )
+        self._pending = []
+
+    def _compact(self):
+        """Keeps the most popular 90% of max_entries and rebuilds the runs."""
+        keep = int(self.max_entries * 0.9)
+        count = len(self._names)
+        order = np.argsort(-self._popularity[:count], kind="stable")[:keep]
+        kept = [(self._labels[i], self._names[i], self._refs[i], self._popularity[i]) for i in order]
+        dropped = self._dropped + count - len(kept)
+        self._reset()
+        self._dropped = dropped
+        new_keys = []
+        for label, name, ref, popularity in kept:
+            entry = self._new_entry(name, label, ref, new_keys)
+            self._popularity[entry] = popularity
+        self._insert(new_keys)
+
+    def lookup(self, prefix: str, limit: int = 8) -> list:
+        """Most popular entries with a word starting with `prefix`: (label, ref) pairs."""
+        query = _clean(prefix)
+        if not query or limit <= 0:
+            return []
+        key = query[:KEY_CHARS]
+        with self._lock:
+            lo = bisect.bisect_left(self._keys, key)
+            hi = bisect.bisect_left(self._keys, key + "\uffff")
+            ids = self._key_ids[lo:hi]
+            # One entry can own several keys in range; over-select before de-duplicating
+            want = limit * 4
+            if len(ids) > want:
+                ids = ids[np.argpartition(-self._popularity[ids], want - 1)[:want]]
+            candidates = set(ids.tolist())
+            start = bisect.bisect_left(self._pending, (key,))
+            for pending_key, entry in self._pending[start:]:
+                if not pending_key.startswith(key):
+                    break
+                candidates.add(entry)
+
+            if len(query) > KEY_CHARS:
+                candidates = {
+                    e for e in candidates
+                    if self._names[e].startswith(query) or (" " + query) in self._names[e]
+                }
+            ranked = sorted(
+                candidates,
+                key=lambda e: (-self._popularity[e], len(self._names[e]), self._names[e]),
+            )[:limit]
+            return [(self._labels[e], self._refs[e]) for e in ranked]
+
+    def stats(self) -> dict:
+        with self._lock:
+            keys = len(self._keys) + len(self._pending)
+            # Rough size: key strings + list/array slots, names + labels + id map
+            approx = (
+                sum(len(k) + 57 for k in self._keys) + 4 * len(self._key_ids)
+                + 120 * len(self._pending)
+                + sum(2 * len(n) + 200 for n in self._names)
+            )
+            return {
+                "entries": len(self._names),
+                "keys": keys,
+                "pending_keys": len(self._pending),
+                "max_entries": self.max_entries,
+                "dropped": self._dropped,
+                "approx_bytes": approx,
+            }
+
+
+class Suggester:
+    """Titles + ingredients, fed by the offline store and the response cache."""
+
+    def __init__(self, max_entries: int, store_poll: float):
+        self.titles = PrefixIndex(max_entries)
+        self.ingredients = PrefixIndex(max_entries)
+        self.store_poll = store_poll
+        self._store_rowid = 0
+        self._store_checked = 0.0
+        self._sync_lock = threading.Lock()
+
+    def observe(self, records: list):
+        """Recipe records seen in a RecipeDB response (search results or a full recipe)."""
+        titles = []
+        ingredients = []
+        for record in records:
+            title = record.get("Recipe_title")
+            if title:
+                titles.append((title, SEEN_WEIGHT, str(record.get("Recipe_id", "")) or None))
+            for ing in record.get("ingredients") or []:
+                canonical = canonicalize(ing)
+                if canonical:
+                    ingredients.append((canonical, SEEN_WEIGHT, None))
+        if titles:
+            self.titles.add_many(titles)
+        if ingredients:
+            self.ingredients.add_many(ingredients)
+
+    def viewed(self, title: str):
+        self.titles.bump(title, VIEW_WEIGHT)
+
+    def sync_store(self, force: bool = False):
+        """Adds store rows written since the last sync (at most every store_poll seconds)."""
+        now = time.monotonic()
+        if not force and now - self._store_checked < self.store_poll:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return  # another request is syncing
+        try:
+            self._store_checked = now
+            # Don't create an empty store just to find it has nothing
+            if not os.path.exists(RECIPE_STORE_PATH):
+                return
+            store = get_store()
+            rows = store.titles_since(self._store_rowid)
+            if not rows:
+                return
+            self.titles.add_many((title, SEEN_WEIGHT, recipe_id) for _, recipe_id, title in rows)
+            counts = store.ingredient_counts(
+                None if self._store_rowid == 0 else [recipe_id for _, recipe_id, _ in rows]
+            )
+            self.ingredients.add_many((name, count, None) for name, count in counts.items())
+            self._store_rowid = rows[-1][0]
+        finally:
+            self._sync_lock.release()
+
+    def suggest(self, prefix: str, limit: int = 8, kind: str = "") -> dict:
+        self.sync_store()
+        result = {}
+        if kind in ("", "recipe"):
+            result["recipes"] = [
+                {"title": label, "recipe_id": ref} for label, ref in self.titles.lookup(prefix, limit)
+            ]
+        if kind in ("", "ingredient"):
+            result["ingredients"] = [
+                {"name": label} for label, _ in self.ingredients.lookup(prefix, limit)
+            ]
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "titles": self.titles.stats(),
+            "ingredients": self.ingredients.stats(),
+            "store_rowid": self._store_rowid,
+        }
+
+
+_suggester = None
+_suggester_lock = threading.Lock()
+
+
+def get_suggester() -> Suggester:
+    """Built on first use; from then on kept current by the response-cache hook."""
+    global _suggester
+    if _suggester is None:
+        with _suggester_lock:
+            if _suggester is None:
+                suggester = Suggester(SUGGEST_MAX_ENTRIES, SUGGEST_STORE_POLL)
+                suggester.sync_store(force=True)
+                on_recipes_cached(suggester.observe)
+                _suggester = suggester
+    return _suggester
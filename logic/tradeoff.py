@@ -1,34 +1,55 @@
 #Human-readable advice generator
+PERFECT, EXCELLENT, STRONG, MODERATE, LOW, VERY_LOW = range(6)
+
+TRADEOFF_BUCKETS = ["perfect", "excellent", "strong", "moderate", "low", "very_low"]
+
+
+def tradeoff_bucket(match_percent: float, missing_count: int) -> int:
+    """Match-quality bucket that generate_tradeoff_line explains."""
+    if missing_count == 0:
+        return PERFECT
+    if match_percent >= 90:
+        return EXCELLENT
+    if match_percent >= 75:
+        return STRONG
+    if match_percent >= 60:
+        return MODERATE
+    if match_percent >= 40:
+        return LOW
+    return VERY_LOW
+
+
 def generate_tradeoff_line(match_percent: float, missing_count: int):
     """
     Generates a human-readable explanation of the recipe match quality
     with actionable advice based on how many ingredients are missing.
     """
+    bucket = tradeoff_bucket(match_percent, missing_count)
 
-    if missing_count == 0:
+    if bucket == PERFECT:
         return "✅ Perfect match — you have everything needed. Start cooking!"
 
-    if match_percent >= 90:
+    if bucket == EXCELLENT:
         return (
             f"✅ Excellent match ({match_percent}%). "
             f"Only {missing_count} minor ingredient(s) missing — easy to substitute or skip."
         )
 
-    if match_percent >= 75:
+    if bucket == STRONG:
         return (
             f"🟡 Strong match ({match_percent}%). "
             f"{missing_count} ingredient(s) missing. Check the substitutes — "
             f"most can be replaced without affecting the dish significantly."
         )
 
-    if match_percent >= 60:
+    if bucket == MODERATE:
         return (
             f"🟠 Moderate match ({match_percent}%). "
             f"{missing_count} ingredient(s) missing. The dish is doable but "
             f"some substitutes may alter the flavor profile."
         )
 
-    if match_percent >= 40:
+    if bucket == LOW:
         return (
             f"🔴 Low match ({match_percent}%). "
             f"{missing_count} ingredient(s) missing. Consider picking up key "
@@ -0,0 +1,318 @@
+"""
+Columnar recipe corpus: numeric fields in NumPy arrays, repeated strings
+interned in StringTables, ingredient lists as CSR ids. corpus[i] is a
+RecipeView that reads the columns on access.
+
+    python -m models.corpus [--db data/recipes.sqlite3]
+"""
+
+import argparse
+import json
+import sys
+import numpy as np
+from logic.diet import diet_label
+from models.recipe_model import Recipe, NORMALIZED
+from utils.constants import RECIPE_STORE_PATH
+
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+
+# Column attributes by kind (services/snapshot.py persists exactly these)
+ARRAY_COLUMNS = (
+    "region", "continent", "ingredient_ids", "ingredient_indptr",
+    "calories", "cook_time", "prep_time", "total_time", "servings", "vegan",
+    "calories_per_serving", "protein", "carbs", "fat", "diet_flags", "difficulty",
+)
+STRING_COLUMNS = ("ids", "titles", "processes")
+TABLE_COLUMNS = ("labels", "ingredient_names")
+_DIFFICULTY_CODES = {name: i for i, name in enumerate(DIFFICULTIES)}
+
+
+class StringTable:
+    """Interns repeated strings: each distinct value is stored once and referenced by id."""
+
+    __slots__ = ("values", "_ids")
+
+    def __init__(self):
+        self.values = []
+        self._ids = {}
+
+    def intern(self, value: str) -> int:
+        i = self._ids.get(value)
+        if i is None:
+            i = len(self.values)
+            self.values.append(value)
+            self._ids[value] = i
+        return i
+
+    def id_of(self, value: str):
+        return self._ids.get(value)
+
+    def __getitem__(self, i) -> str:
+        return self.values[i]
+
+    def __len__(self):
+        return len(self.values)
+
+    def nbytes(self) -> int:
+        return (
+            sys.getsizeof(self.values) + sys.getsizeof(self._ids)
+            + sum(sys.getsizeof(v) for v in self.values)
+        )
+
+
+class PackedStrings:
+    """Mostly-distinct strings (titles, ids) in one UTF-8 buffer plus an offsets array."""
+
+    __slots__ = ("buffer", "offsets")
+
+    def __init__(self, values):
+        encoded = [v.encode() for v in values]
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=self.offsets[1:])
+        self.buffer = b"".join(encoded)
+
+    @classmethod
+    def from_buffer(cls, buffer, offsets) -> "PackedStrings":
+        """Wraps an existing buffer (e.g. a memoryview of an mmap) without copying."""
+        packed = cls.__new__(cls)
+        packed.buffer = buffer
+        packed.offsets = offsets
+        return packed
+
+    def raw(self, i) -> memoryview:
+        """Zero-copy bytes of entry i."""
+        return memoryview(self.buffer)[self.offsets[i]:self.offsets[i + 1]]
+
+    def __getitem__(self, i) -> str:
+        return str(self.buffer[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def nbytes(self) -> int:
+        return len(self.buffer) + self.offsets.nbytes
+
+
+class RecipeView:
+    """One recipe of a RecipeCorpus; every field is read from the columns on access."""
+
+    __slots__ = ("corpus", "pos")
+
+    def __init__(self, corpus: "RecipeCorpus", pos: int):
+        self.corpus = corpus
+        self.pos = pos
+
+    @property
+    def recipe_id(self) -> str:
+        return self.corpus.ids[self.pos]
+
+    @property
+    def title(self) -> str:
+        return self.corpus.titles[self.pos]
+
+    @property
+    def region(self) -> str:
+        return self.corpus.labels[self.corpus.region[self.pos]]
+
+    @property
+    def continent(self) -> str:
+        return self.corpus.labels[self.corpus.continent[self.pos]]
+
+    @property
+    def processes(self) -> str:
+        return self.corpus.processes[self.pos]
+
+    @property
+    def total_time(self) -> int:
+        return int(self.corpus.total_time[self.pos])
+
+    @property
+    def servings(self) -> int:
+        return int(self.corpus.servings[self.pos])
+
+    @property
+    def vegan(self) -> bool:
+        return bool(self.corpus.vegan[self.pos])
+
+    @property
+    def difficulty(self) -> str:
+        return DIFFICULTIES[self.corpus.difficulty[self.pos]]
+
+    @property
+    def diet_flags(self) -> int:
+        return int(self.corpus.diet_flags[self.pos])
+
+    @property
+    def diet(self) -> str:
+        return diet_label(self.diet_flags)
+
+    @property
+    def ingredient_ids(self) -> np.ndarray:
+        """Interned ingredient ids — a view into the corpus array, not a copy."""
+        c = self.corpus
+        return c.ingredient_ids[c.ingredient_indptr[self.pos]:c.ingredient_indptr[self.pos + 1]]
+
+    @property
+    def ingredients(self) -> list:
+        names = self.corpus.ingredient_names
+        return [names[i] for i in self.ingredient_ids]
+
+    def nutrition(self) -> dict:
+        """Per-serving macros in the API's response shape."""
+        c, pos = self.corpus, self.pos
+        return {
+            "calories": int(c.calories_per_serving[pos]),
+            "protein": round(float(c.protein[pos]), 1),
+            "carbs": round(float(c.carbs[pos]), 1),
+            "fat": round(float(c.fat[pos]), 1),
+        }
+
+    def normalized(self) -> dict:
+        return {
+            "servings": self.servings,
+            "minutes": self.total_time,
+            **self.nutrition(),
+            "difficulty": self.difficulty,
+            "diet_flags": self.diet_flags,
+            "diet": self.diet,
+        }
+
+    def to_record(self) -> dict:
+        """The recipe as a RecipeDB-shaped dict (with its normalized block)."""
+        c, pos = self.corpus, self.pos
+        return {
+            "Recipe_id": self.recipe_id,
+            "Recipe_title": self.title,
+            "Calories": str(float(c.calories[pos])),
+            "cook_time": str(int(c.cook_time[pos])),
+            "prep_time": str(int(c.prep_time[pos])),
+            "total_time": str(self.total_time),
+            "servings": str(self.servings),
+            "Region": self.region,
+            "Continent": self.continent,
+            "Processes": self.processes,
+            "vegan": "1.0" if self.vegan else "0.0",
+            "ingredients": self.ingredients,
+            NORMALIZED: self.normalized(),
+        }
+
+
+class RecipeCorpus:
+
+    def __init__(self, recipes: list):
+        """Builds the columns from typed Recipe objects (see `build` for raw records)."""
+        n = len(recipes)
+        self.ids = PackedStrings(r.recipe_id for r in recipes)
+        self.titles = PackedStrings(r.title for r in recipes)
+        self.processes = PackedStrings(r.processes for r in recipes)
+        self._positions = None
+
+        self.labels = StringTable()
+        self.region = np.fromiter((self.labels.intern(r.region) for r in recipes), np.uint32, n)
+        self.continent = np.fromiter((self.labels.intern(r.continent) for r in recipes), np.uint32, n)
+
+        self.ingredient_names = StringTable()
+        ids = [self.ingredient_names.intern(ing) for r in recipes for ing in r.ingredients]
+        self.ingredient_ids = np.asarray(ids, dtype=np.uint32)
+        self.ingredient_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum([len(r.ingredients) for r in recipes], out=self.ingredient_indptr[1:])
+
+        def column(attr, dtype):
+            return np.fromiter((getattr(r, attr) for r in recipes), dtype, n)
+
+        self.calories = column("calories", np.float32)
+        self.cook_time = column("cook_time", np.int32)
+        self.prep_time = column("prep_time", np.int32)
+        self.total_time = column("total_time", np.int32)
+        self.servings = column("servings", np.int32)
+        self.vegan = column("vegan", np.bool_)
+        self.calories_per_serving = column("calories_per_serving", np.int32)
+        self.protein = column("protein", np.float32)
+        self.carbs = column("carbs", np.float32)
+        self.fat = column("fat", np.float32)
+        self.diet_flags = column("diet_flags", np.uint8)
+        self.difficulty = np.fromiter(
+            (_DIFFICULTY_CODES[r.difficulty] for r in recipes), np.uint8, n
+        )
+
+    @classmethod
+    def build(cls, records) -> "RecipeCorpus":
+        """From raw RecipeDB / offline-store records."""
+        return cls([Recipe.from_api(record) for record in records])
+
+    @classmethod
+    def from_columns(cls, columns: dict) -> "RecipeCorpus":
+        """From ready-made columns (ARRAY/STRING/TABLE_COLUMNS), e.g. a loaded snapshot."""
+        corpus = cls.__new__(cls)
+        for name in ARRAY_COLUMNS + STRING_COLUMNS + TABLE_COLUMNS:
+            setattr(corpus, name, columns[name])
+        corpus._positions = None
+        return corpus
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, pos) -> RecipeView:
+        if not 0 <= pos < len(self):
+            raise IndexError(pos)
+        return RecipeView(self, int(pos))
+
+    def __iter__(self):
+        return (RecipeView(self, i) for i in range(len(self)))
+
+    def position(self, recipe_id: str):
+        """Row of a Recipe_id (the id -> row map is built on first use)."""
+        if self._positions is None:
+            self._positions = {self.ids[i]: i for i in range(len(self))}
+        return self._positions.get(str(recipe_id))
+
+    def memory_bytes(self) -> dict:
+        """Bytes held per column group."""
+        sizes = {
+            "numeric": sum(getattr(self, name).nbytes for name in ARRAY_COLUMNS),
+            "strings": sum(getattr(self, name).nbytes() for name in STRING_COLUMNS),
+            "tables": sum(getattr(self, name).nbytes() for name in TABLE_COLUMNS),
+        }
+        sizes["total"] = sum(sizes.values())
+        return sizes
+
+
+def deep_sizeof(obj, seen=None) -> int:
+    """Approximate bytes reachable from a dict/list/str structure (shared objects counted once)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    return size
+
+
+def memory_report(records: list) -> dict:
+    """Footprint of `records` held as dicts vs. as a RecipeCorpus."""
+    dict_bytes = deep_sizeof(records)
+    corpus = RecipeCorpus.build(records)
+    columnar = corpus.memory_bytes()
+    return {
+        "recipes": len(corpus),
+        "dict_bytes": dict_bytes,
+        "columnar_bytes": columnar["total"],
+        "columnar": columnar,
+        "ratio": round(dict_bytes / columnar["total"], 1) if columnar["total"] else 0.0,
+    }
+
+
+def main(argv=None):
+    from services.recipe_store import RecipeStore
+
+    parser = argparse.ArgumentParser(description="Compare corpus memory: dicts vs. columnar.")
+    parser.add_argument("--db", default=RECIPE_STORE_PATH, help="offline store path")
+    args = parser.parse_args(argv)
+    print(json.dumps(memory_report(list(RecipeStore(args.db).iter_recipes())), indent=2))
+
+
+if __name__ == "__main__":
+    main()
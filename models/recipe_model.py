@@ -1,40 +1,123 @@
 """
 Data model for a recipe object.
 Used for type hints and validation across the project.
+normalize_record() parses RecipeDB's string numbers once, on ingest.
 """
 
 from dataclasses import dataclass, field
 from typing import List
+from logic.diet import diet_flags, diet_label, BALANCED
+from utils.helpers import to_float
 
+# Key of the normalized block inside a raw record dict
+NORMALIZED = "normalized"
 
-@dataclass
+EASY_MAX_MINUTES = 20
+MEDIUM_MAX_MINUTES = 45
+
+
+def difficulty_for(minutes: int) -> str:
+    """Easy / Medium / Hard from total minutes (unknown time counts as Medium)."""
+    if minutes <= 0:
+        return "Medium"
+    if minutes <= EASY_MAX_MINUTES:
+        return "Easy"
+    if minutes <= MEDIUM_MAX_MINUTES:
+        return "Medium"
+    return "Hard"
+
+
+@dataclass(slots=True)
 class Recipe:
     recipe_id: str
     title: str
-    calories: float
-    cook_time: str
-    prep_time: str
-    total_time: str
-    servings: str
+    calories: float           # whole recipe
+    cook_time: int            # minutes
+    prep_time: int
+    total_time: int
+    servings: int
     region: str
     continent: str
     ingredients: List[str] = field(default_factory=list)
     processes: str = ""
-    vegan: str = "0.0"
+    vegan: bool = False
+    # Derived, per serving
+    calories_per_serving: int = 0
+    protein: float = 0.0
+    carbs: float = 0.0
+    fat: float = 0.0
+    difficulty: str = "Medium"
+    diet_flags: int = BALANCED
+    diet: str = "Balanced"
 
     @staticmethod
     def from_api(data: dict) -> "Recipe":
+        servings = max(1, int(to_float(data.get("servings"), 1)))
+        calories = to_float(data.get("Calories"))
+        protein = to_float(data.get("Protein (g)")) / servings
+        vegan = to_float(data.get("vegan")) >= 0.5
+        flags = diet_flags(vegan, calories / servings, protein)
+        total_time = int(to_float(data.get("total_time")))
         return Recipe(
-            recipe_id=data.get("Recipe_id", ""),
+            recipe_id=str(data.get("Recipe_id", "")),
             title=data.get("Recipe_title", ""),
-            calories=float(data.get("Calories", 0) or 0),
-            cook_time=data.get("cook_time", "0"),
-            prep_time=data.get("prep_time", "0"),
-            total_time=data.get("total_time", "0"),
-            servings=data.get("servings", "4"),
-            region=data.get("Region", ""),
-            continent=data.get("Continent", ""),
+            calories=calories,
+            cook_time=int(to_float(data.get("cook_time"))),
+            prep_time=int(to_float(data.get("prep_time"))),
+            total_time=total_time,
+            servings=servings,
+            region=data.get("Region", "") or "",
+            continent=data.get("Continent", "") or "",
             ingredients=data.get("ingredients", []),
-            processes=data.get("Processes", ""),
-            vegan=data.get("vegan", "0.0"),
-        )
\ No newline at end of file
+            processes=data.get("Processes", "") or "",
+            vegan=vegan,
+            calories_per_serving=int(calories / servings),
+            protein=round(protein, 1),
+            carbs=round(to_float(data.get("Carbohydrate, by difference (g)")) / servings, 1),
+            fat=round(to_float(data.get("Total lipid (fat) (g)")) / servings, 1),
+            difficulty=difficulty_for(total_time),
+            diet_flags=flags,
+            diet=diet_label(flags),
+        )
+
+    def normalized(self) -> dict:
+        """The typed fields routes need, as stored alongside the raw record."""
+        return {
+            "servings": self.servings,
+            "minutes": self.total_time,
+            "calories": self.calories_per_serving,
+            "protein": self.protein,
+            "carbs": self.carbs,
+            "fat": self.fat,
+            "difficulty": self.difficulty,
+            "diet_flags": self.diet_flags,
+            "diet": self.diet,
+        }
+
+
+def normalize_record(data: dict) -> dict:
+    """Raw record plus its normalized block — run once as a record is cached/stored."""
+    return {**data, NORMALIZED: Recipe.from_api(data).normalized()}
+
+
+def normalized(data: dict) -> dict:
+    """A record's normalized block; computed on the fly for records stored before it existed."""
+    block = data.get(NORMALIZED)
+    if block is None:
+        block = Recipe.from_api(data).normalized()
+    return block
+
+
+def time_label(block: dict) -> str:
+    """Total time of a normalized block for display ("? min" when unknown)."""
+    return f"{block['minutes'] or '?'} min"
+
+
+def nutrition(block: dict) -> dict:
+    """The per-serving macros of a normalized block, in the API's response shape."""
+    return {
+        "calories": block["calories"],
+        "protein": block["protein"],
+        "carbs": block["carbs"],
+        "fat": block["fat"],
+    }
@@ -5,7 +5,7 @@ Data model for an ingredient substitution.
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class Substitution:
     original: str
     substitute: str
@@ -21,6 +21,17 @@ class Substitution:
             confidence=85,
         )
 
+    @staticmethod
+    def from_neighbor(ingredient_name: str, substitute: str, category: str,
+                      similarity: float) -> "Substitution":
+        """From a precomputed flavor neighbour; confidence = % of shared flavor molecules (Jaccard)."""
+        return Substitution(
+            original=ingredient_name,
+            substitute=substitute,
+            role=category,
+            confidence=round(similarity * 100),
+        )
+
     def to_dict(self) -> dict:
         return {
             "original": self.original,
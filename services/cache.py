@@ -0,0 +1,171 @@
+"""
+Upstream response cache over a pluggable backend (CACHE_BACKEND). Entries are
+kept CACHE_STALE_TTL past their TTL for get_entry (stale-while-revalidate);
+the *_async methods run blocking backends in a worker thread.
+"""
+
+import asyncio
+import struct
+import threading
+import time
+import msgpack
+from services.cache_backends import MemoryBackend, SQLiteBackend, RedisBackend
+from utils.constants import (
+    CACHE_BACKEND, CACHE_SQLITE_PATH, CACHE_REDIS_URL,
+    CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_STALE_TTL, CACHE_BACKEND_RETRY,
+)
+
+MISS = object()
+
+# Stored entry: marker + fresh-until (wall clock, shared by every process) + msgpack value.
+# Entries written before the header existed are read as fresh.
+_HEADER = struct.Struct("<cd")
+_MARKER = b"S"
+
+
+class ResponseCache:
+    """
+    Serializing front for a CacheBackend. Backend failures are counted and
+    treated as misses so a down cache never fails a request; after a failure
+    the backend is skipped for `retry_after` seconds instead of being retried
+    (and timing out) on every call.
+    """
+
+    def __init__(self, backend, retry_after: float = CACHE_BACKEND_RETRY):
+        self.backend = backend
+        self.retry_after = retry_after
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "stale_hits": 0, "misses": 0, "errors": 0, "skipped": 0, "corrupt": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _available(self) -> bool:
+        if time.monotonic() < self._down_until:
+            self._count("skipped")
+            return False
+        return True
+
+    def _failed(self):
+        self._count("errors")
+        self._down_until = time.monotonic() + self.retry_after
+
+    def get(self, key: str):
+        """Returns the cached value if it is still fresh, or MISS."""
+        return self._fresh(self._read(key))
+
+    def get_entry(self, key: str):
+        """(value, stale) — the value may be past its TTL; (MISS, False) when absent."""
+        return self._entry(self._read(key))
+
+    async def get_async(self, key: str):
+        return self._fresh(await self._read_async(key))
+
+    async def get_entry_async(self, key: str):
+        return self._entry(await self._read_async(key))
+
+    def _fresh(self, entry):
+        value, stale = entry
+        if value is MISS or stale:
+            self._count("misses")
+            return MISS
+        self._count("hits")
+        return value
+
+    def _entry(self, entry):
+        value, stale = entry
+        self._count("misses" if value is MISS else "stale_hits" if stale else "hits")
+        return value, stale
+
+    def _offload(self) -> bool:
+        # Nothing to wait for in-process, or while the backend is skipped anyway
+        return self.backend.blocking and time.monotonic() >= self._down_until
+
+    async def _read_async(self, key: str):
+        if self._offload():
+            return await asyncio.to_thread(self._read, key)
+        return self._read(key)
+
+    def _read(self, key: str):
+        if not self._available():
+            return MISS, False
+        try:
+            raw = self.backend.get(key)
+        except Exception:
+            self._failed()
+            return MISS, False
+        if raw is None:
+            return MISS, False
+        try:
+            if raw[:1] != _MARKER:
+                return msgpack.unpackb(raw, raw=False), False
+            _, fresh_until = _HEADER.unpack_from(raw)
+            return msgpack.unpackb(raw[_HEADER.size:], raw=False), time.time() >= fresh_until
+        except Exception:
+            # A truncated or corrupt entry is a miss, and is dropped so it gets rewritten
+            self._count("corrupt")
+            self._discard(key)
+            return MISS, False
+
+    def _discard(self, key: str):
+        try:
+            self.backend.delete(key)
+        except Exception:
+            self._failed()
+
+    def set(self, key: str, value, ttl: float):
+        self._write(key, self._pack(value, ttl), ttl)
+
+    async def set_async(self, key: str, value, ttl: float):
+        raw = self._pack(value, ttl)
+        if self._offload():
+            await asyncio.to_thread(self._write, key, raw, ttl)
+        else:
+            self._write(key, raw, ttl)
+
+    def _pack(self, value, ttl: float) -> bytes:
+        return _HEADER.pack(_MARKER, time.time() + ttl) + msgpack.packb(value, use_bin_type=True)
+
+    def _write(self, key: str, raw: bytes, ttl: float):
+        if not self._available():
+            return
+        try:
+            self.backend.set(key, raw, ttl + CACHE_STALE_TTL)
+        except Exception:
+            self._failed()
+
+    def clear(self) -> int:
+        """Number of entries flushed; 0 when the backend is down."""
+        if not self._available():
+            return 0
+        try:
+            return self.backend.clear()
+        except Exception:
+            self._failed()
+            return 0
+
+    def counters(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
+
+    def stats(self) -> dict:
+        counters = self.counters()
+        try:
+            backend_stats = self.backend.stats()
+        except Exception:
+            backend_stats = {"unavailable": True}
+        down_for = max(0.0, self._down_until - time.monotonic())
+        return {"backend": self.backend.name, **counters, "down_for_s": round(down_for, 1), **backend_stats}
+
+
+def build_backend(kind: str):
+    if kind == "sqlite":
+        return SQLiteBackend(CACHE_SQLITE_PATH, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
+    if kind == "redis":
+        return RedisBackend(CACHE_REDIS_URL)
+    return MemoryBackend(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
+
+
+response_cache = ResponseCache(build_backend(CACHE_BACKEND))
@@ -0,0 +1,320 @@
+"""
+Byte stores for the response cache: MemoryBackend (per-process LRU),
+SQLiteBackend (shared on one host), RedisBackend (minimal RESP client).
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+
+class CacheBackend:
+    """Interface every backend implements. TTLs are in seconds."""
+
+    name = "base"
+    blocking = True     # does disk / network I/O (run off the event loop)
+
+    def get(self, key: str):
+        """Returns the stored bytes, or None if missing/expired."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self) -> int:
+        """Removes every entry, returns how many were dropped (if known)."""
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryBackend(CacheBackend):
+
+    name = "memory"
+    blocking = False
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._drop(key)
+                self._expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._bytes += len(value)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+    def clear(self) -> int:
+        with self._lock:
+            flushed = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            return flushed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+    def _drop(self, key: str):
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value)
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Shared on-disk cache. WAL mode lets every uvicorn worker on the host read
+    concurrently while one writes. LRU is approximated with an `accessed`
+    column that is refreshed at most once per ACCESS_RESOLUTION seconds.
+    """
+
+    name = "sqlite"
+    ACCESS_RESOLUTION = 60
+    EVICT_EVERY = 100   # sets between size checks
+
+    def __init__(self, path: str, max_entries: int, max_bytes: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._sets = 0
+        self._evictions = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+            " expires_at REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, expires_at, accessed FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at, accessed = row
+        if expires_at <= now:
+            conn.execute("DELETE FROM cache WHERE key = ? AND expires_at <= ?", (key, now))
+            return None
+        if now - accessed > self.ACCESS_RESOLUTION:
+            conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+        return bytes(value)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed) VALUES (?, ?, ?, ?)",
+            (key, value, now + ttl, now),
+        )
+        self._sets += 1
+        if self._sets % self.EVICT_EVERY == 0:
+            self._evict()
+
+    def _evict(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM cache"
+        ).fetchone()
+        while count > self.max_entries or total > self.max_bytes:
+            # Over the entry limit: drop exactly the overflow; over bytes: drop the oldest tenth
+            if count > self.max_entries:
+                batch = count - self.max_entries
+            else:
+                batch = max(1, count // 10)
+            conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                " SELECT key FROM cache ORDER BY accessed LIMIT ?)", (batch,)
+            )
+            self._evictions += batch
+            count, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM cache"
+            ).fetchone()
+
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self) -> int:
+        return self._conn().execute("DELETE FROM cache").rowcount
+
+    def stats(self) -> dict:
+        count, total = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM cache"
+        ).fetchone()
+        return {
+            "path": self.path,
+            "entries": count,
+            "bytes": total,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "evictions": self._evictions,
+        }
+
+
+class RedisError(Exception):
+    pass
+
+
+class _RespConnection:
+    """One socket speaking the Redis serialization protocol (RESP2)."""
+
+    def __init__(self, host: str, port: int, password: str, db: int, timeout: float):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+        if password:
+            self.command("AUTH", password)
+        if db:
+            self.command("SELECT", db)
+
+    def command(self, *args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        self.sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RedisError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(body)
+            if length < 0:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    def close(self):
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RedisBackend(CacheBackend):
+    """
+    Shared cache on any Redis-protocol server (Redis, KeyDB, Dragonfly, ...).
+    Eviction is left to the server's maxmemory-policy (allkeys-lru recommended);
+    keys are namespaced so clear() only drops our own entries.
+    """
+
+    name = "redis"
+    PREFIX = "foodoscope:"
+
+    def __init__(self, url: str, timeout: float = 1.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password or ""
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _command(self, *args):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = _RespConnection(self.host, self.port, self.password, self.db, self.timeout)
+            self._local.conn = conn
+        try:
+            return conn.command(*args)
+        except (OSError, ConnectionError):
+            # Drop the broken socket; the next call reconnects
+            conn.close()
+            self._local.conn = None
+            raise
+
+    def get(self, key: str):
+        return self._command("GET", self.PREFIX + key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self._command("SET", self.PREFIX + key, value, "PX", max(1, int(ttl * 1000)))
+
+    def delete(self, key: str):
+        self._command("DEL", self.PREFIX + key)
+
+    def clear(self) -> int:
+        flushed = 0
+        cursor = "0"
+        while True:
+            cursor, keys = self._command("SCAN", cursor, "MATCH", self.PREFIX + "*", "COUNT", 500)
+            cursor = cursor.decode() if isinstance(cursor, bytes) else str(cursor)
+            if keys:
+                flushed += self._command("DEL", *keys)
+            if cursor == "0":
+                return flushed
+
+    def stats(self) -> dict:
+        return {"url": f"redis://{self.host}:{self.port}/{self.db}"}
@@ -0,0 +1,112 @@
+"""
+Per-upstream circuit breaker. Opens once `failure_rate` of the last `window`
+calls (at least `min_calls`) failed or were slower than `slow_call`; open
+calls fail fast for `open_seconds`, then `probes` half-open calls decide.
+"""
+
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+
+class CircuitBreaker:
+
+    def __init__(self, name: str, failure_rate: float, min_calls: int, window: int,
+                 slow_call: float, open_seconds: float, probes: int = 1):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = max(1, min_calls)
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self.probes = max(1, probes)
+        self._outcomes = deque(maxlen=max(self.min_calls, window))   # True = failure
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = 0
+        self._lock = threading.Lock()
+        self._rejected = 0
+        self._opened = 0
+
+    def acquire(self) -> str:
+        """
+        Admits one call and returns the state it was admitted in (pass it to
+        `record`), or raises CircuitOpenError.
+        """
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self._state = HALF_OPEN
+                self._probing = 0
+            if self._state == CLOSED:
+                return CLOSED
+            if self._state == HALF_OPEN and self._probing < self.probes:
+                self._probing += 1
+                return HALF_OPEN
+            self._rejected += 1
+        raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def release(self, admitted: str):
+        """Gives back a call's slot without an outcome (the call was cancelled)."""
+        if admitted == HALF_OPEN:
+            with self._lock:
+                self._probing = max(0, self._probing - 1)
+
+    def record(self, admitted: str, ok: bool, elapsed: float):
+        """Outcome of a call admitted by `acquire`; slow calls count as failures."""
+        failed = not ok or elapsed >= self.slow_call
+        with self._lock:
+            if admitted == HALF_OPEN:
+                self._probing = max(0, self._probing - 1)
+                if self._state != HALF_OPEN:
+                    return
+                if failed:
+                    self._trip()
+                else:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                return
+
+            # Calls admitted before the breaker opened don't count any more
+            if self._state != CLOSED:
+                return
+            self._outcomes.append(failed)
+            if (len(self._outcomes) >= self.min_calls
+                    and sum(self._outcomes) >= self.failure_rate * len(self._outcomes)):
+                self._trip()
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._opened += 1
+        self._outcomes.clear()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def stats(self) -> dict:
+        state = self.state
+        with self._lock:
+            calls = len(self._outcomes)
+            failures = sum(self._outcomes)
+            return {
+                "state": state,
+                "window_calls": calls,
+                "window_failure_rate": round(failures / calls, 3) if calls else 0.0,
+                "rejected": self._rejected,
+                "opened": self._opened,
+                "open_for_s": (
+                    round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1)
+                    if state == OPEN else 0.0
+                ),
+            }
@@ -1,36 +1,136 @@
-import requests
-from utils.constants import FLAVORDB_API_KEY, FLAVORDB_BASE_URL
+from services import http_client
+from services.cache import response_cache, MISS
+from services.http_client import FLAVORDB
+from services.singleflight import upstream_flights
+from utils.canonical import canonicalize, canonicalizer
+from utils.constants import CACHE_TTL_FLAVOR, CACHE_TTL_NEGATIVE
+from utils.metrics import record_swallowed
 
+ENTITY_ENDPOINT = "/entities/by-readable-name"
 
-def fetch_flavor_entity(name: str):
 
-    # Try full name first, then first word only
-    attempts = [name, name.split()[0]]
+def _entity_key(name: str) -> str:
+    return "flavor:" + canonicalize(name)
+
+
+def _lookup_attempts(name: str):
+    # Canonical name first ("Roma Tomatoes, diced" -> "tomato"); only fall back to
+    # the first word when it is itself a known ingredient
+    canonical = canonicalize(name)
+    if not canonical:
+        return []
+    attempts = [canonical]
+    first = canonical.split()[0]
+    if first != canonical and canonicalizer.is_known(first):
+        attempts.append(first)
+    return attempts
+
+
+def _parse_entity(response):
+    if response.status_code != 200:
+        return None
+
+    data = response.json()
+
+    if data.get("success") and data["data"]:
+        return data["data"][0]
+    return None
 
-    for attempt in attempts:
-        url = f"{FLAVORDB_BASE_URL}/entities/by-readable-name"
 
-        headers = {
-            "Authorization": f"Bearer {FLAVORDB_API_KEY}",
-            "Content-Type": "application/json"
-        }
+def _store(key: str, entity, failed: bool):
+    # "Not in FlavorDB" is cached (briefly) as {}; lookups that errored are not
+    if entity:
+        response_cache.set(key, entity, CACHE_TTL_FLAVOR)
+    elif not failed:
+        response_cache.set(key, {}, CACHE_TTL_NEGATIVE)
 
+
+async def _store_async(key: str, entity, failed: bool):
+    if entity:
+        await response_cache.set_async(key, entity, CACHE_TTL_FLAVOR)
+    elif not failed:
+        await response_cache.set_async(key, {}, CACHE_TTL_NEGATIVE)
+
+
+def _lookup(name: str, key: str):
+    failed = False
+    entity = None
+    for attempt in _lookup_attempts(name):
         params = {"readable_name": attempt}
 
         try:
-            response = requests.get(
-                url, headers=headers, params=params, timeout=10
+            response = http_client.get(
+                FLAVORDB,
+                ENTITY_ENDPOINT,
+                params=params,
+                timeout=10
             )
 
-            if response.status_code != 200:
-                continue
+            entity = _parse_entity(response)
+            if entity:
+                break
 
-            data = response.json()
+        except Exception as e:
+            record_swallowed(FLAVORDB, ENTITY_ENDPOINT, e)
+            failed = True
+            continue
 
-            if data.get("success") and data["data"]:
-                return data["data"][0]
+    _store(key, entity, failed)
+    return entity
+
+
+async def _lookup_async(name: str, key: str):
+    failed = False
+    entity = None
+    for attempt in _lookup_attempts(name):
+        params = {"readable_name": attempt}
 
-        except Exception:
+        try:
+            response = await http_client.get_async(
+                FLAVORDB,
+                ENTITY_ENDPOINT,
+                params=params,
+                timeout=10
+            )
+
+            entity = _parse_entity(response)
+            if entity:
+                break
+
+        except Exception as e:
+            record_swallowed(FLAVORDB, ENTITY_ENDPOINT, e)
+            failed = True
             continue
 
-    return None
\ No newline at end of file
+    await _store_async(key, entity, failed)
+    return entity
+
+
+def fetch_flavor_entity(name: str):
+
+    key = _entity_key(name)
+    cached, stale = response_cache.get_entry(key)
+    if cached is not MISS:
+        # Last known entity now; a fresh lookup replaces it in the background
+        if stale:
+            upstream_flights.refresh(key, lambda: _lookup(name, key))
+        return cached or None
+
+    # Concurrent lookups of the same ingredient share one upstream request
+    return upstream_flights.do(key, lambda: _lookup(name, key))
+
+
+async def fetch_flavor_entity_async(name: str):
+
+    key = _entity_key(name)
+    cached, stale = await response_cache.get_entry_async(key)
+    if cached is not MISS:
+        if stale:
+            upstream_flights.refresh_async(key, lambda: _lookup_async(name, key))
+        return cached or None
+
+    try:
+        return await upstream_flights.do_async(key, lambda: _lookup_async(name, key))
+    except Exception as e:
+        record_swallowed(FLAVORDB, ENTITY_ENDPOINT, e)
+        return None
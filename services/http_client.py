@@ -0,0 +1,324 @@
+#Shared pooled HTTP clients (sync + async) for the RecipeDB and FlavorDB upstreams
+import asyncio
+import threading
+import time
+import weakref
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED
+from services.rate_limiter import TokenBucket
+from utils.metrics import (
+    UPSTREAM_REQUESTS, UPSTREAM_LATENCY, UPSTREAM_TIMEOUTS, current_timing,
+)
+from utils.constants import (
+    RECIPEDB_API_KEY, RECIPEDB_BASE_URL,
+    FLAVORDB_API_KEY, FLAVORDB_BASE_URL,
+    RECIPEDB_RATE_LIMIT, RECIPEDB_RATE_BURST,
+    FLAVORDB_RATE_LIMIT, FLAVORDB_RATE_BURST,
+    UPSTREAM_POOL_SIZE, UPSTREAM_MAX_RETRIES, UPSTREAM_RETRY_BACKOFF,
+    BREAKER_FAILURE_RATE, BREAKER_MIN_CALLS, BREAKER_WINDOW,
+    BREAKER_SLOW_CALL, BREAKER_OPEN_SECONDS,
+)
+
+RECIPEDB = "recipedb"
+FLAVORDB = "flavordb"
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_UPSTREAMS = {
+    RECIPEDB: (RECIPEDB_BASE_URL, RECIPEDB_API_KEY),
+    FLAVORDB: (FLAVORDB_BASE_URL, FLAVORDB_API_KEY),
+}
+
+# One request budget per upstream, shared by the sync and async paths
+_rate_limits = {
+    RECIPEDB: TokenBucket(RECIPEDB_RATE_LIMIT, RECIPEDB_RATE_BURST),
+    FLAVORDB: TokenBucket(FLAVORDB_RATE_LIMIT, FLAVORDB_RATE_BURST),
+}
+
+# Fail fast while an upstream is erroring or too slow
+_breakers = {
+    name: CircuitBreaker(
+        name, BREAKER_FAILURE_RATE, BREAKER_MIN_CALLS, BREAKER_WINDOW,
+        BREAKER_SLOW_CALL, BREAKER_OPEN_SECONDS,
+    )
+    for name in _UPSTREAMS
+}
+
+_sessions = {}
+# httpx clients are bound to the event loop that created them
+_async_clients = weakref.WeakKeyDictionary()
+_in_flight = {name: 0 for name in _UPSTREAMS}
+_lock = threading.Lock()
+
+
+def _get_headers(api_key: str) -> dict:
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+
+
+def _build_session(api_key: str) -> requests.Session:
+    """
+    One keep-alive session per upstream host; blocks instead of opening extra
+    sockets once the pool is full. No transport-level retries: `get` retries
+    itself, so every attempt takes a rate token and is a breaker call.
+    """
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=UPSTREAM_POOL_SIZE,
+        pool_block=True,
+        max_retries=0,
+    )
+    session = requests.Session()
+    session.headers.update(_get_headers(api_key))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session(upstream: str) -> requests.Session:
+    session = _sessions.get(upstream)
+    if session is None:
+        with _lock:
+            session = _sessions.get(upstream)
+            if session is None:
+                session = _build_session(_UPSTREAMS[upstream][1])
+                _sessions[upstream] = session
+    return session
+
+
+def _record_call(upstream: str, endpoint: str, status, elapsed: float):
+    """Metrics for one upstream attempt; status is the HTTP code or an outcome name."""
+    UPSTREAM_REQUESTS.inc(upstream=upstream, endpoint=endpoint, status=status)
+    if status != "circuit_open":
+        UPSTREAM_LATENCY.observe(elapsed, upstream=upstream, endpoint=endpoint)
+    if status == "timeout":
+        UPSTREAM_TIMEOUTS.inc(upstream=upstream, endpoint=endpoint)
+
+
+def _acquire_breaker(upstream: str, endpoint: str) -> str:
+    try:
+        return _breakers[upstream].acquire()
+    except CircuitOpenError:
+        _record_call(upstream, endpoint, "circuit_open", 0.0)
+        raise
+
+
+def get(upstream: str, path: str, params: dict = None, timeout: float = 8,
+        endpoint: str = ""):
+    """
+    GET `path` on the given upstream through its pooled session.
+    Retries 429/5xx and connection errors with exponential backoff (honouring
+    Retry-After). Every attempt takes a rate token and is a breaker call, so
+    retries stop as soon as the breaker opens; raises CircuitOpenError without
+    calling out while it is open.
+    `endpoint` is the metrics label (path template); defaults to `path`.
+    """
+    base_url = _UPSTREAMS[upstream][0]
+    endpoint = endpoint or path
+    session = get_session(upstream)
+    breaker = _breakers[upstream]
+
+    timing = current_timing()
+    if timing:
+        timing.upstream_started()
+    with _lock:
+        _in_flight[upstream] += 1
+    try:
+        for attempt in range(UPSTREAM_MAX_RETRIES + 1):
+            last_try = attempt == UPSTREAM_MAX_RETRIES
+            _rate_limits[upstream].acquire()
+            admitted = _acquire_breaker(upstream, endpoint)
+            started = time.monotonic()
+            status = "interrupted"
+            ok = None
+            response = None
+            try:
+                response = session.get(f"{base_url}{path}", params=params, timeout=timeout)
+                status = response.status_code
+                ok = status < 500
+            except (requests.ConnectionError, requests.Timeout) as e:
+                status = "timeout" if isinstance(e, requests.Timeout) else "error"
+                ok = False
+                if last_try:
+                    raise
+            except Exception:
+                status = "error"
+                ok = False
+                raise
+            finally:
+                elapsed = time.monotonic() - started
+                if ok is None:
+                    breaker.release(admitted)
+                else:
+                    breaker.record(admitted, ok, elapsed)
+                _record_call(upstream, endpoint, status, elapsed)
+
+            if response is None:
+                time.sleep(_retry_delay(attempt))
+                continue
+            if response.status_code not in RETRY_STATUSES or last_try:
+                return response
+            response.close()
+            time.sleep(_retry_delay(attempt, response))
+    finally:
+        if timing:
+            timing.upstream_finished()
+        with _lock:
+            _in_flight[upstream] -= 1
+
+
+def _get_async_client(upstream: str) -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    client = clients.get(upstream)
+    if client is None:
+        client = httpx.AsyncClient(
+            headers=_get_headers(_UPSTREAMS[upstream][1]),
+            limits=httpx.Limits(
+                max_connections=UPSTREAM_POOL_SIZE,
+                max_keepalive_connections=UPSTREAM_POOL_SIZE,
+            ),
+        )
+        clients[upstream] = client
+    return client
+
+
+def _retry_delay(attempt: int, response=None) -> float:
+    """Retry-After when the response has one, else exponential backoff."""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return float(retry_after)
+    return UPSTREAM_RETRY_BACKOFF * (2 ** attempt)
+
+
+async def get_async(upstream: str, path: str, params: dict = None, timeout: float = 8,
+                    endpoint: str = ""):
+    """
+    Async GET with the same pooling, retry and circuit-breaker policy as `get`.
+    Every attempt is a breaker call, so retries stop as soon as it opens.
+    """
+    base_url = _UPSTREAMS[upstream][0]
+    endpoint = endpoint or path
+    client = _get_async_client(upstream)
+    breaker = _breakers[upstream]
+
+    timing = current_timing()
+    if timing:
+        timing.upstream_started()
+    with _lock:
+        _in_flight[upstream] += 1
+    try:
+        for attempt in range(UPSTREAM_MAX_RETRIES + 1):
+            last_try = attempt == UPSTREAM_MAX_RETRIES
+            await _rate_limits[upstream].acquire_async()
+            # Admitted right before the request, so no wait can strand a half-open probe
+            admitted = _acquire_breaker(upstream, endpoint)
+            started = time.monotonic()
+            status = "cancelled"
+            ok = None
+            response = None
+            try:
+                response = await client.get(
+                    f"{base_url}{path}", params=params, timeout=timeout
+                )
+                status = response.status_code
+                ok = status < 500
+            except httpx.TransportError as e:
+                status = "timeout" if isinstance(e, httpx.TimeoutException) else "error"
+                ok = False
+                if last_try:
+                    raise
+            except Exception:
+                status = "error"
+                raise
+            finally:
+                elapsed = time.monotonic() - started
+                if ok is None:
+                    # Cancelled by the caller's deadline (or an unexpected error):
+                    # no outcome, but a half-open probe slot is given back
+                    breaker.release(admitted)
+                else:
+                    breaker.record(admitted, ok, elapsed)
+                _record_call(upstream, endpoint, status, elapsed)
+
+            if response is None:
+                await asyncio.sleep(_retry_delay(attempt))
+                continue
+            if response.status_code not in RETRY_STATUSES or last_try:
+                return response
+            await asyncio.sleep(_retry_delay(attempt, response))
+    finally:
+        if timing:
+            timing.upstream_finished()
+        with _lock:
+            _in_flight[upstream] -= 1
+
+
+async def close_async_clients():
+    """Closes the async clients of the running loop (called on app shutdown)."""
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+
+
+def _idle_connections(session: requests.Session) -> int:
+    idle = 0
+    for adapter in session.adapters.values():
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None or pool.pool is None:
+                continue
+            # urllib3 pre-fills its queue with None placeholders
+            idle += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+    return idle
+
+
+def pool_stats() -> dict:
+    """
+    Returns per-upstream pool usage for monitoring.
+    open = idle + checked-out connections, waiting = callers blocked on a full pool.
+    In-flight counts cover both the sync session and the async client.
+    """
+    stats = {}
+    for upstream in _UPSTREAMS:
+        with _lock:
+            in_flight = _in_flight[upstream]
+        session = _sessions.get(upstream)
+        idle = _idle_connections(session) if session else 0
+        active = min(in_flight, UPSTREAM_POOL_SIZE)
+        stats[upstream] = {
+            "pool_size": UPSTREAM_POOL_SIZE,
+            "open": idle + active,
+            "idle": idle,
+            "active": active,
+            "waiting": max(0, in_flight - UPSTREAM_POOL_SIZE),
+        }
+    return stats
+
+
+def rate_limit_stats() -> dict:
+    """Per-upstream token-bucket usage: how often and how long calls were throttled."""
+    return {upstream: bucket.stats() for upstream, bucket in _rate_limits.items()}
+
+
+def spare_capacity(upstream: str, reserve: float) -> bool:
+    """
+    True when `upstream` could take a background call now: its breaker is
+    closed and its rate bucket holds more than `reserve` tokens, so the call
+    does not delay user requests.
+    """
+    return (
+        _breakers[upstream].state == CLOSED
+        and _rate_limits[upstream].available() > reserve
+    )
+
+
+def breaker_stats() -> dict:
+    """Per-upstream circuit state: closed / open / half_open, recent failure rate, rejections."""
+    return {upstream: breaker.stats() for upstream, breaker in _breakers.items()}
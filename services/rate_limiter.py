@@ -0,0 +1,76 @@
+"""
+Per-upstream token buckets.
+
+Each bucket refills at `rate` tokens/second up to `burst`. A call takes one
+token; when the bucket is empty the caller waits exactly until its token
+is due, so calls are only delayed under real pressure. Reservations are
+made under a lock, so threads and async tasks share the same budget.
+"""
+
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._acquired = 0
+        self._throttled = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def reserve(self) -> float:
+        """Takes a token and returns how long the caller must wait for it (seconds)."""
+        with self._lock:
+            self._acquired += 1
+            if self.rate <= 0:
+                return 0.0
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Tokens may go negative: later callers queue behind earlier reservations
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            wait = -self._tokens / self.rate
+            self._throttled += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            return wait
+
+    def available(self) -> float:
+        """Tokens left right now (negative while callers are queued); takes none."""
+        with self._lock:
+            if self.rate <= 0:
+                return float(self.burst)
+            elapsed = time.monotonic() - self._updated
+            return min(self.burst, self._tokens + elapsed * self.rate)
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "acquired": self._acquired,
+                "throttled": self._throttled,
+                "wait_total_ms": round(self._wait_total * 1000, 2),
+                "wait_max_ms": round(self._wait_max * 1000, 2),
+                "wait_avg_ms": round(self._wait_total * 1000 / self._throttled, 2)
+                if self._throttled else 0.0,
+            }
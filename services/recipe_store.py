@@ -0,0 +1,338 @@
+"""
+Offline recipe store: a local SQLite copy of RecipeDB keyed by Recipe_id.
+Lookups return the same dict shape as the live API.
+
+    python -m services.recipe_store import recipes.csv [--ingredients ingredients.csv]
+    python -m services.recipe_store stats
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import threading
+import msgpack
+from models.recipe_model import Recipe, NORMALIZED
+from utils.constants import RECIPE_STORE_PATH
+from utils.canonical import canonicalize
+from utils.helpers import normalize
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipes (
+    recipe_id   TEXT PRIMARY KEY,
+    title       TEXT NOT NULL,
+    region      TEXT,
+    continent   TEXT,
+    calories    REAL,
+    cook_time   TEXT,
+    prep_time   TEXT,
+    total_time  TEXT,
+    servings    TEXT,
+    processes   TEXT,
+    vegan       TEXT,
+    record      BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS title_tokens (
+    token     TEXT NOT NULL,
+    recipe_id TEXT NOT NULL,
+    PRIMARY KEY (token, recipe_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS recipe_ingredients (
+    recipe_id  TEXT NOT NULL,
+    position   INTEGER NOT NULL,
+    ingredient TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    PRIMARY KEY (recipe_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS recipes_region ON recipes (region);
+CREATE INDEX IF NOT EXISTS recipes_continent ON recipes (continent);
+CREATE INDEX IF NOT EXISTS ingredients_normalized ON recipe_ingredients (normalized);
+"""
+
+# Keys a dump may use for the ingredient list / instruction steps
+_INGREDIENT_KEYS = ("ingredients", "Ingredients", "ingredient_list", "Ingredient_list")
+_STEP_KEYS = ("steps", "instructions", "Instructions")
+
+
+def title_tokens(title: str) -> list:
+    return _TOKEN_RE.findall(normalize(title))
+
+
+def _as_list(value) -> list:
+    """Ingredient/step fields arrive as lists, JSON strings or '|'-joined strings."""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [
+            (v.get("ingredient", "") if isinstance(v, dict) else str(v)).strip()
+            for v in value
+            if v
+        ]
+    text = str(value).strip()
+    if text.startswith("["):
+        try:
+            return _as_list(json.loads(text))
+        except ValueError:
+            pass
+    sep = "||" if "||" in text else "|"
+    return [part.strip() for part in text.split(sep) if part.strip()]
+
+
+class RecipeStore:
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---- import -------------------------------------------------------
+
+    def add_recipes(self, records, extra_ingredients: dict = None) -> int:
+        """
+        Upserts raw RecipeDB records in one transaction.
+        `extra_ingredients` maps Recipe_id -> ingredient names from a separate dump.
+        """
+        extra_ingredients = extra_ingredients or {}
+        conn = self._conn()
+        count = 0
+        with conn:
+            for record in records:
+                # Unwrap search-recipe/{id} shaped entries
+                if "recipe" in record and isinstance(record["recipe"], dict):
+                    record = {**record["recipe"], "ingredients": record.get("ingredients", [])}
+
+                recipe_id = str(record.get("Recipe_id", "")).strip()
+                if not recipe_id:
+                    continue
+
+                ingredients = next(
+                    (_as_list(record[k]) for k in _INGREDIENT_KEYS if record.get(k)), []
+                ) or extra_ingredients.get(recipe_id, [])
+                steps = next((_as_list(record[k]) for k in _STEP_KEYS if record.get(k)), [])
+
+                stored = {
+                    k: v for k, v in record.items()
+                    if k not in _INGREDIENT_KEYS and k not in _STEP_KEYS
+                }
+                stored["Recipe_id"] = recipe_id
+                stored["ingredients"] = ingredients
+                if steps:
+                    stored["steps"] = steps
+
+                recipe = Recipe.from_api(stored)
+                stored[NORMALIZED] = recipe.normalized()
+                self._write(conn, recipe, stored)
+                count += 1
+        return count
+
+    def _write(self, conn, recipe: Recipe, stored: dict):
+        rid = recipe.recipe_id
+        conn.execute(
+            "INSERT OR REPLACE INTO recipes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                rid, recipe.title, recipe.region, recipe.continent, recipe.calories,
+                str(recipe.cook_time), str(recipe.prep_time), str(recipe.total_time),
+                str(recipe.servings), recipe.processes, str(float(recipe.vegan)),
+                msgpack.packb(stored, use_bin_type=True, default=str),
+            ),
+        )
+        conn.execute("DELETE FROM title_tokens WHERE recipe_id = ?", (rid,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO title_tokens VALUES (?, ?)",
+            [(token, rid) for token in set(title_tokens(recipe.title))],
+        )
+        conn.execute("DELETE FROM recipe_ingredients WHERE recipe_id = ?", (rid,))
+        conn.executemany(
+            "INSERT INTO recipe_ingredients VALUES (?, ?, ?, ?)",
+            [(rid, i, ing, canonicalize(ing)) for i, ing in enumerate(recipe.ingredients)],
+        )
+
+    def import_file(self, path: str, ingredients_path: str = None) -> int:
+        extra = _load_ingredient_dump(ingredients_path) if ingredients_path else None
+        return self.add_recipes(read_records(path), extra)
+
+    # ---- lookups ------------------------------------------------------
+
+    def _records(self, rows) -> list:
+        return [msgpack.unpackb(row[0], raw=False) for row in rows]
+
+    def get(self, recipe_id) -> dict:
+        row = self._conn().execute(
+            "SELECT record FROM recipes WHERE recipe_id = ?", (str(recipe_id),)
+        ).fetchone()
+        return self._records([row])[0] if row else None
+
+    def search_by_title(self, title: str, limit: int = 5) -> list:
+        """
+        Recipes whose title contains every query token; the last token
+        matches as a prefix so partial words still hit.
+        """
+        tokens = title_tokens(title)
+        if not tokens:
+            return []
+        *whole, last = tokens
+        clauses = ["SELECT recipe_id FROM title_tokens WHERE token >= ? AND token < ?"]
+        params = [last, last + "\uffff"]
+        for token in whole:
+            clauses.append("SELECT recipe_id FROM title_tokens WHERE token = ?")
+            params.append(token)
+        rows = self._conn().execute(
+            "SELECT record FROM recipes WHERE recipe_id IN ("
+            + " INTERSECT ".join(clauses)
+            + ") ORDER BY length(title), title LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+        return self._records(rows)
+
+    def find_by_region(self, region: str, limit: int = 20) -> list:
+        rows = self._conn().execute(
+            "SELECT record FROM recipes WHERE region = ? LIMIT ?", (region, limit)
+        ).fetchall()
+        return self._records(rows)
+
+    def find_by_continent(self, continent: str, limit: int = 20) -> list:
+        rows = self._conn().execute(
+            "SELECT record FROM recipes WHERE continent = ? LIMIT ?", (continent, limit)
+        ).fetchall()
+        return self._records(rows)
+
+    def ingredients_for(self, recipe_id) -> list:
+        rows = self._conn().execute(
+            "SELECT ingredient FROM recipe_ingredients WHERE recipe_id = ? ORDER BY position",
+            (str(recipe_id),),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def recipes_with_ingredient(self, ingredient: str, limit: int = 50) -> list:
+        rows = self._conn().execute(
+            "SELECT DISTINCT recipe_id FROM recipe_ingredients WHERE normalized = ? LIMIT ?",
+            (canonicalize(ingredient), limit),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def iter_recipes(self, batch_size: int = 1000):
+        """Yields every stored record (used to build in-memory indexes)."""
+        cursor = self._conn().execute("SELECT record FROM recipes ORDER BY recipe_id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from self._records(rows)
+
+    def titles_since(self, rowid: int = 0) -> list:
+        """(rowid, recipe_id, title) of rows written after `rowid` (re-imported recipes get a new rowid)."""
+        return self._conn().execute(
+            "SELECT rowid, recipe_id, title FROM recipes WHERE rowid > ? ORDER BY rowid", (rowid,)
+        ).fetchall()
+
+    def ingredient_counts(self, recipe_ids=None) -> dict:
+        """Canonical ingredient -> number of recipes using it (of `recipe_ids`, or all)."""
+        if recipe_ids is None:
+            rows = self._conn().execute(
+                "SELECT normalized, COUNT(DISTINCT recipe_id) FROM recipe_ingredients GROUP BY normalized"
+            ).fetchall()
+            return dict(rows)
+        counts = {}
+        ids = list(recipe_ids)
+        # Chunked to stay under SQLite's bound-parameter limit
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            rows = self._conn().execute(
+                "SELECT normalized, COUNT(DISTINCT recipe_id) FROM recipe_ingredients "
+                f"WHERE recipe_id IN ({','.join('?' * len(chunk))}) GROUP BY normalized",
+                chunk,
+            ).fetchall()
+            for name, count in rows:
+                counts[name] = counts.get(name, 0) + count
+        return counts
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        return {
+            "path": self.path,
+            "recipes": conn.execute("SELECT COUNT(*) FROM recipes").fetchone()[0],
+            "ingredients": conn.execute(
+                "SELECT COUNT(DISTINCT normalized) FROM recipe_ingredients"
+            ).fetchone()[0],
+        }
+
+
+def read_records(path: str):
+    """Yields raw recipe dicts from a .csv, .json or .jsonl dump."""
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+        return
+
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        data = json.load(f)
+
+    if isinstance(data, dict):
+        data = data.get("data") or data.get("recipes") or [data]
+    yield from data
+
+
+def _load_ingredient_dump(path: str) -> dict:
+    """Recipe_id -> ingredient names, from a dump with one ingredient per row."""
+    mapping = {}
+    for row in read_records(path):
+        recipe_id = str(row.get("Recipe_id", "")).strip()
+        name = (row.get("ingredient") or row.get("Ingredient") or "").strip()
+        if recipe_id and name:
+            mapping.setdefault(recipe_id, []).append(name)
+    return mapping
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> RecipeStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = RecipeStore(RECIPE_STORE_PATH)
+    return _store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the offline RecipeDB store.")
+    parser.add_argument("--db", default=RECIPE_STORE_PATH, help="store path")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="bulk import a CSV/JSON/JSONL dump")
+    imp.add_argument("path")
+    imp.add_argument("--ingredients", help="separate Recipe_id,ingredient dump")
+    sub.add_parser("stats", help="print store size")
+    args = parser.parse_args(argv)
+
+    store = RecipeStore(args.db)
+    if args.command == "import":
+        count = store.import_file(args.path, args.ingredients)
+        print(f"Imported {count} recipes into {args.db}")
+    print(json.dumps(store.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,255 @@
 #RecipeDB API integration
-import requests
-import time
-from utils.constants import RECIPEDB_API_KEY, RECIPEDB_BASE_URL
+import asyncio
+from models.recipe_model import normalize_record
+from services import http_client
+from services.cache import response_cache, MISS
+from services.http_client import RECIPEDB
+from services.recipe_store import get_store
+from services.singleflight import upstream_flights
+from utils.constants import (
+    RECIPEDB_MODE,
+    CACHE_TTL_TITLE, CACHE_TTL_RECIPE, CACHE_TTL_INSTRUCTIONS, CACHE_TTL_NEGATIVE,
+)
+from utils.helpers import normalize
+from utils.metrics import record_swallowed
 
 
-def _get_headers():
+# Cache keys — titles are normalized so "Pasta " and "pasta" share an entry
+
+def _title_key(title: str) -> str:
+    return "title:" + " ".join(normalize(title).split())
+
+
+def _recipe_key(recipe_id) -> str:
+    return f"recipe:{recipe_id}"
+
+
+def _steps_key(recipe_id) -> str:
+    return f"steps:{recipe_id}"
+
+
+# Metrics label per cache-key group: the upstream path template
+_ENDPOINTS = {
+    "title": "/recipe-bytitle/recipeByTitle",
+    "recipe": "/search-recipe/{id}",
+    "steps": "/instructions/{id}",
+}
+
+
+def _endpoint(key: str) -> str:
+    return _ENDPOINTS[key.split(":", 1)[0]]
+
+
+# Called with the recipe records of every title search / full recipe as it is
+# cached (the typeahead index in logic/suggest.py subscribes)
+_record_listeners = []
+
+
+def on_recipes_cached(listener):
+    _record_listeners.append(listener)
+
+
+def _notify(key: str, value):
+    group = key.split(":", 1)[0]
+    if group == "title":
+        records = value
+    elif group == "recipe":
+        records = [{**value["recipe"], "ingredients": value["ingredients"]}]
+    else:
+        return
+    for listener in _record_listeners:
+        try:
+            listener(records)
+        except Exception:
+            pass
+
+
+def _store(key: str, value, ttl: int):
+    """Caches a parsed response. None means upstream error and is never cached;
+    empty results are cached for the shorter negative TTL."""
+    if value is None:
+        return
+    response_cache.set(key, value, ttl if value else CACHE_TTL_NEGATIVE)
+    if value and _record_listeners:
+        _notify(key, value)
+
+
+async def _store_async(key: str, value, ttl: int):
+    if value is None:
+        return
+    await response_cache.set_async(key, value, ttl if value else CACHE_TTL_NEGATIVE)
+    if value and _record_listeners:
+        _notify(key, value)
+
+
+# Response parsing — shared by the sync and async variants.
+# Each returns None when the upstream failed (not cacheable).
+
+def _parse_recipes(r):
+    if r.status_code != 200:
+        return None
+    data = r.json()
+    if not data.get("success"):
+        return None
+    return [normalize_record(r) for r in data.get("data") or []]
+
+
+def _parse_full_recipe(r2):
+    if r2.status_code == 404:
+        return {}
+    if r2.status_code != 200:
+        return None
+
+    full_data = r2.json()
+    ingredients_raw = full_data.get("ingredients", [])
+
     return {
-        "Authorization": f"Bearer {RECIPEDB_API_KEY}",
-        "Content-Type": "application/json"
+        "recipe": full_data.get("recipe", {}),
+        "ingredients": [
+            ing["ingredient"]
+            for ing in ingredients_raw
+            if ing.get("ingredient")
+        ],
     }
 
 
+def _merge_full_recipe(recipe_basic: dict, full: dict):
+    if not full:
+        return [recipe_basic]
+
+    # The full record may carry fields the title search lacked — re-normalize
+    merged = normalize_record({
+        **recipe_basic,
+        **full["recipe"],
+        "ingredients": full["ingredients"]
+    })
+
+    return [merged]
+
+
+def _parse_steps(r):
+    if r.status_code == 404:
+        return []
+    if r.status_code != 200:
+        return None
+    data = r.json()
+    return data.get("steps", [])
+
+
+# Offline store (RECIPEDB_MODE=local / local-then-remote).
+# These return None when the lookup should go to the live API instead.
+
+def _local_recipes(title: str, limit: int):
+    if RECIPEDB_MODE == "remote":
+        return None
+    recipes = get_store().search_by_title(title, limit)
+    if recipes or RECIPEDB_MODE == "local":
+        return recipes
+    return None
+
+
+def _local_recipe(recipe_id):
+    if RECIPEDB_MODE == "remote":
+        return None
+    recipe = get_store().get(recipe_id)
+    if recipe or RECIPEDB_MODE == "local":
+        return recipe or {}
+    return None
+
+
+def _local_steps(recipe_id):
+    if RECIPEDB_MODE == "remote":
+        return None
+    recipe = get_store().get(recipe_id) or {}
+    steps = recipe.get("steps", [])
+    if steps or RECIPEDB_MODE == "local":
+        return steps
+    return None
+
+
+def _loader(key: str, ttl: int, parse, path: str, params: dict = None):
+    def load():
+        value = parse(http_client.get(
+            RECIPEDB, path, params=params, timeout=8, endpoint=_endpoint(key)
+        ))
+        _store(key, value, ttl)
+        return value
+    return load
+
+
+def _async_loader(key: str, ttl: int, parse, path: str, params: dict = None):
+    async def load():
+        value = parse(await http_client.get_async(
+            RECIPEDB, path, params=params, timeout=8, endpoint=_endpoint(key)
+        ))
+        await _store_async(key, value, ttl)
+        return value
+    return load
+
+
+def _cached(key: str, ttl: int, parse, path: str, params: dict = None):
+    """
+    Cached upstream response for `key`. Only a miss waits on upstream (one
+    request per key across concurrent callers). A stale entry is returned
+    at once and refreshed in the background, so a slow or failing upstream
+    (open breaker) never blocks a request that has last-known-good data.
+    Pacing against the upstream quota is left to http_client's rate limiter.
+    """
+    value, stale = response_cache.get_entry(key)
+    if value is MISS:
+        return upstream_flights.do(key, _loader(key, ttl, parse, path, params))
+    if stale:
+        upstream_flights.refresh(key, _loader(key, ttl, parse, path, params))
+    return value
+
+
+async def _cached_async(key: str, ttl: int, parse, path: str, params: dict = None):
+    value, stale = await response_cache.get_entry_async(key)
+    if value is MISS:
+        return await upstream_flights.do_async(key, _async_loader(key, ttl, parse, path, params))
+    if stale:
+        upstream_flights.refresh_async(key, _async_loader(key, ttl, parse, path, params))
+    return value
+
+
 def fetch_recipes_by_title(title: str, limit: int = 5):
     """Returns basic info for multiple recipes — used for search listing."""
+    local = _local_recipes(title, limit)
+    if local is not None:
+        return local
+
+    key = _title_key(title)
     try:
-        r = requests.get(
-            f"{RECIPEDB_BASE_URL}/recipe-bytitle/recipeByTitle",
-            headers=_get_headers(),
-            params={"title": title},
-            timeout=8
+        recipes = _cached(
+            key, CACHE_TTL_TITLE, _parse_recipes,
+            "/recipe-bytitle/recipeByTitle", params={"title": title}
         )
-        if r.status_code != 200:
-            return []
-        data = r.json()
-        if not data.get("success") or not data.get("data"):
-            return []
-        return data["data"][:limit]
-    except Exception:
+    except Exception as e:
+        record_swallowed(RECIPEDB, _endpoint(key), e)
         return []
+    return (recipes or [])[:limit]
+
+
+def _fetch_full_recipe(recipe_id):
+    key = _recipe_key(recipe_id)
+    try:
+        full = _cached(
+            key, CACHE_TTL_RECIPE, _parse_full_recipe,
+            f"/search-recipe/{recipe_id}"
+        )
+    except Exception as e:
+        record_swallowed(RECIPEDB, _endpoint(key), e)
+        return None
+    return full
 
 
 def fetch_recipe_by_title(title: str):
     """Returns one recipe with full ingredients — used for detail view."""
+    # Offline store records already carry their ingredient list
+    local = _local_recipes(title, 1)
+    if local is not None:
+        return local
+
     try:
         recipes = fetch_recipes_by_title(title, limit=1)
         if not recipes:
@@ -43,50 +261,142 @@ def fetch_recipe_by_title(title: str):
         if not recipe_id:
             return [recipe_basic]
 
-        time.sleep(0.5)
+        return _merge_full_recipe(recipe_basic, _fetch_full_recipe(recipe_id))
+
+    except Exception as e:
+        record_swallowed(RECIPEDB, "fetch_recipe_by_title", e)
+        return []
+
 
-        r2 = requests.get(
-            f"{RECIPEDB_BASE_URL}/search-recipe/{recipe_id}",
-            headers=_get_headers(),
-            timeout=8
+def _as_recipe(full):
+    if not full:
+        return {}
+    return normalize_record({**full["recipe"], "ingredients": full["ingredients"]})
+
+
+def fetch_recipe_by_id(recipe_id):
+    """Returns one recipe with full ingredients by Recipe_id ({} if unknown)."""
+    local = _local_recipe(recipe_id)
+    if local is not None:
+        return local
+    return _as_recipe(_fetch_full_recipe(recipe_id))
+
+
+def fetch_recipe_instructions(recipe_id: str):
+    """Returns step-by-step instructions for a recipe using its ID."""
+    local = _local_steps(recipe_id)
+    if local is not None:
+        return local
+
+    key = _steps_key(recipe_id)
+    try:
+        steps = _cached(
+            key, CACHE_TTL_INSTRUCTIONS, _parse_steps,
+            f"/instructions/{recipe_id}"
         )
+    except Exception as e:
+        record_swallowed(RECIPEDB, _endpoint(key), e)
+        return []
+    return steps or []
 
-        if r2.status_code != 200:
-            return [recipe_basic]
 
-        full_data = r2.json()
-        recipe_full = full_data.get("recipe", {})
-        ingredients_raw = full_data.get("ingredients", [])
+# Async variants — used by the FastAPI routes so upstream waits don't hold a worker thread.
+# The sync functions above stay for app.py (Streamlit).
 
-        ingredient_names = [
-            ing["ingredient"]
-            for ing in ingredients_raw
-            if ing.get("ingredient")
-        ]
+async def _local_async(lookup, *args):
+    """A _local_* lookup run in a worker thread, so SQLite never blocks the event loop."""
+    if RECIPEDB_MODE == "remote":
+        return None
+    return await asyncio.to_thread(lookup, *args)
 
-        merged = {
-            **recipe_basic,
-            **recipe_full,
-            "ingredients": ingredient_names
-        }
 
-        return [merged]
+async def fetch_recipes_by_title_async(title: str, limit: int = 5):
+    local = await _local_async(_local_recipes, title, limit)
+    if local is not None:
+        return local
 
-    except Exception:
+    key = _title_key(title)
+    try:
+        recipes = await _cached_async(
+            key, CACHE_TTL_TITLE, _parse_recipes,
+            "/recipe-bytitle/recipeByTitle", params={"title": title}
+        )
+    except Exception as e:
+        record_swallowed(RECIPEDB, _endpoint(key), e)
         return []
+    return (recipes or [])[:limit]
 
 
-def fetch_recipe_instructions(recipe_id: str):
-    """Returns step-by-step instructions for a recipe using its ID."""
+async def _fetch_full_recipe_async(recipe_id):
+    key = _recipe_key(recipe_id)
     try:
-        r = requests.get(
-            f"{RECIPEDB_BASE_URL}/instructions/{recipe_id}",
-            headers=_get_headers(),
-            timeout=8
+        full = await _cached_async(
+            key, CACHE_TTL_RECIPE, _parse_full_recipe,
+            f"/search-recipe/{recipe_id}"
         )
-        if r.status_code != 200:
+    except Exception as e:
+        record_swallowed(RECIPEDB, _endpoint(key), e)
+        return None
+    return full
+
+
+async def fetch_recipe_by_title_async(title: str):
+    local = await _local_async(_local_recipes, title, 1)
+    if local is not None:
+        return local
+
+    try:
+        recipes = await fetch_recipes_by_title_async(title, limit=1)
+        if not recipes:
             return []
-        data = r.json()
-        return data.get("steps", [])
-    except Exception:
+        return await _with_full_recipe_async(recipes[0])
+
+    except Exception as e:
+        record_swallowed(RECIPEDB, "fetch_recipe_by_title", e)
+        return []
+
+
+async def _with_full_recipe_async(recipe_basic: dict):
+    recipe_id = recipe_basic.get("Recipe_id")
+    if not recipe_id:
+        return [recipe_basic]
+    return _merge_full_recipe(recipe_basic, await _fetch_full_recipe_async(recipe_id))
+
+
+async def fetch_full_recipe_async(recipe_basic: dict) -> dict:
+    """
+    A title-search record completed with its ingredient list, without
+    repeating the title search (prefetch of search results). Store records
+    already carry their ingredients.
+    """
+    if recipe_basic.get("ingredients"):
+        return recipe_basic
+    try:
+        return (await _with_full_recipe_async(recipe_basic))[0]
+    except Exception as e:
+        record_swallowed(RECIPEDB, _ENDPOINTS["recipe"], e)
+        return recipe_basic
+
+
+async def fetch_recipe_by_id_async(recipe_id):
+    local = await _local_async(_local_recipe, recipe_id)
+    if local is not None:
+        return local
+    return _as_recipe(await _fetch_full_recipe_async(recipe_id))
+
+
+async def fetch_recipe_instructions_async(recipe_id: str):
+    local = await _local_async(_local_steps, recipe_id)
+    if local is not None:
+        return local
+
+    key = _steps_key(recipe_id)
+    try:
+        steps = await _cached_async(
+            key, CACHE_TTL_INSTRUCTIONS, _parse_steps,
+            f"/instructions/{recipe_id}"
+        )
+    except Exception as e:
+        record_swallowed(RECIPEDB, _endpoint(key), e)
         return []
+    return steps or []
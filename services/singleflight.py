@@ -0,0 +1,140 @@
+"""
+Request coalescing: identical in-flight lookups share one upstream call.
+refresh / refresh_async start a background refresh once per key.
+"""
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads shared by all background refreshes of the sync path
+REFRESH_WORKERS = 4
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+
+    def __init__(self):
+        self._calls = {}    # key -> _Call (threads)
+        self._futures = {}  # key -> asyncio.Future (event loop)
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._tasks = set()  # background refreshes, referenced until done
+        self._queued = set()  # keys waiting for / running on a refresh thread
+        self._executor = None
+
+    def _record(self, key: str, collapsed: bool):
+        group = key.split(":", 1)[0]
+        with self._lock:
+            s = self._stats.setdefault(group, {"leaders": 0, "collapsed": 0})
+            s["collapsed" if collapsed else "leaders"] += 1
+
+    def do(self, key: str, fn):
+        """Runs fn() once per key across concurrent threads; followers get the same result."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            self._record(key, collapsed=True)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        self._record(key, collapsed=False)
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key: str, fn):
+        """Async counterpart of do(); fn is a zero-arg coroutine function."""
+        future = self._futures.get(key)
+        if future is not None:
+            self._record(key, collapsed=True)
+            # shield: a cancelled follower must not cancel the shared lookup
+            return await asyncio.shield(future)
+
+        self._record(key, collapsed=False)
+        future = asyncio.get_running_loop().create_future()
+        self._futures[key] = future
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                # The leader ran out of time — followers see a plain timeout
+                e = TimeoutError(f"in-flight lookup for {key} was cancelled")
+            future.set_exception(e)
+            # Followers re-raise it; don't warn if nobody was waiting
+            future.exception()
+            raise
+        finally:
+            del self._futures[key]
+
+    def refresh(self, key: str, fn):
+        """
+        Runs do(key, fn) on one of REFRESH_WORKERS shared threads; errors are
+        dropped (the caller kept its stale value).
+        """
+        with self._lock:
+            if key in self._calls or key in self._queued:
+                return
+            self._queued.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(REFRESH_WORKERS, thread_name_prefix="refresh")
+
+        def run():
+            try:
+                self.do(key, fn)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._queued.discard(key)
+
+        self._executor.submit(run)
+
+    def refresh_async(self, key: str, fn):
+        """Schedules do_async(key, fn) on the running loop without awaiting it."""
+        if key in self._futures:
+            return
+        # Fresh context: the refresh is not part of the request that triggered it
+        task = asyncio.get_running_loop().create_task(
+            self.do_async(key, fn), context=contextvars.Context()
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._refreshed)
+
+    def _refreshed(self, task):
+        self._tasks.discard(task)
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        """Per key group (title, recipe, steps, flavor): upstream calls made vs collapsed."""
+        with self._lock:
+            return {group: dict(s) for group, s in self._stats.items()}
+
+
+upstream_flights = SingleFlight()
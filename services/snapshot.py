@@ -0,0 +1,304 @@
+"""
+Versioned, mmapped binary snapshot of the offline corpus, ingredient index
+and fuzzy-match vocabulary: header (magic, version, JSON TOC) then 64-byte
+aligned sections. load_index ignores a snapshot whose store has been written
+since it was built.
+
+    python -m services.snapshot build [--db data/recipes.sqlite3] [--out data/recipes.snap]
+    python -m services.snapshot verify [path]
+"""
+
+import argparse
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+import numpy as np
+from models.corpus import (
+    RecipeCorpus, PackedStrings, ARRAY_COLUMNS, STRING_COLUMNS, TABLE_COLUMNS,
+)
+from utils.canonical import canonicalizer, FrozenVocabulary
+from utils.constants import RECIPE_STORE_PATH, RECIPE_SNAPSHOT_PATH
+
+MAGIC = b"FOODSNAP"
+FORMAT_VERSION = 2
+ALIGN = 64
+_HEADER = struct.Struct("<8sII")
+
+# Index arrays stored next to the corpus columns
+INDEX_ARRAYS = ("indptr", "postings", "recipe_indptr", "recipe_ingredients")
+
+log = logging.getLogger(__name__)
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _packed(value) -> PackedStrings:
+    """StringTables are written in the same packed form as string columns."""
+    return value if isinstance(value, PackedStrings) else PackedStrings(value.values)
+
+
+def _sections(index) -> dict:
+    """name -> contiguous NumPy array, for everything a snapshot holds."""
+    corpus = index.recipes
+    sections = {}
+    for name in ARRAY_COLUMNS:
+        sections[f"corpus.{name}"] = getattr(corpus, name)
+    for name in STRING_COLUMNS + TABLE_COLUMNS:
+        packed = _packed(getattr(corpus, name))
+        sections[f"corpus.{name}.buffer"] = np.frombuffer(packed.buffer, dtype=np.uint8)
+        sections[f"corpus.{name}.offsets"] = packed.offsets
+    for name in INDEX_ARRAYS:
+        sections[f"index.{name}"] = getattr(index, name)
+    vocab = PackedStrings(index.names)
+    sections["index.vocab.buffer"] = np.frombuffer(vocab.buffer, dtype=np.uint8)
+    sections["index.vocab.offsets"] = vocab.offsets
+    # The canonicalizer's fuzzy-match vocabulary, so loading does not rebuild it
+    names = corpus.ingredient_names
+    fuzzy_names, grams, gram_indptr, gram_ids = FrozenVocabulary.arrays(
+        names[i] for i in range(len(names))
+    )
+    for name, values in (("names", fuzzy_names), ("grams", grams)):
+        packed = PackedStrings(values)
+        sections[f"fuzzy.{name}.buffer"] = np.frombuffer(packed.buffer, dtype=np.uint8)
+        sections[f"fuzzy.{name}.offsets"] = packed.offsets
+    sections["fuzzy.gram_indptr"] = gram_indptr
+    sections["fuzzy.gram_ids"] = gram_ids
+    return sections
+
+
+def write_snapshot(index, path: str, source: str = "", source_mtime: float = 0.0) -> dict:
+    """Writes `index` (and its corpus) to `path` atomically; returns the table of contents."""
+    sections = {name: np.ascontiguousarray(a) for name, a in _sections(index).items()}
+    toc = {
+        "created": int(time.time()),
+        "source": source,
+        "source_mtime": source_mtime,
+        "recipes": len(index),
+        "sections": {},
+    }
+
+    checksums = {name: zlib.crc32(array.data) for name, array in sections.items()}
+
+    # Offsets depend on the TOC's own length: lay out, then re-measure until stable
+    reserved = 0
+    while True:
+        offset = _align(_HEADER.size + reserved)
+        for name, array in sections.items():
+            toc["sections"][name] = {
+                "offset": offset,
+                "length": int(array.nbytes),
+                "dtype": array.dtype.str,
+                "crc32": checksums[name],
+            }
+            offset = _align(offset + array.nbytes)
+        encoded = json.dumps(toc, sort_keys=True).encode()
+        if len(encoded) <= reserved:
+            break
+        reserved = len(encoded) + 256
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(encoded)))
+        f.write(encoded)
+        for name, array in sections.items():
+            f.seek(toc["sections"][name]["offset"])
+            f.write(array.data)
+        f.truncate(offset)
+    os.replace(tmp, path)
+    return toc
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+class Snapshot:
+    """An open, mmapped snapshot file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < _HEADER.size:
+            raise SnapshotError(f"{path}: truncated header")
+        magic, version, toc_len = _HEADER.unpack_from(self._mm)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path}: not a recipe snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"{path}: format version {version}, expected {FORMAT_VERSION}")
+        self.version = version
+        self.toc = json.loads(self._mm[_HEADER.size:_HEADER.size + toc_len])
+        self._view = memoryview(self._mm)
+
+    def section(self, name: str):
+        meta = self.toc["sections"][name]
+        return np.frombuffer(
+            self._view, dtype=np.dtype(meta["dtype"]),
+            count=meta["length"] // np.dtype(meta["dtype"]).itemsize,
+            offset=meta["offset"],
+        )
+
+    def strings(self, prefix: str) -> PackedStrings:
+        meta = self.toc["sections"][prefix + ".buffer"]
+        buffer = self._view[meta["offset"]:meta["offset"] + meta["length"]]
+        return PackedStrings.from_buffer(buffer, self.section(prefix + ".offsets"))
+
+    def corpus(self) -> RecipeCorpus:
+        columns = {name: self.section(f"corpus.{name}") for name in ARRAY_COLUMNS}
+        for name in STRING_COLUMNS + TABLE_COLUMNS:
+            columns[name] = self.strings(f"corpus.{name}")
+        return RecipeCorpus.from_columns(columns)
+
+    def index(self):
+        from logic.ingredient_index import IngredientIndex
+
+        corpus = self.corpus()
+        vocab_names = self.strings("index.vocab")
+        vocab = {vocab_names[i]: i for i in range(len(vocab_names))}
+        return IngredientIndex(
+            corpus, vocab,
+            *(self.section(f"index.{name}") for name in INDEX_ARRAYS),
+            corpus.diet_flags,
+        )
+
+    def vocabulary(self) -> FrozenVocabulary:
+        """The fuzzy-match vocabulary IngredientIndex.build would register."""
+        return FrozenVocabulary(
+            self.strings("fuzzy.names"), self.strings("fuzzy.grams"),
+            self.section("fuzzy.gram_indptr"), self.section("fuzzy.gram_ids"),
+        )
+
+    def verify(self) -> list:
+        """Checksums and structural invariants; returns a list of problems (empty = OK)."""
+        problems = []
+        size = len(self._mm)
+        for name, meta in self.toc["sections"].items():
+            end = meta["offset"] + meta["length"]
+            if end > size:
+                problems.append(f"{name}: extends past end of file")
+                continue
+            if zlib.crc32(self._view[meta["offset"]:end]) != meta["crc32"]:
+                problems.append(f"{name}: checksum mismatch")
+        if problems:
+            return problems
+
+        index = self.index()
+        corpus = index.recipes
+        n = len(corpus)
+        if n != self.toc["recipes"]:
+            problems.append(f"recipe count {n} != {self.toc['recipes']}")
+        for name in ARRAY_COLUMNS:
+            column = getattr(corpus, name)
+            expected = n + 1 if name == "ingredient_indptr" else None
+            if name == "ingredient_ids":
+                expected = int(corpus.ingredient_indptr[-1])
+            if len(column) != (n if expected is None else expected):
+                problems.append(f"corpus.{name}: length {len(column)}")
+        if len(index.recipe_indptr) != n + 1:
+            problems.append("index.recipe_indptr: length mismatch")
+        if int(index.indptr[-1]) != len(index.postings):
+            problems.append("index.indptr: does not cover postings")
+        if np.any(np.diff(index.indptr) < 0) or np.any(np.diff(index.recipe_indptr) < 0):
+            problems.append("index: indptr not monotonic")
+        if len(index.postings) and int(index.postings.max()) >= n:
+            problems.append("index.postings: recipe position out of range")
+        if len(index.recipe_ingredients) and int(index.recipe_ingredients.max()) >= len(index.vocab):
+            problems.append("index.recipe_ingredients: ingredient id out of range")
+        vocabulary = self.vocabulary()
+        if int(vocabulary.gram_indptr[-1]) != len(vocabulary.gram_ids):
+            problems.append("fuzzy.gram_indptr: does not cover gram_ids")
+        if len(vocabulary.gram_ids) and int(vocabulary.gram_ids.max()) >= len(vocabulary.names):
+            problems.append("fuzzy.gram_ids: name id out of range")
+        return problems
+
+
+def store_mtime(path: str) -> float:
+    """Last write to a SQLite store, including its not yet checkpointed WAL."""
+    # Opening a connection creates an empty WAL: only one holding frames counts
+    return max(
+        (os.path.getmtime(p) for p in (path, path + "-wal")
+         if os.path.exists(p) and os.path.getsize(p)),
+        default=0.0,
+    )
+
+
+def mismatch(toc: dict, store_path: str) -> str:
+    """Why a snapshot no longer matches the store at `store_path` ("" = it does)."""
+    source = os.path.abspath(store_path)
+    if toc.get("source") and toc["source"] != source:
+        return f"built from {toc['source']}, store is {source}"
+    # Any write (import, refresh) moves the mtime: no need to open or count the store
+    if store_mtime(store_path) > toc.get("source_mtime", 0.0):
+        return "store modified after the snapshot was built"
+    return ""
+
+
+def load_index(path: str = RECIPE_SNAPSHOT_PATH, store_path: str = RECIPE_STORE_PATH):
+    """
+    IngredientIndex backed by the snapshot at `path`, or None if there is none,
+    it cannot be read, or the store at `store_path` changed since it was built.
+    Registers the snapshot's fuzzy-match vocabulary with the canonicalizer.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        snapshot = Snapshot(path)
+    except SnapshotError as e:
+        log.warning("Ignoring recipe snapshot: %s; rebuilding the index from the store", e)
+        return None
+    reason = mismatch(snapshot.toc, store_path)
+    if reason:
+        log.warning("Ignoring recipe snapshot %s (%s); rebuilding the index from the store",
+                    path, reason)
+        return None
+    index = snapshot.index()
+    canonicalizer.attach_vocabulary(snapshot.vocabulary())
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or verify the corpus snapshot.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="snapshot the offline store")
+    build.add_argument("--db", default=RECIPE_STORE_PATH, help="offline store path")
+    build.add_argument("--out", default=RECIPE_SNAPSHOT_PATH, help="snapshot path")
+    verify = sub.add_parser("verify", help="check a snapshot's header, checksums and structure")
+    verify.add_argument("path", nargs="?", default=RECIPE_SNAPSHOT_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        from logic.ingredient_index import IngredientIndex
+        from services.recipe_store import RecipeStore
+
+        started = time.monotonic()
+        # Taken first: a write during the build makes the snapshot stale
+        mtime = store_mtime(args.db)
+        index = IngredientIndex.build(RecipeStore(args.db).iter_recipes())
+        toc = write_snapshot(index, args.out, source=os.path.abspath(args.db), source_mtime=mtime)
+        print(f"Wrote {toc['recipes']} recipes to {args.out} "
+              f"({os.path.getsize(args.out)} bytes, {time.monotonic() - started:.1f}s)")
+        return
+
+    started = time.monotonic()
+    snapshot = Snapshot(args.path)
+    problems = snapshot.verify()
+    elapsed = time.monotonic() - started
+    for problem in problems:
+        print(f"FAIL {problem}")
+    if problems:
+        raise SystemExit(1)
+    print(f"OK {args.path}: v{snapshot.version}, {snapshot.toc['recipes']} recipes, "
+          f"{len(snapshot.toc['sections'])} sections ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
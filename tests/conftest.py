@@ -0,0 +1,4 @@
+#Makes the top-level packages (services, logic, utils, backend) importable from tests
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
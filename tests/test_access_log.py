@@ -0,0 +1,24 @@
+import threading
+from utils import access_log
+
+
+def test_record_is_written_in_the_background(tmp_path, monkeypatch):
+    path = tmp_path / "access.jsonl"
+    monkeypatch.setattr(access_log, "ACCESS_LOG_PATH", str(path))
+
+    access_log.record(access_log.SEARCH, "Pasta")
+    access_log.record(access_log.DETAIL, "Dal")
+    access_log.record(access_log.SEARCH, "pasta ")
+    access_log.record(access_log.SEARCH, "")          # ignored
+    access_log.flush()
+
+    assert access_log._writer is not threading.current_thread()
+    assert access_log.popular(str(path)) == [
+        (access_log.SEARCH, "pasta"), (access_log.DETAIL, "dal"),
+    ]
+
+
+def test_disabled_without_a_path(monkeypatch):
+    monkeypatch.setattr(access_log, "ACCESS_LOG_PATH", "")
+    access_log.record(access_log.SEARCH, "pasta")
+    access_log.flush()
@@ -0,0 +1,95 @@
+import random
+import pytest
+from logic.batch_scoring import score_batch, score_counts
+from logic.ingredient_match import detect_missing
+from logic.scoring import calculate_confidence
+from logic.tradeoff import generate_tradeoff_line, TRADEOFF_BUCKETS, tradeoff_bucket
+from utils.canonical import canonicalize
+
+NAMES = [
+    "tomato", "Tomatoes", "onion", "red onion", "garlic", "garlic cloves", "salt",
+    "kosher salt", "butter", "cumin", "jeera", "rice", "chicken", "paneer",
+    "cottage cheese", "coriander", "cilantro", "ginger", "egg", "milk", "flour",
+]
+
+
+def _rows(recipes, vocab):
+    """(indptr, indices) with canonical-id set semantics, as IngredientIndex builds them."""
+    indptr, indices = [0], []
+    for ingredients in recipes:
+        indices.extend(sorted({vocab.setdefault(canonicalize(i), len(vocab)) for i in ingredients}))
+        indptr.append(len(indices))
+    return indptr, indices
+
+
+def _scalar(ingredients, pantry):
+    data = detect_missing(ingredients, pantry)
+    missing = len(data["missing"])
+    percent = data["match_percent"]
+    return percent, missing, calculate_confidence(percent, missing), generate_tradeoff_line(percent, missing)
+
+
+def _check(recipes, pantry):
+    vocab = {}
+    matrix = _rows(recipes, vocab)
+    user_ids = {vocab[c] for c in (canonicalize(p) for p in pantry) if c in vocab}
+    scores = score_batch(user_ids, matrix)
+    assert len(scores["match_percent"]) == len(recipes)
+    for i, ingredients in enumerate(recipes):
+        percent, missing, confidence, line = _scalar(ingredients, pantry)
+        assert scores["match_percent"][i] == percent
+        assert scores["missing"][i] == missing
+        assert scores["confidence"][i] == confidence
+        assert scores["bucket"][i] == tradeoff_bucket(percent, missing)
+        if ingredients:
+            # The line only differs in how 0 % prints for an empty recipe (int vs float)
+            assert generate_tradeoff_line(float(scores["match_percent"][i]), int(scores["missing"][i])) == line
+
+
+def test_empty_ingredient_list():
+    _check([[], ["salt"]], ["salt"])
+
+
+def test_empty_pantry():
+    _check([["salt", "rice"], ["egg"]], [])
+
+
+def test_full_match():
+    _check([["tomato", "onion", "garlic"]], ["Tomatoes", "red onion", "garlic cloves", "milk"])
+
+
+def test_zero_matches():
+    _check([["paneer", "rice"], ["egg", "flour", "milk"]], ["chicken", "ginger"])
+
+
+def test_duplicate_ingredients():
+    # Duplicates and variants of one canonical name count once on both paths
+    _check([["tomato", "Tomatoes", "tomato", "salt", "kosher salt"]], ["tomato", "tomato"])
+    _check([["jeera", "cumin", "rice"]], ["cumin", "jeera", "cumin"])
+
+
+def test_no_recipes():
+    scores = score_counts([], [])
+    assert all(len(v) == 0 for v in scores.values())
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_corpus(seed):
+    rng = random.Random(seed)
+    recipes = [rng.sample(NAMES, rng.randint(0, 12)) for _ in range(300)]
+    # Duplicate some entries within recipes
+    for ingredients in recipes[::7]:
+        ingredients.extend(ingredients[:2])
+    pantry = rng.sample(NAMES, rng.randint(0, 10))
+    _check(recipes, pantry)
+
+
+def test_every_bucket_reachable():
+    matched = [n for n in range(0, 21) for _ in range(21)]
+    totals = [t for _ in range(21) for t in range(0, 21)]
+    pairs = [(m, t) for m, t in zip(matched, totals) if m <= t]
+    scores = score_counts([m for m, _ in pairs], [t for _, t in pairs])
+    for i, (m, t) in enumerate(pairs):
+        percent = round((m / t) * 100, 2) if t else 0
+        assert scores["confidence"][i] == calculate_confidence(percent, t - m)
+    assert set(scores["bucket"].tolist()) == set(range(len(TRADEOFF_BUCKETS)))
@@ -0,0 +1,165 @@
+import asyncio
+import socket
+import time
+import pytest
+from services.cache import ResponseCache, MISS
+from services.cache_backends import CacheBackend, MemoryBackend, SQLiteBackend, RedisBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_entries=3, max_bytes=1 << 20)
+    return MemoryBackend(max_entries=3, max_bytes=1 << 20)
+
+
+def test_round_trip_and_delete(backend):
+    backend.set("a", b"1", 60)
+    assert backend.get("a") == b"1"
+    backend.delete("a")
+    assert backend.get("a") is None
+
+
+def test_expired_entries_are_gone(backend):
+    backend.set("a", b"1", 0.01)
+    time.sleep(0.05)
+    assert backend.get("a") is None
+
+
+def test_clear(backend):
+    backend.set("a", b"1", 60)
+    backend.set("b", b"2", 60)
+    assert backend.clear() == 2
+    assert backend.get("a") is None
+
+
+def test_memory_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=2, max_bytes=1 << 20)
+    backend.set("a", b"1", 60)
+    backend.set("b", b"2", 60)
+    backend.get("a")
+    backend.set("c", b"3", 60)
+    assert backend.get("b") is None
+    assert backend.get("a") == b"1"
+
+
+def test_memory_respects_byte_limit():
+    backend = MemoryBackend(max_entries=10, max_bytes=4)
+    backend.set("a", b"12", 60)
+    backend.set("b", b"34", 60)
+    backend.set("c", b"56", 60)
+    assert backend.stats()["bytes"] <= 4
+    backend.set("big", b"12345", 60)
+    assert backend.get("big") is None
+
+
+def test_sqlite_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    SQLiteBackend(path, 10, 1 << 20).set("a", b"1", 60)
+    assert SQLiteBackend(path, 10, 1 << 20).get("a") == b"1"
+
+
+def test_response_cache_fresh_and_stale():
+    cache = ResponseCache(MemoryBackend(10, 1 << 20))
+    cache.set("k", {"v": [1, 2]}, ttl=60)
+    assert cache.get("k") == {"v": [1, 2]}
+    cache.set("old", "x", ttl=-1)   # past its TTL but kept for stale serving
+    assert cache.get("old") is MISS
+    assert cache.get_entry("old") == ("x", True)
+    assert cache.get_entry("none") == (MISS, False)
+
+
+def test_response_cache_async_methods(tmp_path):
+    cache = ResponseCache(SQLiteBackend(str(tmp_path / "c.sqlite3"), 10, 1 << 20))
+
+    async def run():
+        await cache.set_async("k", [1, 2], ttl=60)
+        return await cache.get_async("k"), await cache.get_entry_async("k")
+
+    assert asyncio.run(run()) == ([1, 2], ([1, 2], False))
+
+
+class _Broken(CacheBackend):
+    name = "broken"
+
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, key):
+        self.calls += 1
+        raise ConnectionError("down")
+
+    def set(self, key, value, ttl):
+        self.calls += 1
+        raise ConnectionError("down")
+
+    def clear(self):
+        self.calls += 1
+        raise ConnectionError("down")
+
+
+def test_failed_backend_is_skipped_until_retry():
+    backend = _Broken()
+    cache = ResponseCache(backend, retry_after=0.05)
+    assert cache.get("k") is MISS
+    cache.set("k", 1, 60)
+    assert cache.get("k") is MISS
+    assert backend.calls == 1
+    assert cache.counters()["errors"] == 1
+    assert cache.counters()["skipped"] == 2
+    time.sleep(0.06)
+    cache.get("k")
+    assert backend.calls == 2
+
+
+
+def test_failed_clear_is_a_noop():
+    cache = ResponseCache(_Broken(), retry_after=60)
+    assert cache.clear() == 0
+    assert cache.counters()["errors"] == 1
+    assert cache.clear() == 0
+    assert cache.counters()["skipped"] == 1
+
+
+def test_corrupt_entry_is_a_dropped_miss(backend):
+    cache = ResponseCache(backend)
+    backend.set("k", b"S\x00\x01", 60)
+    assert cache.get("k") is MISS
+    assert cache.counters()["corrupt"] == 1
+    assert backend.get("k") is None
+    cache.set("k", {"v": 1}, 60)
+    assert asyncio.run(cache.get_async("k")) == {"v": 1}
+
+def test_unreachable_redis_does_not_stall_the_loop():
+    # A listening socket that never answers: connect succeeds, replies time out
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    port = server.getsockname()[1]
+    cache = ResponseCache(RedisBackend(f"redis://127.0.0.1:{port}/0", timeout=0.3), retry_after=60)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        values = [await cache.get_async(f"k{i}") for i in range(5)]
+        task.cancel()
+        return values, ticks
+
+    try:
+        started = time.monotonic()
+        values, ticks = asyncio.run(run())
+        elapsed = time.monotonic() - started
+    finally:
+        server.close()
+    assert values == [MISS] * 5
+    # One timed-out call, then skipped; the loop kept running meanwhile
+    assert elapsed < 1.0
+    assert ticks >= 10
+    assert cache.counters()["skipped"] == 4
@@ -0,0 +1,49 @@
+import pytest
+from utils.canonical import ALIASES, Canonicalizer, canonicalize, clean
+
+SAMPLES = [
+    "Tomatoes", "tomato, diced", "2 roma tomatoes", "Cilantro leaves", "atta",
+    "whole wheat flour", "cloves", "clove", "3 garlic cloves", "1 can", "to taste",
+    "Extra-virgin olive oil", "heavy cream (optional)", "red chillies", "potatoes",
+    "unknownium", "  Kosher   Salt ",
+]
+
+
+@pytest.mark.parametrize("name", SAMPLES + list(ALIASES) + list(ALIASES.values()))
+def test_idempotent(name):
+    once = canonicalize(name)
+    assert canonicalize(once) == once
+
+
+@pytest.mark.parametrize("variant,expected", [
+    ("Tomatoes", "tomato"),
+    ("2 roma tomatoes", "tomato"),
+    ("tomato, diced", "tomato"),
+    ("cilantro", "coriander"),
+    ("Extra-virgin olive oil", "olive oil"),
+    ("3 garlic cloves", "garlic"),
+])
+def test_variants(variant, expected):
+    assert canonicalize(variant) == expected
+
+
+def test_alias_target_matches_its_own_key():
+    # The alias target is cleaned like any name, so both land on one key
+    assert canonicalize("atta") == canonicalize("whole wheat flour")
+
+
+def test_unit_only_names_share_a_key():
+    assert clean("cloves") == clean("clove") == "clove"
+    assert canonicalize("cloves") == canonicalize("clove")
+
+
+def test_alias_chains_are_followed():
+    canon = Canonicalizer({"a thing": "b thing", "b thing": "c thing"})
+    assert canon.canonicalize("a things") == "c thing"
+
+
+def test_fuzzy_falls_back_to_known_name():
+    canon = Canonicalizer({})
+    canon.add_vocabulary(["mozzarella"])
+    assert canon.canonicalize("mozarella") == "mozzarella"
+    assert canon.canonicalize("zzz") == "zzz"
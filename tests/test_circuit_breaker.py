@@ -0,0 +1,176 @@
+import asyncio
+import httpx
+import pytest
+import requests
+import requests.adapters
+from services import http_client
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+from services.rate_limiter import TokenBucket
+
+
+def _breaker(open_seconds=60.0):
+    return CircuitBreaker("test", failure_rate=0.5, min_calls=2, window=4,
+                          slow_call=5.0, open_seconds=open_seconds)
+
+
+def _trip(breaker):
+    for _ in range(2):
+        breaker.record(breaker.acquire(), False, 0.01)
+
+
+def test_opens_after_failure_rate():
+    breaker = _breaker()
+    breaker.record(breaker.acquire(), True, 0.01)
+    assert breaker.state == CLOSED
+    breaker.record(breaker.acquire(), False, 0.01)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+
+def test_slow_calls_count_as_failures():
+    breaker = _breaker()
+    for _ in range(2):
+        breaker.record(breaker.acquire(), True, 10.0)
+    assert breaker.state == OPEN
+
+
+def test_half_open_probe_closes_on_success():
+    breaker = _breaker(open_seconds=0.0)
+    _trip(breaker)
+    admitted = breaker.acquire()
+    assert admitted == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()   # one probe at a time
+    breaker.record(admitted, True, 0.01)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_reopens_on_failure():
+    breaker = _breaker(open_seconds=0.0)
+    _trip(breaker)
+    breaker.record(breaker.acquire(), False, 0.01)
+    assert breaker._state == OPEN
+
+
+def test_release_frees_the_probe_without_an_outcome():
+    breaker = _breaker(open_seconds=0.0)
+    _trip(breaker)
+    breaker.release(breaker.acquire())
+    assert breaker.state == HALF_OPEN
+    assert breaker.acquire() == HALF_OPEN
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """get_async against a handler; returns the recipedb breaker."""
+    def use(handler, rate=0, burst=1):
+        breaker = _breaker(open_seconds=0.0)
+        monkeypatch.setitem(http_client._breakers, http_client.RECIPEDB, breaker)
+        monkeypatch.setitem(http_client._rate_limits, http_client.RECIPEDB, TokenBucket(rate, burst))
+        monkeypatch.setattr(http_client, "UPSTREAM_MAX_RETRIES", 0)
+        monkeypatch.setattr(
+            http_client, "_get_async_client",
+            lambda name: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        return breaker
+    return use
+
+
+def test_cancelled_probe_is_released(upstream):
+    async def hang(request):
+        await asyncio.sleep(10)
+
+    breaker = upstream(hang)
+    _trip(breaker)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(http_client.get_async(http_client.RECIPEDB, "/x"), 0.05)
+
+    asyncio.run(run())
+    # Not closed by the cancelled probe, and the next call may probe again
+    assert breaker.state == HALF_OPEN
+    assert breaker.acquire() == HALF_OPEN
+
+
+def test_cancelled_while_rate_limited_takes_no_probe(upstream):
+    async def ok(request):
+        return httpx.Response(200, json={})
+
+    # Empty bucket: the call waits ~10s for its token before touching the breaker
+    breaker = upstream(ok, rate=0.1, burst=1)
+    http_client._rate_limits[http_client.RECIPEDB].reserve()
+    _trip(breaker)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(http_client.get_async(http_client.RECIPEDB, "/x"), 0.05)
+
+    asyncio.run(run())
+    assert breaker.acquire() == HALF_OPEN
+
+
+def test_successful_probe_closes(upstream):
+    async def ok(request):
+        return httpx.Response(200, json={"ok": True})
+
+    breaker = upstream(ok)
+    _trip(breaker)
+    response = asyncio.run(http_client.get_async(http_client.RECIPEDB, "/x"))
+    assert response.status_code == 200
+    assert breaker.state == CLOSED
+
+
+class _Replay(requests.adapters.HTTPAdapter):
+    """Answers each request with the next status code of `statuses`."""
+
+    def __init__(self, statuses):
+        super().__init__(max_retries=0)
+        self.statuses = list(statuses)
+        self.sent = 0
+
+    def send(self, request, **kwargs):
+        self.sent += 1
+        response = requests.Response()
+        response.status_code = self.statuses.pop(0)
+        response.headers["Retry-After"] = "0"
+        response.request = request
+        response.url = request.url
+        return response
+
+
+@pytest.fixture
+def sync_upstream(monkeypatch):
+    """get against replayed statuses; returns (adapter, breaker, bucket)."""
+    def use(statuses, retries=2):
+        adapter = _Replay(statuses)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        breaker = CircuitBreaker("test", failure_rate=0.5, min_calls=4, window=4,
+                                 slow_call=5.0, open_seconds=60.0)
+        bucket = TokenBucket(0, 10)
+        monkeypatch.setitem(http_client._sessions, http_client.RECIPEDB, session)
+        monkeypatch.setitem(http_client._breakers, http_client.RECIPEDB, breaker)
+        monkeypatch.setitem(http_client._rate_limits, http_client.RECIPEDB, bucket)
+        monkeypatch.setattr(http_client, "UPSTREAM_MAX_RETRIES", retries)
+        return adapter, breaker, bucket
+    return use
+
+
+def test_sync_retries_take_tokens_and_count_as_breaker_calls(sync_upstream):
+    adapter, breaker, bucket = sync_upstream([503, 200])
+    response = http_client.get(http_client.RECIPEDB, "/x")
+    assert response.status_code == 200
+    assert adapter.sent == 2
+    assert bucket.stats()["acquired"] == 2
+    assert breaker.stats()["window_calls"] == 2
+
+
+def test_sync_retries_stop_when_the_breaker_opens(sync_upstream):
+    adapter, breaker, _ = sync_upstream([503] * 6, retries=5)
+    with pytest.raises(CircuitOpenError):
+        http_client.get(http_client.RECIPEDB, "/x")
+    assert adapter.sent == 4
+    assert breaker.state == OPEN
@@ -0,0 +1,152 @@
+import gzip
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+from backend import http_cache
+from backend.http_cache import (
+    CachePolicyMiddleware, CompressionMiddleware, StaticAssets,
+    body_etag, cached_json, encoded_etag, match_etag, negotiate,
+)
+
+BIG = {"items": ["tomato"] * 500}
+
+
+def test_match_etag():
+    etag = body_etag(b"body")
+    assert match_etag({}, etag) is None
+    assert match_etag({"if-none-match": etag}, etag) == etag
+    assert match_etag({"if-none-match": "W/" + etag}, etag) == "W/" + etag
+    gz = encoded_etag(etag, "gzip")
+    assert match_etag({"if-none-match": f'"other", {gz}'}, etag) == gz
+    assert match_etag({"if-none-match": "*"}, etag) == etag
+    assert match_etag({"if-none-match": '"other"'}, etag) is None
+
+
+def test_negotiate():
+    assert negotiate("") == ""
+    assert negotiate("gzip, deflate") == "gzip"
+    assert negotiate("gzip;q=0") == ""
+    assert negotiate("*") == http_cache.CODINGS[0]
+    assert negotiate("identity") == ""
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.get("/api/suggest")
+    async def suggest(request: Request):
+        return cached_json(request, BIG)
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("ok")
+
+    app.add_middleware(CompressionMiddleware)
+    app.add_middleware(CachePolicyMiddleware)
+    return TestClient(app)
+
+
+def test_etag_revalidation(client):
+    first = client.get("/api/suggest", headers={"Accept-Encoding": "identity"})
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == http_cache.CACHE_POLICIES["/api/suggest"]
+
+    again = client.get("/api/suggest", headers={"If-None-Match": etag, "Accept-Encoding": "identity"})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+
+def test_compressed_variant(client):
+    response = client.get("/api/suggest", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json() == BIG       # decoded by the client
+    assert response.headers["etag"].endswith('-gzip"')
+    assert "accept-encoding" in response.headers["vary"].lower()
+
+    # the gzip ETag revalidates, and so does the identity one
+    identity = response.headers["etag"].replace("-gzip", "")
+    for tag in (response.headers["etag"], identity):
+        again = client.get("/api/suggest", headers={"If-None-Match": tag, "Accept-Encoding": "gzip"})
+        assert again.status_code == 304
+
+
+def test_small_and_unlisted_responses(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["cache-control"] == http_cache.DEFAULT_POLICY
+
+
+def test_static_assets(tmp_path):
+    (tmp_path / "app.js").write_text("console.log('tomato');\n" * 200)
+    (tmp_path / "logo").write_bytes(b"\x89PNG")
+    assets = StaticAssets(str(tmp_path))
+
+    plain = assets.response("/app.js", {})
+    assert "content-encoding" not in plain.headers
+    packed = assets.response("/app.js", {"accept-encoding": "gzip"})
+    assert packed.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(packed.body) == plain.body
+    assert packed.headers["etag"] == encoded_etag(plain.headers["etag"], "gzip")
+
+    revalidated = assets.response("/app.js", {"if-none-match": plain.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert assets.response("/missing.js", {}).status_code == 404
+    assert "content-encoding" not in assets.response("/logo", {"accept-encoding": "gzip"}).headers
+
+
+@pytest.fixture
+def recipe_app(monkeypatch):
+    """The app with recipe resolution stubbed; returns (client, payload)."""
+    from backend.main import app
+    from backend.routes import recipe_routes
+    from logic.recipe_detail import compute_etag
+
+    payload = {
+        "recipe_id": "7", "overview": {"name": "Dal"}, "nutrition": {},
+        "ingredients": [{"name": "lentils"}], "substitutes": {}, "procedure": [],
+    }
+
+    def use(partial=False):
+        if partial:
+            payload["partial"] = True
+        payload["etag"] = compute_etag(payload)
+        return TestClient(app), payload
+
+    async def resolve(key):
+        return payload
+
+    class Suggester:
+        def viewed(self, name):
+            pass
+
+    monkeypatch.setattr(recipe_routes, "resolve_by_id", resolve)
+    monkeypatch.setattr(recipe_routes, "resolve_by_title", resolve)
+    monkeypatch.setattr(recipe_routes, "get_suggester", Suggester)
+    return use
+
+
+def test_recipe_route_304(recipe_app):
+    client, payload = recipe_app()
+    first = client.get("/api/recipe/7")
+    assert first.status_code == 200
+    assert first.headers["etag"] == payload["etag"]
+    assert first.headers["cache-control"] == http_cache.CACHE_POLICIES["/api/recipe/{recipe_id}"]
+    again = client.get("/api/recipe/7", headers={"If-None-Match": payload["etag"]})
+    assert again.status_code == 304
+
+
+def test_partial_payload_is_cached_briefly(recipe_app):
+    client, payload = recipe_app(partial=True)
+    first = client.get("/api/recipe/7")
+    assert first.headers["cache-control"] == http_cache.PARTIAL_POLICY
+    again = client.get("/api/recipe/7", headers={"If-None-Match": payload["etag"]})
+    assert again.status_code == 304
+    assert again.headers["cache-control"] == http_cache.PARTIAL_POLICY
+
+    detail = client.get("/api/recipe-detail", params={"recipe_name": "Dal"})
+    assert detail.status_code == 200
+    assert detail.json()["partial"] is True
+    assert detail.headers["cache-control"] == http_cache.PARTIAL_POLICY
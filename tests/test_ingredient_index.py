@@ -0,0 +1,28 @@
+import random
+from logic.ingredient_index import IngredientIndex
+
+FOODS = ["onion", "garlic", "rice", "lentils", "ginger", "cumin", "salt", "butter", "peas", "chili"]
+
+
+def _index(recipes):
+    return IngredientIndex.build([
+        {"Recipe_id": str(i), "Recipe_title": f"Recipe {i}", "ingredients": ings}
+        for i, ings in enumerate(recipes)
+    ])
+
+
+def test_ties_at_the_cut_keep_the_earliest_recipes():
+    index = _index([["onion", "rice"]] * 50)
+    for k in (1, 5, 17):
+        assert [pos for pos, *_ in index.query(["onion"], top_k=k)] == list(range(k))
+
+
+def test_top_k_matches_a_full_sort():
+    rng = random.Random(7)
+    index = _index([rng.sample(FOODS, rng.randint(1, 4)) for _ in range(300)])
+    for _ in range(20):
+        pantry = rng.sample(FOODS, rng.randint(1, 5))
+        full = index.query(pantry, top_k=len(index))
+        expected = sorted(full, key=lambda r: (-r[3], -r[2]["match_percent"], r[0]))
+        for k in (1, 3, 10):
+            assert [r[0] for r in index.query(pantry, top_k=k)] == [r[0] for r in expected[:k]]
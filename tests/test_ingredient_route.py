@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from backend.routes import ingredient
+from backend.routes.ingredient import IngredientRequest
+
+SEARCHES = {
+    "onion": [{"Recipe_id": "1", "Recipe_title": "Onion Soup"}, {"Recipe_id": "2", "Recipe_title": "Dal"}],
+    "rice": [{"Recipe_id": "2", "Recipe_title": "Dal"}, {"Recipe_id": "3", "Recipe_title": "Pulao"}],
+}
+INGREDIENTS = {
+    "1": ["onion", "butter", "stock"],
+    "2": ["lentils", "onion", "rice"],
+}   # "3" cannot be fetched
+# Per-serving macros: Onion Soup is Weight Loss, Dal is Muscle Gain
+NUTRITION = {
+    "1": {"servings": "2", "Calories": "400", "Protein (g)": "4"},
+    "2": {"servings": "2", "Calories": "1000", "Protein (g)": "80"},
+}
+
+
+@pytest.fixture(autouse=True)
+def upstream(monkeypatch):
+    async def search(title, limit=5):
+        return [dict(r) for r in SEARCHES.get(title, [])][:limit]
+
+    async def full(recipe):
+        ingredients = INGREDIENTS.get(recipe["Recipe_id"])
+        if not ingredients:
+            return recipe
+        return {**recipe, **NUTRITION[recipe["Recipe_id"]], "ingredients": ingredients}
+
+    monkeypatch.setattr(ingredient, "fetch_recipes_by_title_async", search)
+    monkeypatch.setattr(ingredient, "fetch_full_recipe_async", full)
+
+
+async def _collect(req):
+    return [card async for card in ingredient._title_matches(req)]
+
+
+def test_title_matches_are_scored_against_the_pantry():
+    cards = asyncio.run(_collect(IngredientRequest(ingredients=["onion", "rice"], min_match=0)))
+    by_name = {c["name"]: c for c in cards}
+    assert set(by_name) == {"Onion Soup", "Dal"}
+
+    soup = by_name["Onion Soup"]
+    assert soup["matched"] == ["onion"]
+    assert sorted(soup["missing"]) == ["butter", "stock"]
+    assert soup["match_score"] == 33.33
+
+    dal = by_name["Dal"]
+    assert sorted(dal["matched"]) == ["onion", "rice"]
+    assert dal["missing"] == ["lentil"]
+    assert dal["match_score"] == 66.67
+    assert dal["confidence"] > soup["confidence"]
+
+
+def _names(**kwargs):
+    req = IngredientRequest(ingredients=["onion", "rice"], **kwargs)
+    return sorted(card["name"] for card in asyncio.run(_collect(req)))
+
+
+def test_title_matches_apply_min_match():
+    assert _names(min_match=50) == ["Dal"]
+    assert _names(min_match=70) == []
+
+
+def test_title_matches_apply_diet_goal():
+    assert _names(min_match=0, diet_goal="Weight Loss") == ["Onion Soup"]
+    assert _names(min_match=0, diet_goal="Muscle Gain") == ["Dal"]
+    assert _names(min_match=0, diet_goal="Vegan") == []
+
+
+def test_title_matches_honour_limit():
+    assert len(_names(min_match=0, limit=1)) == 1
+    assert len(_names(min_match=0, limit=10)) == 2
@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from logic import prefetch, recipe_detail
+from services.cache import ResponseCache
+from services.cache_backends import MemoryBackend
+from utils import access_log
+
+RECIPES = {
+    "1": {"Recipe_id": "1", "Recipe_title": "Dal", "ingredients": ["onion", "cumin"]},
+    "2": {"Recipe_id": "2", "Recipe_title": "Soup", "ingredients": ["onion", "salt"]},
+}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    calls = {"by_id": []}
+
+    async def budget(reserve, max_wait):
+        return True
+
+    async def by_id(recipe_id):
+        calls["by_id"].append(recipe_id)
+        return RECIPES.get(recipe_id)
+
+    async def by_title(title, limit=5):
+        return [r for r in RECIPES.values() if r["Recipe_title"] == title][:limit]
+
+    async def flavor(ing):
+        return {}
+
+    async def steps(recipe_id):
+        return ["Cook."]
+
+    cache = ResponseCache(MemoryBackend(100, 1 << 20))
+    monkeypatch.setattr(recipe_detail, "response_cache", cache)
+    monkeypatch.setattr(recipe_detail, "get_substitute_engine", lambda: None)
+    monkeypatch.setattr(recipe_detail, "fetch_flavor_entity_async", flavor)
+    monkeypatch.setattr(recipe_detail, "fetch_recipe_instructions_async", steps)
+    monkeypatch.setattr(recipe_detail, "fetch_recipe_by_id_async", by_id)
+    monkeypatch.setattr(recipe_detail, "fetch_recipe_by_title_async", by_title)
+    monkeypatch.setattr(prefetch, "fetch_recipes_by_title_async", by_title)
+    monkeypatch.setattr(prefetch, "wait_for_budget", budget)
+    return calls
+
+
+def test_warm_counts_only_newly_stored_payloads(upstream):
+    asyncio.run(recipe_detail.resolve_by_id("1"))
+    entries = [
+        (access_log.RECIPE, "1"),
+        (access_log.RECIPE, "2"),
+        (access_log.RECIPE, "404"),
+        (access_log.DETAIL, "Soup"),
+        (access_log.DETAIL, "Nothing"),
+    ]
+    stats = asyncio.run(prefetch.warm(entries))
+    assert stats["warmed"] == 1
+    assert stats["already_cached"] == 2
+    assert stats["not_found"] == 2
+    # an already cached recipe is not fetched again
+    assert upstream["by_id"] == ["1", "2", "404"]
+
+
+def test_warm_counts_partial_payloads_apart(upstream, monkeypatch):
+    async def slow_steps(recipe_id):
+        await asyncio.sleep(1)
+
+    monkeypatch.setattr(recipe_detail, "fetch_recipe_instructions_async", slow_steps)
+    monkeypatch.setattr(recipe_detail, "REQUEST_DEADLINE", 0.05)
+    stats = asyncio.run(prefetch.warm([(access_log.RECIPE, "2")]))
+    assert stats["warmed"] == 0
+    assert stats["partial"] == 1
@@ -0,0 +1,78 @@
+import asyncio
+import time
+import pytest
+from logic import recipe_detail
+from services.cache import ResponseCache
+from services.cache_backends import MemoryBackend
+
+RECIPE = {
+    "Recipe_id": "42",
+    "Recipe_title": "Dal",
+    "ingredients": ["Onion", "onions", "garlic", "ginger", "cumin", "salt", "turmeric"],
+}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    calls = {"flavor": [], "steps": 0}
+
+    async def flavor(ing):
+        calls["flavor"].append(ing)
+        return {"entity_readable_name": ing + " powder"}
+
+    async def steps(recipe_id):
+        calls["steps"] += 1
+        if calls.get("slow"):
+            await asyncio.sleep(1)
+        return ["Cook."]
+
+    cache = ResponseCache(MemoryBackend(100, 1 << 20))
+    monkeypatch.setattr(recipe_detail, "response_cache", cache)
+    monkeypatch.setattr(recipe_detail, "get_substitute_engine", lambda: None)
+    monkeypatch.setattr(recipe_detail, "fetch_flavor_entity_async", flavor)
+    monkeypatch.setattr(recipe_detail, "fetch_recipe_instructions_async", steps)
+    return calls
+
+
+def _resolve():
+    return asyncio.run(recipe_detail._resolve(dict(RECIPE), "Dal", time.monotonic()))
+
+
+def test_flavordb_lookups_are_bounded(upstream, monkeypatch):
+    monkeypatch.setattr(recipe_detail, "FLAVOR_LOOKUPS", 3)
+    payload = _resolve()
+    assert sorted(upstream["flavor"]) == ["garlic", "ginger", "onion"]
+    assert set(payload["substitutes"]) == {"onion", "garlic", "ginger"}
+    assert "partial" not in payload
+
+
+def test_cached_payload_fits_every_pantry(upstream):
+    payload = _resolve()
+    assert sorted(upstream["flavor"]) == ["cumin", "garlic", "ginger", "onion", "salt", "turmeric"]
+
+    # a second pantry is scored from the cached payload, with its own missing items
+    again = asyncio.run(recipe_detail.resolve_by_id("42"))
+    assert again == payload
+    scores = recipe_detail.rescore(again, ["onion", "garlic", "ginger"])
+    assert {s["canonical"] for s in scores["substitutions"]} == {"cumin", "salt", "turmeric"}
+
+
+def test_partial_payload_is_cached_briefly(upstream, monkeypatch):
+    monkeypatch.setattr(recipe_detail, "REQUEST_DEADLINE", 0.05)
+    upstream["slow"] = True
+    payload = _resolve()
+    assert payload["partial"] is True
+    assert payload["procedure"] is not None
+
+    # re-scoring the degraded payload is served from the cache
+    again = asyncio.run(recipe_detail.resolve_by_id("42"))
+    assert again == payload
+    assert upstream["steps"] == 1
+    assert recipe_detail.detail_response(again, ["salt"])["partial"] is True
+
+
+def test_overview_uses_normalized_fields(upstream):
+    recipe = {**RECIPE, "servings": "2.0", "total_time": "40"}
+    payload = asyncio.run(recipe_detail._resolve(recipe, "Dal", time.monotonic()))
+    assert payload["overview"]["servings"] == 2
+    assert payload["overview"]["time"] == "40 min"
@@ -0,0 +1,41 @@
+import pytest
+from models.recipe_model import Recipe
+from utils.helpers import to_float
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("12.5", 12.5), (3, 3.0), ("", 0.0), (None, 0.0), ("abc", 0.0),
+    ("NaN", 0.0), ("nan", 0.0), ("inf", 0.0), ("-Infinity", 0.0), (float("nan"), 0.0),
+])
+def test_to_float(value, expected):
+    assert to_float(value) == expected
+
+
+def test_non_finite_default():
+    assert to_float("inf", 1) == 1
+
+
+def test_from_api_survives_non_finite_numbers():
+    recipe = Recipe.from_api({
+        "Recipe_id": "1", "Recipe_title": "Dal", "servings": "NaN",
+        "Calories": "inf", "total_time": "NaN", "cook_time": "-inf", "Protein (g)": "nan",
+    })
+    assert recipe.servings == 1
+    assert recipe.calories == 0.0
+    assert recipe.total_time == 0
+    assert recipe.cook_time == 0
+
+
+def test_cards_use_normalized_fields():
+    from backend.routes.recipe_routes import _search_card
+    from models.recipe_model import normalized
+
+    record = {"Recipe_title": "Dal", "servings": "4.0", "total_time": "35.0"}
+    card = _search_card(0, record, normalized(record))
+    assert card["servings"] == 4
+    assert card["time"] == "35 min"
+
+    unknown = {"Recipe_title": "Dal", "servings": "", "total_time": "NaN"}
+    card = _search_card(0, unknown, normalized(unknown))
+    assert card["servings"] == 1
+    assert card["time"] == "? min"
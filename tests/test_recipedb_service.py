@@ -0,0 +1,43 @@
+import asyncio
+import threading
+import pytest
+from services import recipedb_service
+
+
+class _Store:
+    """Records the thread each lookup runs on."""
+
+    def __init__(self):
+        self.threads = []
+
+    def search_by_title(self, title, limit):
+        self.threads.append(threading.current_thread())
+        return [{"Recipe_id": "1", "Recipe_title": title}]
+
+    def get(self, recipe_id):
+        self.threads.append(threading.current_thread())
+        return {"Recipe_id": recipe_id, "steps": ["Cook."]}
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = _Store()
+    monkeypatch.setattr(recipedb_service, "RECIPEDB_MODE", "local")
+    monkeypatch.setattr(recipedb_service, "get_store", lambda: store)
+    return store
+
+
+def test_local_lookups_run_off_the_event_loop(store):
+    async def run():
+        loop_thread = threading.current_thread()
+        assert await recipedb_service.fetch_recipes_by_title_async("dal") == [
+            {"Recipe_id": "1", "Recipe_title": "dal"}
+        ]
+        assert (await recipedb_service.fetch_recipe_by_title_async("dal"))[0]["Recipe_id"] == "1"
+        assert (await recipedb_service.fetch_recipe_by_id_async("7"))["Recipe_id"] == "7"
+        assert await recipedb_service.fetch_recipe_instructions_async("7") == ["Cook."]
+        return loop_thread
+
+    loop_thread = asyncio.run(run())
+    assert len(store.threads) == 4
+    assert loop_thread not in store.threads
@@ -0,0 +1,54 @@
+import pytest
+from logic import recommender
+from logic.ingredient_index import IngredientIndex
+from logic.scoring import calculate_confidence
+from logic.substitutes import SubstituteEngine
+
+
+def _molecules(start, count):
+    return list(range(start, start + count))
+
+
+@pytest.fixture
+def engine():
+    # shallot ~ onion share most molecules; chili shares a sliver with onion
+    return SubstituteEngine.build([
+        {"entity_readable_name": "onion", "molecules": _molecules(0, 20)},
+        {"entity_readable_name": "shallot", "molecules": _molecules(2, 20)},
+        {"entity_readable_name": "chili", "molecules": _molecules(18, 20)},
+        {"entity_readable_name": "salt", "molecules": _molecules(100, 5)},
+    ], top_k=3)
+
+
+@pytest.fixture
+def index():
+    return IngredientIndex.build([
+        {"Recipe_id": "1", "Recipe_title": "Onion soup", "ingredients": ["onion", "salt", "butter"]},
+        {"Recipe_id": "2", "Recipe_title": "Chili oil", "ingredients": ["chili", "salt", "oil", "garlic"]},
+    ])
+
+
+def test_low_similarity_is_not_a_substitute(index, engine):
+    similarities = dict(engine.replaceable_by("onion"))
+    assert similarities["chili"] < 0.2 <= similarities["shallot"]
+    covered = recommender.substitutable(index, ["onion"], engine)
+    assert index.vocab["chili"] not in covered
+
+
+def test_confidence_matches_the_missing_list(index, engine, monkeypatch):
+    monkeypatch.setattr(recommender, "get_substitute_engine", lambda: engine)
+    for pantry in (["shallot", "salt"], ["onion", "salt"], ["salt"]):
+        for _, _, match, confidence in recommender.recommend(index, pantry, top_k=5):
+            assert confidence == calculate_confidence(match["match_percent"], len(match["missing"]))
+            substituted = {s["original"] for s in match["substitutions"]}
+            assert substituted <= set(match["missing"])
+
+
+def test_substitute_is_a_partial_match(index, engine, monkeypatch):
+    monkeypatch.setattr(recommender, "get_substitute_engine", lambda: engine)
+    results = recommender.recommend(index, ["shallot", "salt"], top_k=1)
+    _, recipe, match, _ = results[0]
+    assert recipe.title == "Onion soup"
+    # salt exact + onion at half weight, of 3 ingredients
+    assert match["match_percent"] == round(1.5 / 3 * 100, 2)
+    assert [s["original"] for s in match["substitutions"]] == ["onion"]
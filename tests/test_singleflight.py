@@ -0,0 +1,158 @@
+import asyncio
+import threading
+import time
+import pytest
+from services.singleflight import SingleFlight
+
+
+def test_threads_share_one_call():
+    flights = SingleFlight()
+    calls = []
+    gate = threading.Event()
+
+    def lookup():
+        calls.append(1)
+        gate.wait(1)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do("title:x", lookup)))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert results == ["value"] * 5
+    assert len(calls) == 1
+    assert flights.stats() == {"title": {"leaders": 1, "collapsed": 4}}
+
+
+def test_thread_error_reaches_followers():
+    flights = SingleFlight()
+    gate = threading.Event()
+
+    def lookup():
+        gate.wait(1)
+        raise ValueError("boom")
+
+    errors = []
+
+    def call():
+        try:
+            flights.do("k", lookup)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert len(errors) == 3
+    # the key is free again afterwards
+    assert flights.do("k", lambda: 1) == 1
+
+
+def test_async_callers_share_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    async def lookup():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(*(flights.do_async("recipe:1", lookup) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["value"] * 5
+    assert len(calls) == 1
+
+
+def test_cancelled_leader_times_out_followers():
+    flights = SingleFlight()
+
+    async def lookup():
+        await asyncio.sleep(1)
+
+    async def run():
+        leader = asyncio.ensure_future(flights.do_async("k", lookup))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do_async("k", lookup))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(TimeoutError):
+            await follower
+        assert leader.cancelled()
+
+    asyncio.run(run())
+
+
+def test_cancelled_follower_keeps_the_lookup():
+    flights = SingleFlight()
+
+    async def lookup():
+        await asyncio.sleep(0.02)
+        return "value"
+
+    async def run():
+        leader = asyncio.ensure_future(flights.do_async("k", lookup))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do_async("k", lookup))
+        await asyncio.sleep(0)
+        follower.cancel()
+        return await leader
+
+    assert asyncio.run(run()) == "value"
+
+
+def test_refresh_async_runs_once_per_key():
+    flights = SingleFlight()
+    calls = []
+
+    async def lookup():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+
+    async def run():
+        flights.refresh_async("k", lookup)
+        await asyncio.sleep(0)
+        flights.refresh_async("k", lookup)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+    assert len(calls) == 1
+
+
+def test_refresh_threads_are_bounded(monkeypatch):
+    from services import singleflight
+    monkeypatch.setattr(singleflight, "REFRESH_WORKERS", 2)
+    flights = SingleFlight()
+    gate = threading.Event()
+    running = []
+    done = []
+
+    def lookup(key):
+        def fn():
+            running.append(threading.current_thread().name)
+            gate.wait(1)
+            done.append(key)
+        return fn
+
+    before = threading.active_count()
+    for i in range(50):
+        flights.refresh(f"k{i}", lookup(i))
+    flights.refresh("k0", lookup("again"))    # already queued
+    time.sleep(0.05)
+    assert threading.active_count() - before <= 2
+    gate.set()
+    for _ in range(100):
+        if len(done) == 50:
+            break
+        time.sleep(0.01)
+    assert sorted(done) == list(range(50))
+    assert len(set(running)) <= 2
@@ -0,0 +1,86 @@
+import os
+import pytest
+from logic.ingredient_index import IngredientIndex
+from services.recipe_store import RecipeStore
+from services.snapshot import FORMAT_VERSION, Snapshot, load_index, store_mtime, write_snapshot
+from utils.canonical import Canonicalizer, FrozenVocabulary
+
+RECIPES = [
+    {"Recipe_id": "1", "Recipe_title": "Dal", "ingredients": ["lentils", "onion", "turmeric"]},
+    {"Recipe_id": "2", "Recipe_title": "Pulao", "ingredients": ["rice", "onion", "peas"]},
+    {"Recipe_id": "3", "Recipe_title": "Raita", "ingredients": ["yogurt", "cucumber"]},
+]
+
+
+@pytest.fixture
+def built(tmp_path):
+    store = RecipeStore(str(tmp_path / "recipes.sqlite3"))
+    store.add_recipes(RECIPES)
+    mtime = store_mtime(store.path)
+    index = IngredientIndex.build(store.iter_recipes())
+    path = str(tmp_path / "recipes.snap")
+    write_snapshot(index, path, source=os.path.abspath(store.path), source_mtime=mtime)
+    return store, index, path
+
+
+def _titles(index, pantry):
+    return [recipe.title for _, recipe, _, _ in index.query(pantry, top_k=3, min_match=0)]
+
+
+def test_round_trip(built):
+    store, index, path = built
+    assert Snapshot(path).verify() == []
+    loaded = load_index(path, store.path)
+    assert len(loaded) == len(index) == 3
+    for pantry in (["onion"], ["rice", "peas"], ["yogurt"]):
+        assert _titles(loaded, pantry) == _titles(index, pantry)
+
+
+def test_missing_snapshot(tmp_path, built):
+    store, _, _ = built
+    assert load_index(str(tmp_path / "none.snap"), store.path) is None
+
+
+def test_store_written_after_build(built):
+    store, _, path = built
+    store.add_recipes([{"Recipe_id": "4", "Recipe_title": "Chai", "ingredients": ["tea"]}])
+    assert load_index(path, store.path) is None
+
+
+def test_stale_mtime(built):
+    store, _, path = built
+    later = store_mtime(store.path) + 10
+    os.utime(store.path, (later, later))
+    assert load_index(path, store.path) is None
+
+
+def test_other_store(tmp_path, built):
+    _, _, path = built
+    other = RecipeStore(str(tmp_path / "other.sqlite3"))
+    other.add_recipes(RECIPES)
+    assert load_index(path, other.path) is None
+
+
+def test_other_format_version(built):
+    store, _, path = built
+    with open(path, "r+b") as f:
+        f.seek(8)
+        f.write((FORMAT_VERSION + 1).to_bytes(4, "little"))
+    assert load_index(path, store.path) is None
+
+
+def test_vocabulary_is_stored(built):
+    _, _, path = built
+    vocabulary = Snapshot(path).vocabulary()
+    assert "lentil" in vocabulary and "cucumber" in vocabulary
+    assert "tomato" not in vocabulary
+
+
+def test_frozen_vocabulary_matches_a_built_one():
+    names = ["Red Lentils", "cucumber", "basmati rice", "yogurt", "turmeric powder"]
+    built, frozen = Canonicalizer({}), Canonicalizer({})
+    built.add_vocabulary(names)
+    frozen.attach_vocabulary(FrozenVocabulary(*FrozenVocabulary.arrays(names)))
+    for query in ("red lentil", "cucmber", "basmati rce", "yoghurt", "tumeric powder", "paneer"):
+        assert frozen.canonicalize(query) == built.canonicalize(query)
+        assert frozen.is_known(query) == built.is_known(query)
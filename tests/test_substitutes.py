@@ -0,0 +1,106 @@
+import pytest
+from logic.recipe_detail import _ranked_substitutes, rescore
+from logic.substitutes import SubstituteEngine
+from utils.canonical import canonicalize
+
+
+def _molecules(start, count):
+    return list(range(start, start + count))
+
+
+@pytest.fixture
+def engine():
+    return SubstituteEngine.build([
+        {"entity_readable_name": "butter", "molecules": _molecules(0, 20)},
+        {"entity_readable_name": "ghee", "molecules": _molecules(1, 20)},
+        {"entity_readable_name": "cream", "molecules": _molecules(3, 20)},
+        {"entity_readable_name": "lard", "molecules": _molecules(18, 20)},   # ~5% like butter
+    ], top_k=3)
+
+
+def _payload(engine, names):
+    targets = list(dict.fromkeys(canonicalize(n) for n in names))
+    return {
+        "ingredients": [{"name": n} for n in names],
+        "substitutes": _ranked_substitutes(engine, targets),
+    }
+
+
+def test_neighbours_below_the_floor_are_dropped(engine):
+    assert [s.substitute for s in engine.substitutes("butter", min_similarity=0)][-1] == "lard"
+    assert "lard" not in [s.substitute for s in engine.substitutes("butter")]
+    subs = _ranked_substitutes(engine, ["butter"])["butter"]
+    offered = [subs["substitute"]] + [a["substitute"] for a in subs["alternatives"]]
+    assert "lard" not in offered
+
+
+def test_original_keeps_the_recipe_name(engine):
+    scores = rescore(_payload(engine, ["Unsalted Butter", "salt"]), ["salt"])
+    [sub] = scores["substitutions"]
+    assert sub["original"] == "Unsalted Butter"
+    assert sub["canonical"] == "butter"
+    assert sub["substitute"] == "ghee"
+
+
+def test_missing_substitutes_are_skipped(engine):
+    # ghee is missing as well, so butter falls back to cream
+    scores = rescore(_payload(engine, ["butter", "ghee", "salt"]), ["salt"])
+    by_original = {s["original"]: s for s in scores["substitutions"]}
+    assert by_original["butter"]["substitute"] == "cream"
+    offered = [a["substitute"] for a in by_original["butter"]["alternatives"]]
+    assert "ghee" not in offered
+
+
+def test_no_usable_substitute(engine):
+    scores = rescore(_payload(engine, ["butter", "ghee", "cream"]), ["salt"])
+    assert all(s["substitute"] not in ("butter", "ghee", "cream") for s in scores["substitutions"])
+
+
+@pytest.fixture
+def fresh_engine_state(monkeypatch):
+    from logic import substitutes
+    monkeypatch.setattr(substitutes, "_engine", None)
+    monkeypatch.setattr(substitutes, "_engine_loaded", False)
+    monkeypatch.setattr(substitutes, "_engine_retry_at", 0.0)
+    return substitutes
+
+
+def test_failed_load_is_not_retried_on_every_call(tmp_path, monkeypatch, fresh_engine_state):
+    substitutes = fresh_engine_state
+    table = tmp_path / "substitutes.npz"
+    table.write_bytes(b"not a table")
+    monkeypatch.setattr(substitutes, "SUBSTITUTES_PATH", str(table))
+    loads = []
+    real_load = SubstituteEngine.load.__func__
+
+    def load(cls, path):
+        loads.append(path)
+        return real_load(cls, path)
+
+    monkeypatch.setattr(SubstituteEngine, "load", classmethod(load))
+    assert substitutes.get_substitute_engine() is None
+    assert substitutes.get_substitute_engine() is None
+    assert len(loads) == 1
+
+    # once the retry window has passed, a rebuilt table is picked up
+    engine_file = tmp_path / "good.npz"
+    SubstituteEngine.build([
+        {"entity_readable_name": "quinoa", "molecules": _molecules(0, 5)},
+        {"entity_readable_name": "millet", "molecules": _molecules(1, 5)},
+    ]).save(str(engine_file))
+    monkeypatch.setattr(substitutes, "SUBSTITUTES_PATH", str(engine_file))
+    monkeypatch.setattr(substitutes, "_engine_retry_at", 0.0)
+    assert substitutes.get_substitute_engine() is not None
+    assert len(loads) == 2
+
+
+def test_vocabulary_is_registered_explicitly():
+    from utils.canonical import canonicalizer
+
+    engine = SubstituteEngine.build([
+        {"entity_readable_name": "zzfoodoscope berry", "molecules": _molecules(0, 5)},
+        {"entity_readable_name": "zzfoodoscope nut", "molecules": _molecules(1, 5)},
+    ])
+    assert not canonicalizer.is_known("zzfoodoscope berry")
+    engine.register_vocabulary()
+    assert canonicalizer.is_known("zzfoodoscope berry")
@@ -0,0 +1,107 @@
+"""
+Access log of searches / detail views for cache warming (logic/prefetch.py),
+one JSON line per lookup when ACCESS_LOG_PATH is set, written by a
+background thread. popular() also reads plain HTTP access logs.
+"""
+
+import json
+import queue
+import re
+import threading
+import time
+from collections import Counter
+from utils.constants import ACCESS_LOG_PATH
+
+SEARCH = "search"
+DETAIL = "detail"
+RECIPE = "recipe"
+
+_RECIPE_PATH = re.compile(r"\bGET /api/recipe/([^/\s?\"]+)")
+
+# Entries waiting for the writer thread; past this many, new ones are dropped
+QUEUE_LIMIT = 10000
+
+_lines = queue.Queue(QUEUE_LIMIT)
+_writer = None
+_lock = threading.Lock()
+
+
+def record(kind: str, value: str):
+    """
+    Queues one entry for the writer thread; a no-op unless ACCESS_LOG_PATH is
+    set. Never blocks on disk and never raises.
+    """
+    global _writer
+    path = ACCESS_LOG_PATH
+    if not path or not value:
+        return
+    line = json.dumps({"ts": round(time.time(), 3), "kind": kind, "value": value}) + "\n"
+    if _writer is None:
+        with _lock:
+            if _writer is None:
+                _writer = threading.Thread(target=_write, name="access-log", daemon=True)
+                _writer.start()
+    try:
+        _lines.put_nowait((path, line))
+    except queue.Full:
+        pass
+
+
+def _write():
+    files = {}
+    while True:
+        batch = [_lines.get()]
+        # Whatever else is queued goes out in the same write
+        while True:
+            try:
+                batch.append(_lines.get_nowait())
+            except queue.Empty:
+                break
+        for path, line in batch:
+            try:
+                if path not in files:
+                    files[path] = open(path, "a")
+                files[path].write(line)
+            except OSError:
+                pass
+        for f in files.values():
+            try:
+                f.flush()
+            except OSError:
+                pass
+        for _ in batch:
+            _lines.task_done()
+
+
+def flush():
+    """Waits until every queued entry has been written."""
+    _lines.join()
+
+
+def _parse(line: str):
+    line = line.strip()
+    if line.startswith("{"):
+        try:
+            entry = json.loads(line)
+            return entry.get("kind"), entry.get("value")
+        except ValueError:
+            return None
+    match = _RECIPE_PATH.search(line)
+    if match:
+        return RECIPE, match.group(1)
+    return None
+
+
+def popular(path: str, top: int = 50) -> list:
+    """The `top` most frequent (kind, value) entries of a log, most frequent first."""
+    counts = Counter()
+    with open(path, errors="replace") as f:
+        for line in f:
+            entry = _parse(line)
+            if entry and entry[0] and entry[1]:
+                kind, value = entry
+                # Titles are counted case/space-insensitively, like the title cache
+                if kind != RECIPE:
+                    value = " ".join(str(value).lower().split())
+                counts[(kind, value)] += 1
+    return [key for key, _ in counts.most_common(top)]
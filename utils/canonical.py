@@ -0,0 +1,243 @@
+"""
+Ingredient name canonicalization: "Tomatoes", "tomato, diced" and
+"2 roma tomatoes" all become "tomato" (clean -> aliases -> known names ->
+closest trigram match). Results are memoized.
+"""
+
+import re
+import threading
+from bisect import bisect_left
+import numpy as np
+
+QUALIFIERS = {
+    "fresh", "freshly", "chopped", "diced", "minced", "sliced", "grated", "crushed",
+    "peeled", "cubed", "shredded", "julienned", "halved", "quartered", "mashed",
+    "finely", "roughly", "thinly", "coarsely", "lightly", "large", "small", "medium",
+    "ripe", "raw", "organic", "frozen", "canned", "tinned", "boneless", "skinless",
+    "optional", "softened", "melted", "beaten", "cooked", "uncooked", "washed",
+    "trimmed", "deseeded", "seeded", "pitted", "packed", "heaping", "level", "whole",
+    "taste", "to", "for", "garnish", "and", "or", "of", "a", "an", "the", "some",
+}
+
+UNITS = {
+    "cup", "cups", "tbsp", "tsp", "tablespoon", "tablespoons", "teaspoon", "teaspoons",
+    "g", "gm", "gram", "grams", "kg", "ml", "l", "litre", "liter", "oz", "ounce",
+    "ounces", "lb", "lbs", "pound", "pounds", "pinch", "dash", "clove", "cloves",
+    "can", "cans", "piece", "pieces", "slice", "slices", "sprig", "sprigs",
+    "bunch", "handful", "stick", "sticks", "inch", "cm",
+}
+
+# Words that look plural but aren't, or singularize irregularly
+SINGULAR_EXCEPTIONS = {
+    "leaves": "leaf", "halves": "half", "loaves": "loaf", "knives": "knife",
+    "molasses": "molasses", "couscous": "couscous", "hummus": "hummus",
+    "asparagus": "asparagus", "swiss": "swiss", "citrus": "citrus", "grass": "grass",
+    "chillies": "chilli", "chilies": "chili", "lentils": "lentil", "oats": "oat",
+    "greens": "greens", "brussels": "brussels", "series": "series",
+}
+
+# variant -> canonical; keys are written in canonical (singular, qualifier-free) form
+ALIASES = {
+    "roma tomato": "tomato", "plum tomato": "tomato", "cherry tomato": "tomato",
+    "vine tomato": "tomato", "tomatoe": "tomato",
+    "scallion": "green onion", "spring onion": "green onion",
+    "red onion": "onion", "white onion": "onion", "yellow onion": "onion",
+    "cilantro": "coriander", "coriander leaf": "coriander", "cilantro leaf": "coriander",
+    "dhania": "coriander", "basil leaf": "basil", "mint leaf": "mint",
+    "garbanzo bean": "chickpea", "garbanzo": "chickpea", "chana": "chickpea",
+    "aubergine": "eggplant", "brinjal": "eggplant", "baingan": "eggplant",
+    "courgette": "zucchini", "capsicum": "bell pepper", "green bell pepper": "bell pepper",
+    "red bell pepper": "bell pepper",
+    "all purpose flour": "flour", "plain flour": "flour",
+    "maida": "flour", "atta": "whole wheat flour",
+    "curd": "yogurt", "yoghurt": "yogurt", "dahi": "yogurt", "plain yogurt": "yogurt",
+    "extra virgin olive oil": "olive oil", "virgin olive oil": "olive oil",
+    "kosher salt": "salt", "sea salt": "salt", "table salt": "salt",
+    "ground black pepper": "black pepper", "black peppercorn": "black pepper",
+    "unsalted butter": "butter", "salted butter": "butter",
+    "heavy cream": "cream", "whipping cream": "cream", "double cream": "cream",
+    "single cream": "cream", "fresh cream": "cream",
+    "chicken breast": "chicken", "chicken thigh": "chicken",
+    "caster sugar": "sugar", "granulated sugar": "sugar", "white sugar": "sugar",
+    "egg white": "egg", "egg yolk": "egg",
+    "cottage cheese": "paneer", "jeera": "cumin", "cumin seed": "cumin",
+    "haldi": "turmeric", "turmeric powder": "turmeric", "adrak": "ginger",
+    "lahsun": "garlic", "garlic clove": "garlic", "pyaz": "onion", "aloo": "potato",
+    "whole milk": "milk", "skim milk": "milk",
+}
+
+FUZZY_THRESHOLD = 0.75
+MEMO_LIMIT = 100_000
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+_PAREN_RE = re.compile(r"\([^)]*\)")
+
+
+def singularize(word: str) -> str:
+    if word in SINGULAR_EXCEPTIONS:
+        return SINGULAR_EXCEPTIONS[word]
+    if len(word) <= 3:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("oes"):
+        return word[:-2]
+    if word.endswith(("ches", "shes", "xes", "sses", "zes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def clean(name: str) -> str:
+    """Steps 1-3: lowercase, drop qualifiers/quantities/units, singularize."""
+    text = _PAREN_RE.sub(" ", name.lower()).split(",")[0].replace("-", " ")
+    tokens = _TOKEN_RE.findall(text)
+    words = [w for w in tokens if w not in QUALIFIERS and w not in UNITS]
+    if not words:
+        # A name made only of unit words ("cloves", "can") is itself the ingredient
+        words = [w for w in tokens if w in UNITS]
+    return " ".join(singularize(w) for w in words)
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FrozenVocabulary:
+    """
+    Known names and their trigram postings as sorted sequences and CSR arrays
+    (e.g. mmapped from services/snapshot.py): looked up with bisect, nothing
+    is built when it is attached.
+    """
+
+    def __init__(self, names, grams, gram_indptr, gram_ids):
+        self.names = names          # sorted, cleaned
+        self.grams = grams          # sorted
+        self.gram_indptr = gram_indptr
+        self.gram_ids = gram_ids
+
+    @staticmethod
+    def arrays(names):
+        """(names, grams, gram_indptr, gram_ids) for `names`, ready to be stored."""
+        names = sorted({n for n in (clean(name) for name in names) if n})
+        postings = {}
+        for vid, name in enumerate(names):
+            for gram in trigrams(name):
+                postings.setdefault(gram, []).append(vid)
+        grams = sorted(postings)
+        indptr = np.zeros(len(grams) + 1, dtype=np.int64)
+        np.cumsum([len(postings[g]) for g in grams], out=indptr[1:])
+        ids = np.fromiter((vid for g in grams for vid in postings[g]), dtype=np.uint32,
+                          count=int(indptr[-1]))
+        return names, grams, indptr, ids
+
+    def __contains__(self, name: str) -> bool:
+        i = bisect_left(self.names, name)
+        return i < len(self.names) and self.names[i] == name
+
+    def __getitem__(self, vid) -> str:
+        return self.names[vid]
+
+    def ids(self, gram: str):
+        i = bisect_left(self.grams, gram)
+        if i < len(self.grams) and self.grams[i] == gram:
+            return self.gram_ids[self.gram_indptr[i]:self.gram_indptr[i + 1]]
+        return ()
+
+
+class Canonicalizer:
+
+    def __init__(self, aliases: dict):
+        self._lock = threading.Lock()
+        self._memo = {}
+        # Keys and targets both go through clean() ("atta" -> "wheat flour", the
+        # same key "whole wheat flour" gets), then chains are followed to the end
+        cleaned = {clean(variant): clean(canonical) for variant, canonical in aliases.items()}
+        self._aliases = {}
+        for variant, target in cleaned.items():
+            seen = {variant}
+            while target in cleaned and target not in seen:
+                seen.add(target)
+                target = cleaned[target]
+            self._aliases[variant] = target
+        self._vocab = []
+        self._vocab_ids = {}
+        self._grams = {}   # trigram -> set of vocab ids
+        self._frozen = []  # attached FrozenVocabulary objects
+        self.add_vocabulary(set(self._aliases.values()))
+
+    def add_vocabulary(self, names):
+        """Registers known canonical names (fuzzy-match targets)."""
+        with self._lock:
+            for name in names:
+                name = clean(name)
+                if not name or name in self._vocab_ids:
+                    continue
+                vid = len(self._vocab)
+                self._vocab.append(name)
+                self._vocab_ids[name] = vid
+                for gram in trigrams(name):
+                    self._grams.setdefault(gram, set()).add(vid)
+            # Earlier fuzzy answers may now have a better (exact) target
+            self._memo.clear()
+
+    def attach_vocabulary(self, vocabulary: FrozenVocabulary):
+        """Registers a prebuilt vocabulary of known canonical names."""
+        with self._lock:
+            self._frozen.append(vocabulary)
+            self._memo.clear()
+
+    def fuzzy(self, name: str):
+        """Closest known name by trigram Jaccard similarity, or None."""
+        grams = trigrams(name)
+        sources = [self._vocab] + self._frozen
+        shared = {}   # (source, vocab id) -> shared trigrams
+        for gram in grams:
+            for vid in self._grams.get(gram, ()):
+                shared[0, vid] = shared.get((0, vid), 0) + 1
+            for k, vocabulary in enumerate(self._frozen, 1):
+                for vid in vocabulary.ids(gram):
+                    key = (k, int(vid))
+                    shared[key] = shared.get(key, 0) + 1
+        best, best_score = None, FUZZY_THRESHOLD
+        for (k, vid), count in shared.items():
+            target = sources[k][vid]
+            score = count / (len(grams) + len(trigrams(target)) - count)
+            if score >= best_score:
+                best, best_score = target, score
+        return best
+
+    def canonicalize(self, name: str) -> str:
+        memo = self._memo.get(name)
+        if memo is not None:
+            return memo
+
+        # Nothing but qualifiers ("to taste"): the text itself, whitespace-normalized
+        cleaned = clean(name) or " ".join(name.lower().split())
+        if cleaned in self._aliases:
+            result = self._aliases[cleaned]
+        elif self._known(cleaned):
+            result = cleaned
+        else:
+            target = self.fuzzy(cleaned)
+            result = self._aliases.get(target, target) if target else cleaned
+
+        if len(self._memo) >= MEMO_LIMIT:
+            self._memo.clear()
+        self._memo[name] = result
+        return result
+
+    def _known(self, cleaned: str) -> bool:
+        return cleaned in self._vocab_ids or any(cleaned in v for v in self._frozen)
+
+    def is_known(self, name: str) -> bool:
+        return self._known(clean(name))
+
+
+canonicalizer = Canonicalizer(ALIASES)
+
+
+def canonicalize(name: str) -> str:
+    return canonicalizer.canonicalize(name)
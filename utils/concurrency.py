@@ -0,0 +1,142 @@
+"""
+Bounded concurrent fan-out for independent upstream lookups.
+Every call shares one deadline; calls that miss it resolve to `default`.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def remaining(started_at: float, budget: float) -> float:
+    """Seconds left of `budget` for a request that started at `started_at` (monotonic)."""
+    return max(0.0, budget - (time.monotonic() - started_at))
+
+
+async def gather_bounded(calls: list, limit: int, deadline: float, default=None, name: str = ""):
+    """
+    Runs zero-arg coroutine functions concurrently, at most `limit` at a time.
+    Results come back in input order; failures and late calls become `default`.
+    """
+    started = time.monotonic()
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(call):
+        async with semaphore:
+            return await call()
+
+    tasks = [asyncio.ensure_future(run(call)) for call in calls]
+    results = [default] * len(tasks)
+    timed_out = 0
+
+    if tasks:
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        timed_out = len(pending)
+        for i, task in enumerate(tasks):
+            if task in done and not task.cancelled() and task.exception() is None:
+                results[i] = task.result()
+
+    _record(name, len(calls), timed_out, time.monotonic() - started)
+    return results
+
+
+async def iter_bounded(calls: list, limit: int, deadline: float, default=None, name: str = ""):
+    """
+    Streaming gather_bounded: yields (index, result) as each call finishes.
+    Calls still running at the deadline are cancelled and yielded last as `default`.
+    """
+    started = time.monotonic()
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(call):
+        async with semaphore:
+            return await call()
+
+    tasks = [asyncio.ensure_future(run(call)) for call in calls]
+    positions = {task: i for i, task in enumerate(tasks)}
+    pending = set(tasks)
+    timed_out = 0
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=remaining(started, deadline),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                break
+            for task in sorted(done, key=positions.get):
+                ok = not task.cancelled() and task.exception() is None
+                yield positions[task], task.result() if ok else default
+
+        late = sorted(pending, key=positions.get)
+        for task in late:
+            task.cancel()
+        timed_out = len(late)
+        pending = set()
+        for task in late:
+            yield positions[task], default
+    finally:
+        # Consumer went away (e.g. client disconnected mid-stream)
+        for task in pending:
+            task.cancel()
+        _record(name, len(calls), timed_out, time.monotonic() - started)
+
+
+def run_bounded(calls: list, limit: int, deadline: float, default=None, name: str = ""):
+    """Thread-pool counterpart of gather_bounded for sync callers (Streamlit)."""
+    started = time.monotonic()
+    results = [default] * len(calls)
+    timed_out = 0
+
+    if calls:
+        executor = ThreadPoolExecutor(max_workers=max(1, limit))
+        futures = [executor.submit(call) for call in calls]
+        done, pending = wait(futures, timeout=deadline)
+        # Don't block on stragglers — they finish in the background and are discarded
+        executor.shutdown(wait=False, cancel_futures=True)
+        timed_out = len(pending)
+        for i, future in enumerate(futures):
+            if future in done and future.exception() is None:
+                results[i] = future.result()
+
+    _record(name, len(calls), timed_out, time.monotonic() - started)
+    return results
+
+
+def _record(name: str, calls: int, timed_out: int, elapsed: float):
+    if not name:
+        return
+    with _stats_lock:
+        s = _stats.setdefault(name, {
+            "requests": 0, "calls": 0, "timed_out": 0,
+            "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0,
+        })
+        elapsed_ms = elapsed * 1000
+        s["requests"] += 1
+        s["calls"] += calls
+        s["timed_out"] += timed_out
+        s["total_ms"] += elapsed_ms
+        s["max_ms"] = max(s["max_ms"], elapsed_ms)
+        s["last_ms"] = elapsed_ms
+
+
+def fanout_stats() -> dict:
+    """Per-call-site fan-out timings (wall time of the whole concurrent batch)."""
+    with _stats_lock:
+        return {
+            name: {
+                **s,
+                "avg_ms": round(s["total_ms"] / s["requests"], 2) if s["requests"] else 0.0,
+                "total_ms": round(s["total_ms"], 2),
+                "max_ms": round(s["max_ms"], 2),
+                "last_ms": round(s["last_ms"], 2),
+            }
+            for name, s in _stats.items()
+        }
@@ -7,4 +7,104 @@ RECIPEDB_API_KEY = os.getenv("RECIPEDB_API_KEY", "")
 RECIPEDB_BASE_URL = os.getenv("RECIPEDB_BASE_URL", "")
 
 FLAVORDB_API_KEY = os.getenv("FLAVORDB_API_KEY", "")
-FLAVORDB_BASE_URL = os.getenv("FLAVORDB_BASE_URL", "")
\ No newline at end of file
+FLAVORDB_BASE_URL = os.getenv("FLAVORDB_BASE_URL", "")
+
+# Where RecipeDB lookups are answered: remote (live API), local (offline store only)
+# or local-then-remote (offline store, falling back to the API on a miss)
+RECIPEDB_MODE = os.getenv("RECIPEDB_MODE", "remote")
+RECIPE_STORE_PATH = os.getenv("RECIPE_STORE_PATH", "data/recipes.sqlite3")
+# mmapped corpus + ingredient index (python -m services.snapshot build); used when present
+RECIPE_SNAPSHOT_PATH = os.getenv("RECIPE_SNAPSHOT_PATH", "data/recipes.snap")
+
+# Precomputed flavor-similarity substitutes (python -m logic.substitutes build);
+# when the table is missing, substitutes come from live FlavorDB lookups
+SUBSTITUTES_PATH = os.getenv("SUBSTITUTES_PATH", "data/substitutes.npz")
+# A table that fails to load is not retried for this many seconds
+SUBSTITUTES_LOAD_RETRY = float(os.getenv("SUBSTITUTES_LOAD_RETRY", "60"))
+SUBSTITUTE_TOP_K = int(os.getenv("SUBSTITUTE_TOP_K", "10"))
+# Credit for a recipe ingredient the pantry can substitute (1.0 = an exact match)
+SUBSTITUTE_MATCH_WEIGHT = float(os.getenv("SUBSTITUTE_MATCH_WEIGHT", "0.5"))
+# Flavor (Jaccard) similarity below which a neighbour is not offered as a substitute
+SUBSTITUTE_MIN_SIMILARITY = float(os.getenv("SUBSTITUTE_MIN_SIMILARITY", "0.2"))
+
+# Shared upstream HTTP client (services/http_client.py)
+UPSTREAM_POOL_SIZE = int(os.getenv("UPSTREAM_POOL_SIZE", "20"))
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "2"))
+UPSTREAM_RETRY_BACKOFF = float(os.getenv("UPSTREAM_RETRY_BACKOFF", "0.3"))
+
+# Per-upstream token-bucket rate limits (services/rate_limiter.py) — requests/second
+# and burst size; a rate of 0 disables limiting for that upstream
+RECIPEDB_RATE_LIMIT = float(os.getenv("RECIPEDB_RATE_LIMIT", "2"))
+RECIPEDB_RATE_BURST = int(os.getenv("RECIPEDB_RATE_BURST", "5"))
+FLAVORDB_RATE_LIMIT = float(os.getenv("FLAVORDB_RATE_LIMIT", "10"))
+FLAVORDB_RATE_BURST = int(os.getenv("FLAVORDB_RATE_BURST", "20"))
+
+# Per-upstream circuit breakers (services/circuit_breaker.py): open once BREAKER_FAILURE_RATE
+# of the last BREAKER_WINDOW calls (at least BREAKER_MIN_CALLS) failed or took longer than
+# BREAKER_SLOW_CALL seconds; fail fast for BREAKER_OPEN_SECONDS, then let a probe through
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_SLOW_CALL = float(os.getenv("BREAKER_SLOW_CALL", "4"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+
+# Concurrent upstream fan-out (utils/concurrency.py)
+FANOUT_CONCURRENCY = int(os.getenv("FANOUT_CONCURRENCY", "4"))
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "8"))
+
+# POST /api/recipe-details:batch — max items per request, recipes resolved
+# at once, and the deadline for the whole batch (seconds)
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_DEADLINE = float(os.getenv("BATCH_DEADLINE", "20"))
+
+# Upstream response cache (services/cache.py) — TTLs in seconds
+# CACHE_BACKEND: memory (per process), sqlite (shared on one host) or redis (shared across hosts)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "cache/responses.sqlite3")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_TTL_TITLE = int(os.getenv("CACHE_TTL_TITLE", "3600"))
+CACHE_TTL_RECIPE = int(os.getenv("CACHE_TTL_RECIPE", "86400"))
+# A recipe payload degraded by the request deadline (marked "partial")
+CACHE_TTL_PARTIAL = int(os.getenv("CACHE_TTL_PARTIAL", "60"))
+CACHE_TTL_INSTRUCTIONS = int(os.getenv("CACHE_TTL_INSTRUCTIONS", "86400"))
+CACHE_TTL_FLAVOR = int(os.getenv("CACHE_TTL_FLAVOR", "86400"))
+CACHE_TTL_NEGATIVE = int(os.getenv("CACHE_TTL_NEGATIVE", "300"))
+# How long an expired entry is kept to be served stale while it is refreshed in
+# the background (stale-while-revalidate), or while upstream is down
+CACHE_STALE_TTL = int(os.getenv("CACHE_STALE_TTL", "86400"))
+# After a sqlite/redis error the backend is skipped (all misses) for this many seconds
+CACHE_BACKEND_RETRY = float(os.getenv("CACHE_BACKEND_RETRY", "5"))
+
+# Predictive prefetch: after a search, the detail payloads of its top results
+# are resolved in the background (0 disables). A job waits up to
+# PREFETCH_MAX_WAIT seconds for every upstream to hold more than
+# PREFETCH_RESERVE rate-limit tokens, so user requests keep their budget
+PREFETCH_TOP_N = int(os.getenv("PREFETCH_TOP_N", "3"))
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "2"))
+PREFETCH_QUEUE = int(os.getenv("PREFETCH_QUEUE", "64"))
+PREFETCH_RESERVE = float(os.getenv("PREFETCH_RESERVE", "2"))
+PREFETCH_MAX_WAIT = float(os.getenv("PREFETCH_MAX_WAIT", "5"))
+# JSON-lines log of searches and detail views (empty = off); feeds cache warming
+ACCESS_LOG_PATH = os.getenv("ACCESS_LOG_PATH", "")
+
+# Typeahead (GET /api/suggest): entries kept per index (recipe titles,
+# ingredients; ~30 MB each at 100k); beyond that the least popular are dropped.
+# New store rows are picked up at most every SUGGEST_STORE_POLL seconds
+SUGGEST_MAX_ENTRIES = int(os.getenv("SUGGEST_MAX_ENTRIES", "100000"))
+SUGGEST_STORE_POLL = float(os.getenv("SUGGEST_STORE_POLL", "30"))
+
+# HTTP caching and compression (backend/http_cache.py): browser/CDN max-age per
+# route in seconds (responses still carry an ETag to revalidate against), and
+# responses smaller than COMPRESS_MIN_SIZE bytes are sent uncompressed
+HTTP_MAX_AGE_SEARCH = int(os.getenv("HTTP_MAX_AGE_SEARCH", "300"))
+HTTP_MAX_AGE_DETAIL = int(os.getenv("HTTP_MAX_AGE_DETAIL", "3600"))
+HTTP_MAX_AGE_SUGGEST = int(os.getenv("HTTP_MAX_AGE_SUGGEST", "300"))
+HTTP_MAX_AGE_STATIC = int(os.getenv("HTTP_MAX_AGE_STATIC", "3600"))
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "512"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+
+# Protects /api/admin/* mutations when set
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
@@ -1,6 +1,18 @@
+import math
+
+
 def normalize(text: str) -> str:
     return text.strip().lower()
 
 
 def split_ingredients(text: str):
     return [i.strip() for i in text.split(",") if i.strip()]
+
+
+def to_float(value, default: float = 0.0) -> float:
+    """Parses RecipeDB's numeric strings ("12.5", "", None, "NaN") without raising."""
+    try:
+        number = float(value or default)
+    except (TypeError, ValueError):
+        return default
+    return number if math.isfinite(number) else default
@@ -0,0 +1,230 @@
+"""
+In-process metrics in the Prometheus text format, plus the per-request phase
+breakdown (`with timed("scoring"): ...`) for the Server-Timing header.
+Upstream time is wall time with at least one call in flight.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; covers cached hits (~1ms) up to the upstream timeout
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_registry = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        return lines + self._samples()
+
+    def _samples(self) -> list:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels=()):
+        super().__init__(name, help, labels)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, k)} {_number(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}   # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def _samples(self) -> list:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class GaugeFunc(_Metric):
+    """
+    A metric read at scrape time: fn() -> {label values tuple: value}. For
+    counters other modules already keep, pass kind="counter".
+    """
+
+    def __init__(self, name: str, help: str, labels, fn, kind: str = "gauge"):
+        super().__init__(name, help, labels)
+        self.fn = fn
+        self.kind = kind
+
+    def _samples(self) -> list:
+        try:
+            values = self.fn()
+        except Exception:
+            return []
+        return [
+            f"{self.name}{_labels(self.label_names, k)} {_number(v)}"
+            for k, v in sorted(values.items())
+        ]
+
+
+def render() -> str:
+    """Every registered metric, in the Prometheus text format."""
+    lines = []
+    for metric in list(_registry):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Upstream calls (recorded by services/http_client.py and the service modules)
+UPSTREAM_REQUESTS = Counter(
+    "upstream_requests_total",
+    "Upstream API calls by endpoint and outcome (HTTP status, timeout, error, circuit_open).",
+    ("upstream", "endpoint", "status"),
+)
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds",
+    "Upstream API call latency.",
+    ("upstream", "endpoint"),
+)
+UPSTREAM_TIMEOUTS = Counter(
+    "upstream_timeouts_total",
+    "Upstream API calls that timed out.",
+    ("upstream", "endpoint"),
+)
+UPSTREAM_SWALLOWED = Counter(
+    "upstream_swallowed_exceptions_total",
+    "Exceptions the service layer caught and turned into an empty result.",
+    ("upstream", "endpoint", "exception"),
+)
+
+
+def record_swallowed(upstream: str, endpoint: str, error: BaseException):
+    UPSTREAM_SWALLOWED.inc(upstream=upstream, endpoint=endpoint, exception=type(error).__name__)
+
+
+class RequestTiming:
+    """Seconds spent per phase while serving one request."""
+
+    __slots__ = ("started", "phases", "_upstream_calls", "_upstream_since", "_lock")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self._upstream_calls = 0
+        self._upstream_since = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float):
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def upstream_started(self):
+        with self._lock:
+            if self._upstream_calls == 0:
+                self._upstream_since = time.perf_counter()
+            self._upstream_calls += 1
+
+    def upstream_finished(self):
+        with self._lock:
+            self._upstream_calls -= 1
+            if self._upstream_calls == 0:
+                elapsed = time.perf_counter() - self._upstream_since
+                self.phases["upstream"] = self.phases.get("upstream", 0.0) + elapsed
+
+    def server_timing(self) -> str:
+        """Server-Timing header value (durations in milliseconds)."""
+        with self._lock:
+            phases = dict(self.phases)
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in phases.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_timing = contextvars.ContextVar("request_timing", default=None)
+
+
+def start_request_timing() -> RequestTiming:
+    timing = RequestTiming()
+    _timing.set(timing)
+    return timing
+
+
+def current_timing():
+    """The RequestTiming of the request being served, or None (CLI, Streamlit, background)."""
+    return _timing.get()
+
+
+@contextmanager
+def timed(phase: str):
+    """Adds the block's wall time to `phase` of the current request."""
+    timing = _timing.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timing is not None:
+            timing.add(phase, time.perf_counter() - started)